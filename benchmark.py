@@ -0,0 +1,364 @@
+"""책 출판용 PDF 편집기 - 처리 단계별 성능 측정
+
+로컬에서 합성 A4 가로 PDF(벡터 텍스트 / 전면 스캔 이미지 / 혼합)를 만들고
+분할(split_landscape_pages), 페이지 변환(transform_page_to_book_size),
+미리보기(create_preview_image), 최종 조립(create_book_pdf)을 단계별로 측정합니다.
+결과는 초당 페이지 수와 최대 메모리로 기록하며, 저장된 기준 결과와 비교해
+성능 저하를 찾아냅니다.
+
+사용 예:
+    python benchmark.py --pages 20 100 --save-baseline bench_baseline.json
+    python benchmark.py --pages 20 100 --baseline bench_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import fitz  # PyMuPDF
+
+from split_pdf_editor import BookPublishingEditor, get_preview_base_cache, get_preview_image_cache
+
+CONTENT_KINDS = ["vector", "scan", "mixed"]
+STAGES = ["split", "transform", "preview", "assemble"]
+
+A4_LANDSCAPE = (842, 595)
+
+DEFAULT_MARGINS = {'top': 15, 'bottom': 15, 'outer': 15, 'inner': 15}
+DEFAULT_SCALING = {
+    'odd': {'scale': 1.0, 'offset_x': 0.0, 'offset_y': 0.0},
+    'even': {'scale': 1.0, 'offset_x': 0.0, 'offset_y': 0.0},
+    'individual_adjustments': {}
+}
+
+
+def _draw_vector_half(page, x0, page_index, side):
+    """반쪽 영역에 벡터 텍스트와 도형 그리기"""
+    width, height = A4_LANDSCAPE[0] / 2, A4_LANDSCAPE[1]
+    page.draw_rect(fitz.Rect(x0 + 30, 30, x0 + width - 30, height - 30), color=(0, 0, 0), width=0.5)
+    for line in range(28):
+        page.insert_text(
+            (x0 + 40, 60 + line * 18),
+            f"{page_index + 1}-{side} 본문 줄 {line + 1}: The quick brown fox jumps over the lazy dog",
+            fontsize=8, fontname="helv"
+        )
+
+
+def _scan_noise(rng, width, height):
+    """스캔 원고의 종이 결을 흉내 낸 밝은 회색조 노이즈 (시드 고정)"""
+    return bytes(rng.randrange(200, 256) for _ in range(width * height))
+
+
+def _scan_pixmap(rng, noise, width, height):
+    """노이즈 위에 글자 줄처럼 보이는 어두운 단어를 찍은 스캔 페이지 이미지
+
+    단어 길이와 간격, 농도를 rng로 정하므로 페이지마다 내용(해시)이 달라
+    미리보기/분할 캐시 적중 없이 페이지마다 실제 처리 비용을 측정합니다.
+    """
+    samples = bytearray(noise)
+    right = width - 40
+    for row in range(40, height - 40, 24):
+        x = 40 + rng.randrange(0, 30)
+        while x < right:
+            word = min(rng.randrange(12, 90), right - x)
+            ink = bytes([rng.randrange(0, 80)]) * word
+            for y in range(row, min(row + 8, height)):
+                start = y * width + x
+                samples[start:start + word] = ink
+            x += word + rng.randrange(6, 20)
+    return fitz.Pixmap(fitz.csGRAY, width, height, bytes(samples), False)
+
+
+def generate_sample_pdf(path, kind, pages, seed=0):
+    """합성 A4 가로 PDF 생성 (kind: vector, scan, mixed)"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    noise = None
+    if kind in ("scan", "mixed"):
+        # 종이 결 노이즈는 한 번만 만들고 (생성 시간 단축) 글자 줄은 페이지마다 다르게 찍음
+        noise = _scan_noise(rng, 1240, 877)  # 약 150 DPI
+
+    for page_index in range(pages):
+        page = doc.new_page(width=A4_LANDSCAPE[0], height=A4_LANDSCAPE[1])
+        use_scan = kind == "scan" or (kind == "mixed" and page_index % 2 == 1)
+        if use_scan:
+            page.insert_image(page.rect, pixmap=_scan_pixmap(rng, noise, 1240, 877))
+        else:
+            _draw_vector_half(page, 0, page_index, "L")
+            _draw_vector_half(page, A4_LANDSCAPE[0] / 2, page_index, "R")
+
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+class PeakMemoryMonitor:
+    """측정 구간의 최대 메모리 기록
+
+    RSS는 /proc/self/statm을 주기적으로 읽어 구간 시작 대비 증가량으로 기록하며
+    (PyMuPDF 등 네이티브 메모리 포함), trace_python이면 tracemalloc 최대값도 함께 기록합니다.
+    """
+
+    def __init__(self, trace_python=False, interval=0.005):
+        self.trace_python = trace_python
+        self.interval = interval
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self._stop = threading.Event()
+        self._thread = None
+        self.rss_start = 0
+        self.rss_peak = 0
+        self.python_peak = None
+
+    def _read_rss(self):
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.rss_peak = max(self.rss_peak, self._read_rss())
+
+    def __enter__(self):
+        if self.trace_python:
+            tracemalloc.start()
+        self.rss_start = self.rss_peak = self._read_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.rss_peak = max(self.rss_peak, self._read_rss())
+        if self.trace_python:
+            self.python_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return False
+
+    @property
+    def rss_delta_mb(self):
+        return max(0, self.rss_peak - self.rss_start) / (1024 * 1024)
+
+
+def _measure(stage_fn, page_count, trace_python):
+    """stage_fn 실행 시간과 메모리 측정 -> 결과 딕셔너리"""
+    with PeakMemoryMonitor(trace_python) as monitor:
+        started = time.perf_counter()
+        result = stage_fn()
+        seconds = time.perf_counter() - started
+
+    stats = {
+        'pages': page_count,
+        'seconds': round(seconds, 4),
+        'pages_per_sec': round(page_count / seconds, 2) if seconds > 0 else None,
+        'rss_peak_mb': round(monitor.rss_delta_mb, 1)
+    }
+    if monitor.python_peak is not None:
+        stats['python_peak_mb'] = round(monitor.python_peak / (1024 * 1024), 1)
+    return stats, result
+
+
+def run_case(pdf_path, kind, pages, args):
+    """PDF 한 개에 대해 모든 단계 측정"""
+    editor = BookPublishingEditor(args.book_width, args.book_height)
+    case = {'kind': kind, 'source_pages': pages, 'stages': {}}
+
+    stats, split_pages = _measure(
+        lambda: editor.split_landscape_pages(pdf_path, True, None, args.split_mode),
+        pages, args.trace_python
+    )
+    stats['pages'] = len(split_pages)
+    stats['pages_per_sec'] = round(len(split_pages) / stats['seconds'], 2) if stats['seconds'] > 0 else None
+    case['stages']['split'] = stats
+
+    def transform_all():
+        for index, page_info in enumerate(split_pages):
+            page_number = index + 1
+            page_margins = editor.calculate_page_margins(
+                page_number, DEFAULT_MARGINS['top'], DEFAULT_MARGINS['bottom'],
+                DEFAULT_MARGINS['outer'], DEFAULT_MARGINS['inner']
+            )
+            scale, offset_x, offset_y = editor.resolve_page_scaling(page_number, DEFAULT_SCALING)
+            editor.transform_page_to_book_size(
+                page_info['pdf_data'], page_margins, scale, offset_x, offset_y, args.engine
+            )
+
+    case['stages']['transform'], _ = _measure(transform_all, len(split_pages), args.trace_python)
+
+    def preview_all():
+        # 캐시 적중 없이 렌더링 비용만 측정
+        get_preview_base_cache().clear()
+        get_preview_image_cache().clear()
+        for index, page_info in enumerate(split_pages):
+            editor.create_preview_image(page_info, DEFAULT_MARGINS, 1.0, 0.0, 0.0, index + 1)
+
+    case['stages']['preview'], _ = _measure(preview_all, len(split_pages), args.trace_python)
+
+    output_fd, output_path = tempfile.mkstemp(suffix='.pdf')
+    os.close(output_fd)
+    try:
+        output_settings = {'engine': args.engine, 'workers': args.workers, 'output_path': output_path}
+        stats, result_path = _measure(
+            lambda: editor.create_book_pdf(split_pages, DEFAULT_MARGINS, DEFAULT_SCALING, False, None, output_settings),
+            len(split_pages), args.trace_python
+        )
+        if result_path is None:
+            raise RuntimeError(f"{kind} {pages}페이지: 최종 PDF 생성 실패")
+        stats['output_bytes'] = os.path.getsize(output_path)
+        case['stages']['assemble'] = stats
+    finally:
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+
+    return case
+
+
+def case_key(case):
+    return f"{case['kind']}-{case['source_pages']}"
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """기준 결과 대비 성능 저하 목록 -> [(케이스, 단계, 항목, 기준값, 현재값), ...]
+
+    초당 페이지 수는 (1 - tolerance)배 미만, 최대 메모리는 (1 + tolerance)배 초과를 저하로 봅니다.
+    메모리는 1MB 미만 차이는 측정 오차로 무시합니다.
+    """
+    baseline_cases = {case_key(case): case for case in baseline.get('cases', [])}
+    regressions = []
+
+    for case in results['cases']:
+        base_case = baseline_cases.get(case_key(case))
+        if base_case is None:
+            continue
+        for stage, stats in case['stages'].items():
+            base_stats = base_case['stages'].get(stage)
+            if not base_stats:
+                continue
+
+            base_speed, speed = base_stats.get('pages_per_sec'), stats.get('pages_per_sec')
+            if base_speed and speed and speed < base_speed * (1 - tolerance):
+                regressions.append((case_key(case), stage, 'pages_per_sec', base_speed, speed))
+
+            base_memory, memory = base_stats.get('rss_peak_mb'), stats.get('rss_peak_mb')
+            if base_memory is not None and memory is not None:
+                if memory > base_memory * (1 + tolerance) and memory - base_memory >= 1.0:
+                    regressions.append((case_key(case), stage, 'rss_peak_mb', base_memory, memory))
+
+    return regressions
+
+
+def print_report(results, baseline=None):
+    baseline_cases = {case_key(case): case for case in (baseline or {}).get('cases', [])}
+
+    header = f"{'케이스':<14}{'단계':<11}{'페이지':>7}{'초':>9}{'페이지/초':>11}{'RSS MB':>9}"
+    if baseline_cases:
+        header += f"{'기준 대비':>11}"
+    print(header)
+    print("-" * (72 if baseline_cases else 61))
+
+    for case in results['cases']:
+        base_case = baseline_cases.get(case_key(case))
+        for stage in STAGES:
+            stats = case['stages'].get(stage)
+            if stats is None:
+                continue
+            line = (
+                f"{case_key(case):<14}{stage:<11}{stats['pages']:>7}{stats['seconds']:>9.3f}"
+                f"{stats['pages_per_sec'] or 0:>11.1f}{stats['rss_peak_mb']:>9.1f}"
+            )
+            if base_case and base_case['stages'].get(stage, {}).get('pages_per_sec') and stats['pages_per_sec']:
+                ratio = stats['pages_per_sec'] / base_case['stages'][stage]['pages_per_sec']
+                line += f"{ratio:>10.2f}x"
+            print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PDF 처리 단계별 성능을 측정합니다.")
+    parser.add_argument('--pages', type=int, nargs='+', default=[20, 100], help="합성 PDF 원본 페이지 수 (기본 20 100)")
+    parser.add_argument('--kinds', nargs='+', choices=CONTENT_KINDS, default=CONTENT_KINDS, help="합성 PDF 내용 종류")
+    parser.add_argument('--split-mode', choices=["vector", "raster"], default="vector", help="분할 방식")
+    parser.add_argument('--engine', choices=["vector", "raster"], default="vector", help="출력 방식")
+    parser.add_argument('--workers', type=int, default=1, help="최종 조립 병렬 프로세스 수")
+    parser.add_argument('--book-width', type=float, default=125, help="책 너비 (mm)")
+    parser.add_argument('--book-height', type=float, default=175, help="책 높이 (mm)")
+    parser.add_argument('--trace-python', action='store_true', help="tracemalloc으로 파이썬 할당 최대값도 기록 (측정 시간이 늘어남)")
+    parser.add_argument('--output', help="측정 결과 JSON 저장 경로")
+    parser.add_argument('--save-baseline', help="측정 결과를 기준 결과로 저장할 경로")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="성능 저하로 판단할 허용 비율 (기본 0.2 = 20%%)")
+    parser.add_argument('--keep-samples', help="합성 PDF를 지우지 않고 보관할 디렉터리")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pymupdf': fitz.VersionBind
+        },
+        'settings': {
+            'split_mode': args.split_mode,
+            'engine': args.engine,
+            'workers': args.workers,
+            'book_size_mm': [args.book_width, args.book_height]
+        },
+        'cases': []
+    }
+
+    sample_dir = args.keep_samples or tempfile.mkdtemp(prefix='pdf_bench_')
+    os.makedirs(sample_dir, exist_ok=True)
+
+    try:
+        for kind in args.kinds:
+            for pages in args.pages:
+                pdf_path = os.path.join(sample_dir, f"bench_{kind}_{pages}.pdf")
+                if not os.path.exists(pdf_path):
+                    generate_sample_pdf(pdf_path, kind, pages)
+                print(f"⏱️ {kind} {pages}페이지 측정 중...", file=sys.stderr)
+                results['cases'].append(run_case(pdf_path, kind, pages, args))
+    finally:
+        if not args.keep_samples:
+            for name in os.listdir(sample_dir):
+                os.unlink(os.path.join(sample_dir, name))
+            os.rmdir(sample_dir)
+
+    print_report(results, baseline)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 성능 저하 {len(regressions)}건 (허용 {args.tolerance:.0%}):")
+            for key, stage, metric, base_value, value in regressions:
+                print(f"  {key} {stage} {metric}: {base_value} -> {value}")
+            return 1
+        print(f"\n✅ 기준 대비 성능 저하 없음 (허용 {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""책 출판용 PDF 편집기 - 명령줄 일괄 처리
+
+브라우저 없이 BookPublishingEditor로 여러 PDF를 한 번에 변환합니다.
+
+사용 예:
+    python book_cli.py manuscripts/ -o books/ --jobs 4 --margin-inner 20
+    python book_cli.py input.pdf -o book_input.pdf --page-order 2341
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from split_pdf_editor import BookPublishingEditor, IMPOSITION_SIGNATURE_SIZES
+
+
+def collect_input_files(inputs):
+    """입력 경로(파일 또는 디렉터리) 목록에서 PDF 파일 목록 생성"""
+    pdf_files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith('.pdf'):
+                    pdf_files.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            pdf_files.append(path)
+        else:
+            raise FileNotFoundError(f"입력 경로를 찾을 수 없습니다: {path}")
+    return pdf_files
+
+
+def resolve_output_path(input_path, output, multiple):
+    """입력 파일에 대응하는 출력 경로 결정 (UI와 같은 book_ 접두어 사용)"""
+    file_name = f"book_{os.path.basename(input_path)}"
+    if output is None:
+        return os.path.join(os.path.dirname(input_path), file_name)
+    if multiple or os.path.isdir(output) or output.endswith(os.sep):
+        return os.path.join(output, file_name)
+    return output
+
+
+def build_job_settings(args):
+    """명령줄 인자를 편집기 설정 딕셔너리로 변환"""
+    margins = {
+        'top': args.margin_top,
+        'bottom': args.margin_bottom,
+        'outer': args.margin_outer,
+        'inner': args.margin_inner
+    }
+
+    scaling_settings = {
+        'odd': {
+            'scale': args.scale_odd,
+            'offset_x': args.offset_x_odd,
+            'offset_y': args.offset_y_odd
+        },
+        'even': {
+            'scale': args.scale_even,
+            'offset_x': args.offset_x_even,
+            'offset_y': args.offset_y_even
+        },
+        'individual_adjustments': {}
+    }
+
+    output_settings = {
+        'engine': args.engine,
+        'workers': args.page_workers,
+        'codec': args.codec,
+        'jpeg_quality': args.jpeg_quality,
+        'flate_level': args.flate_level,
+        'dpi': args.dpi,
+        'strips': args.strips,
+        'checkpoint_dir': args.checkpoint_dir,
+        'page_cache': args.page_cache,
+        'dedupe': args.dedupe
+    }
+
+    return {
+        'book_width_mm': args.book_width,
+        'book_height_mm': args.book_height,
+        'use_first_page': not args.skip_first_page,
+        'page_order': args.page_order,
+        'signature_pages': args.signature_pages,
+        'split_mode': args.split_mode,
+        'margins': margins,
+        'scaling_settings': scaling_settings,
+        'show_margin_guides': args.guides,
+        'output_settings': output_settings
+    }
+
+
+def run_book_job(input_path, output_path, settings):
+    """PDF 한 권 처리: 분할 -> 순서 적용 -> 최종 PDF 저장"""
+    started = time.time()
+    editor = BookPublishingEditor(settings['book_width_mm'], settings['book_height_mm'])
+
+    analysis = editor.analyze_pdf(input_path)
+    if 'error' in analysis:
+        raise ValueError(f"PDF 분석 실패: {analysis['error']}")
+
+    split_pages = editor.split_landscape_pages(
+        input_path, settings['use_first_page'], None, settings['split_mode'],
+        workers=settings['output_settings']['workers']
+    )
+    if not split_pages:
+        raise ValueError("PDF 분할에 실패했습니다.")
+
+    ordered_pages = editor.apply_page_order(split_pages, settings['page_order'], settings['signature_pages'])
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # 완성된 페이지를 출력 파일로 바로 기록
+    output_settings = dict(settings['output_settings'], output_path=output_path)
+    result_path = editor.create_book_pdf(
+        ordered_pages, settings['margins'], settings['scaling_settings'],
+        settings['show_margin_guides'], None, output_settings
+    )
+    if result_path is None:
+        raise ValueError("PDF 생성에 실패했습니다.")
+
+    return {
+        'input': input_path,
+        'output': output_path,
+        'pages': len(ordered_pages),
+        'seconds': time.time() - started,
+        'peak_memory': editor.memory_usage.peak
+    }
+
+
+def format_result(result):
+    """처리 결과 한 줄 요약 (메모리 예산에서 확보한 최대량 포함)"""
+    return (
+        f"✅ {result['input']} -> {result['output']} ({result['pages']}페이지, {result['seconds']:.1f}초, "
+        f"최대 메모리 {result['peak_memory'] / (1024 * 1024):.0f}MB)"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="A4 가로 PDF를 책 출판용 PDF로 일괄 변환합니다."
+    )
+    parser.add_argument('inputs', nargs='+', help="입력 PDF 파일 또는 PDF가 들어 있는 디렉터리")
+    parser.add_argument('-o', '--output', help="출력 파일 (입력이 하나일 때) 또는 출력 디렉터리")
+
+    parser.add_argument('--book-width', type=float, default=125, help="책 너비 (mm, 기본 125)")
+    parser.add_argument('--book-height', type=float, default=175, help="책 높이 (mm, 기본 175)")
+
+    parser.add_argument('--margin-top', type=float, default=15, help="위쪽 여백 (mm)")
+    parser.add_argument('--margin-bottom', type=float, default=15, help="아래쪽 여백 (mm)")
+    parser.add_argument('--margin-outer', type=float, default=15, help="바깥쪽 여백 (mm)")
+    parser.add_argument('--margin-inner', type=float, default=15, help="안쪽 여백 (mm)")
+
+    parser.add_argument('--scale-odd', type=float, default=1.0, help="홀수 페이지 축소 비율")
+    parser.add_argument('--offset-x-odd', type=float, default=0.0, help="홀수 페이지 좌우 이동 (mm)")
+    parser.add_argument('--offset-y-odd', type=float, default=0.0, help="홀수 페이지 상하 이동 (mm)")
+    parser.add_argument('--scale-even', type=float, default=1.0, help="짝수 페이지 축소 비율")
+    parser.add_argument('--offset-x-even', type=float, default=0.0, help="짝수 페이지 좌우 이동 (mm)")
+    parser.add_argument('--offset-y-even', type=float, default=0.0, help="짝수 페이지 상하 이동 (mm)")
+
+    parser.add_argument('--page-order', choices=["1234", "2341", "saddle", "perfect"], default="1234",
+                        help="페이지 순서 (saddle: 중철, perfect: 무선 접장 순서, 모자란 페이지는 뒤표지 앞에 빈 페이지로 채움)")
+    parser.add_argument('--signature-pages', type=int, choices=IMPOSITION_SIGNATURE_SIZES, default=4,
+                        help="접장 하나의 페이지 수 (saddle/perfect)")
+    parser.add_argument('--skip-first-page', action='store_true', help="좌측 첫 페이지를 제외하고 우측부터 시작")
+    parser.add_argument('--split-mode', choices=["vector", "raster"], default="vector", help="분할 방식")
+    parser.add_argument('--engine', choices=["vector", "raster"], default="vector", help="출력 방식")
+    parser.add_argument('--codec', choices=["flate", "jpeg", "bilevel", "auto"], default="flate",
+                        help="이미지 방식 페이지 압축 (auto: 페이지 내용에 따라 선택)")
+    parser.add_argument('--jpeg-quality', type=int, default=85, help="JPEG 품질 (1-95)")
+    parser.add_argument('--flate-level', type=int, default=6, help="Flate 압축 수준 (1-9)")
+    parser.add_argument('--dpi', type=int, default=300, help="이미지 방식 페이지 해상도 (기본 300)")
+    parser.add_argument('--strips', action='store_true',
+                        help="이미지 방식 페이지를 가로 띠 단위로 렌더링/압축 (고해상도/큰 판형에서도 페이지당 메모리 일정)")
+    parser.add_argument('--checkpoint-dir',
+                        help="완성된 페이지를 저장할 작업 디렉터리 (중단 후 같은 설정으로 다시 실행하면 남은 페이지만 처리)")
+    parser.add_argument('--page-cache', action='store_true',
+                        help="변환 결과 캐시 사용 (다시 변환할 때 설정이 바뀌지 않은 페이지는 복사, PDF_EDITOR_CACHE_DIR)")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="빈 페이지/중복 페이지는 한 번만 변환하고 출력 파일에서 같은 데이터를 참조")
+    parser.add_argument('--guides', action='store_true', help="여백 가이드 선 포함")
+
+    parser.add_argument('--jobs', type=int, default=1, help="동시에 처리할 책(PDF) 수")
+    parser.add_argument('--page-workers', type=int, default=1, help="책 한 권 안에서 사용할 페이지 병렬 프로세스 수")
+    parser.add_argument('--memory-budget', type=float,
+                        help="분할/변환/기록 단계가 함께 쓰는 전체 메모리 예산 (MB, 기본 PDF_EDITOR_MEMORY_BUDGET_MB 또는 1024). "
+                             "예산에 닿으면 병렬 작업 수를 줄이고 다음 페이지를 기다림")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        input_files = collect_input_files(args.inputs)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if not input_files:
+        print("❌ 처리할 PDF 파일이 없습니다.", file=sys.stderr)
+        return 2
+
+    settings = build_job_settings(args)
+    multiple = len(input_files) > 1
+
+    # 여러 권을 동시에 처리하면 메모리 예산을 프로세스 수로 나눔
+    # (책을 처리하는 워커 프로세스도 같은 값을 읽도록 환경 변수로 지정)
+    memory_budget_mb = args.memory_budget
+    if memory_budget_mb is None:
+        memory_budget_mb = float(os.environ.get('PDF_EDITOR_MEMORY_BUDGET_MB', 1024))
+    if args.jobs > 1 and multiple:
+        memory_budget_mb /= min(args.jobs, len(input_files))
+    os.environ['PDF_EDITOR_MEMORY_BUDGET_MB'] = str(memory_budget_mb)
+    jobs = [(path, resolve_output_path(path, args.output, multiple)) for path in input_files]
+
+    failures = 0
+    started = time.time()
+
+    if args.jobs > 1 and multiple:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {
+                executor.submit(run_book_job, input_path, output_path, settings): input_path
+                for input_path, output_path in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                    print(format_result(result))
+                except Exception as e:
+                    failures += 1
+                    print(f"❌ {futures[future]}: {e}", file=sys.stderr)
+    else:
+        for input_path, output_path in jobs:
+            try:
+                result = run_book_job(input_path, output_path, settings)
+                print(format_result(result))
+            except Exception as e:
+                failures += 1
+                print(f"❌ {input_path}: {e}", file=sys.stderr)
+
+    print(f"📚 완료: {len(jobs) - failures}/{len(jobs)}권, {time.time() - started:.1f}초")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
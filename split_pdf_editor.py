@@ -1,25 +1,71 @@
 import streamlit as st
-from PyPDF2 import PdfReader, PdfWriter
-from PyPDF2.generic import RectangleObject
+from PyPDF2 import PdfReader, PdfWriter, PageObject, Transformation
+from PyPDF2.generic import (
+    RectangleObject, DictionaryObject, ArrayObject, NameObject, IndirectObject,
+    StreamObject, DecodedStreamObject, EncodedStreamObject, NumberObject, BooleanObject
+)
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib.colors import red, blue
 import fitz  # PyMuPDF
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, features as pil_features
 import io
 import os
+import sys
+import importlib
 import tempfile
 import copy
+import mmap
+import multiprocessing
+import hashlib
+import itertools
+import json
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 class BookPublishingEditor:
     """A4 가로 레이아웃 PDF를 책 출판용으로 분할하고 편집하는 클래스"""
     
-    def __init__(self, book_width_mm=125, book_height_mm=175):
+    # 미리보기 캔버스 크기 (125:175 비율)
+    PREVIEW_SIZE = (200, 280)
+    
+    # 이미지 방식 출력 페이지의 인코딩 (auto: 페이지 내용에 따라 선택)
+    OUTPUT_CODECS = ("auto", "jpeg", "flate", "bilevel")
+    
+    # 메모리 예산 추정값: 워커 프로세스 하나의 기본 사용량, 벡터 페이지 하나의 작업 메모리
+    WORKER_PROCESS_BYTES = 80 * 1024 * 1024
+    VECTOR_PAGE_BYTES = 4 * 1024 * 1024
+    
+    # 이미지 방식 띠 단위 렌더링에서 띠 하나의 최대 크기 (RGB 바이트)
+    RASTER_STRIP_BYTES = 4 * 1024 * 1024
+    
+    def __init__(self, book_width_mm=125, book_height_mm=175, tracer=None):
         self.book_width_mm = book_width_mm
         self.book_height_mm = book_height_mm
         self.book_width_pt = book_width_mm * mm
         self.book_height_pt = book_height_mm * mm
+        # 단계별 시간 기록 (기본은 아무것도 기록하지 않는 계측기)
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        # 마지막 create_book_pdf의 이미지 페이지 인코딩 기록 (페이지별 코덱, 크기, 시간)
+        self.encoding_report = []
+        self._last_page_encoding = None
+        # 마지막 create_book_pdf에서 체크포인트/변환 결과 캐시로 재사용한 페이지 수와
+        # 중복 페이지로 출력 객체를 공유한 페이지 수
+        self.checkpoint_reused = 0
+        self.page_cache_hits = 0
+        self.duplicate_pages = 0
+        # 이 편집기가 메모리 예산에서 확보한 양 (peak: 분할부터 생성까지의 최대값)
+        self.memory_usage = MemoryUsage()
     
     def analyze_pdf(self, pdf_path):
         """PDF 파일 분석"""
@@ -44,105 +90,47 @@ class BookPublishingEditor:
         except Exception as e:
             return {'error': str(e)}
     
-    def split_landscape_pages(self, pdf_path, use_first_page=True, progress_callback=None):
-        """A4 가로 페이지를 좌우로 분할"""
+    def split_landscape_pages(self, pdf_path, use_first_page=True, progress_callback=None, split_mode="vector", workers=1, page_store=None):
+        """A4 가로 페이지를 좌우로 분할
+
+        split_mode가 "vector"이면 원본 페이지의 잘라낸 영역을 그대로 참조하는
+        벡터 페이지를 만들고(래스터화 없음), "raster"이면 기존처럼 144 DPI 이미지로
+        렌더링합니다. 벡터 분할에 실패한 페이지는 자동으로 이미지 방식으로 처리됩니다.
+        workers가 2 이상이면 페이지 범위를 나누어 여러 프로세스에서 분할합니다.
+        page_store(SplitPageStore)를 주면 PDF 데이터는 저장소에 기록하고
+        페이지 정보에는 'pdf_data' 대신 'page_ref' 핸들만 남깁니다.
+        페이지 정보에는 원본 파일 위치와 잘라낸 영역('source_path', 'clip')도 기록되어
+        이미지 방식 출력이 분할 결과 대신 원본에서 바로 렌더링할 수 있습니다.
+        """
         split_pages = []
-        temp_files = []  # 임시 파일 추적
-        
-        # PyMuPDF로 PDF 열기
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        trace_start = self.tracer.start()
+        source_ref = source_reference(pdf_path)
         
-        for page_num in range(total_pages):
-            if progress_callback:
-                progress_callback(page_num + 1, total_pages, f"페이지 {page_num + 1} 분할 중...")
-            
-            page = doc[page_num]
-            page_rect = page.rect
-            width = page_rect.width
-            height = page_rect.height
-            
-            if width > height:  # 가로 페이지
-                # 좌측 절반을 이미지로 렌더링
-                left_rect = fitz.Rect(0, 0, width / 2, height)
-                left_mat = fitz.Matrix(2.0, 2.0)  # 144 DPI
-                left_pix = page.get_pixmap(matrix=left_mat, clip=left_rect)
-                left_img_data = left_pix.tobytes("png")
-                
-                # 우측 절반을 이미지로 렌더링
-                right_rect = fitz.Rect(width / 2, 0, width, height)
-                right_mat = fitz.Matrix(2.0, 2.0)  # 144 DPI
-                right_pix = page.get_pixmap(matrix=right_mat, clip=right_rect)
-                right_img_data = right_pix.tobytes("png")
-                
-                # PIL 이미지로 변환하여 임시 PDF 생성
-                left_img = Image.open(io.BytesIO(left_img_data))
-                right_img = Image.open(io.BytesIO(right_img_data))
-                
-                # 좌측 페이지를 PDF로 변환
-                left_pdf_buffer = io.BytesIO()
-                left_img.save(left_pdf_buffer, format='PDF')
-                left_pdf_buffer.seek(0)
-                
-                # 우측 페이지를 PDF로 변환
-                right_pdf_buffer = io.BytesIO()
-                right_img.save(right_pdf_buffer, format='PDF')
-                right_pdf_buffer.seek(0)
-                
-                # PyPDF2로 페이지 객체 생성 (deepcopy 사용하지 않음)
-                try:
-                    left_reader = PdfReader(left_pdf_buffer)
-                    right_reader = PdfReader(right_pdf_buffer)
-                    
-                    # 페이지 데이터를 저장 (페이지 객체 자체가 아닌 필요한 정보만)
-                    split_pages.append({
-                        'pdf_data': left_pdf_buffer.getvalue(),  # PDF 바이트 데이터 저장
-                        'original_page': page_num + 1,
-                        'side': 'left',
-                        'description': f"원본 {page_num + 1}페이지 좌측",
-                        'original_number': len(split_pages) + 1
-                    })
-                    
-                    split_pages.append({
-                        'pdf_data': right_pdf_buffer.getvalue(),  # PDF 바이트 데이터 저장
-                        'original_page': page_num + 1,
-                        'side': 'right',
-                        'description': f"원본 {page_num + 1}페이지 우측",
-                        'original_number': len(split_pages) + 1
-                    })
-                    
-                finally:
-                    left_pdf_buffer.close()
-                    right_pdf_buffer.close()
-                        
-            else:  # 세로 페이지
-                # 전체 페이지를 이미지로 렌더링
-                mat = fitz.Matrix(2.0, 2.0)  # 144 DPI
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # PIL 이미지로 변환하여 PDF 생성
-                img = Image.open(io.BytesIO(img_data))
-                
-                single_pdf_buffer = io.BytesIO()
-                img.save(single_pdf_buffer, format='PDF')
-                single_pdf_buffer.seek(0)
-                
-                try:
-                    reader = PdfReader(single_pdf_buffer)
-                    
-                    split_pages.append({
-                        'pdf_data': single_pdf_buffer.getvalue(),  # PDF 바이트 데이터 저장
-                        'original_page': page_num + 1,
-                        'side': 'single',
-                        'description': f"원본 {page_num + 1}페이지",
-                        'original_number': len(split_pages) + 1
-                    })
+        if workers > 1:
+            for page_num, results in self._split_pages_parallel(pdf_path, split_mode, workers, progress_callback):
+                self._append_split_results(split_pages, page_num, results, page_store, source_ref)
+        else:
+            # PyMuPDF로 PDF 열기 (MuPDF 호출은 미리보기 스레드와 함께 쓰는 잠금 안에서)
+            with get_fitz_lock():
+                doc = fitz.open(pdf_path)
+                total_pages = len(doc)
+            
+            budget = get_memory_budget()
+            try:
+                for page_num in range(total_pages):
+                    if progress_callback:
+                        progress_callback(page_num + 1, total_pages, f"페이지 {page_num + 1} 분할 중...")
                     
-                finally:
-                    single_pdf_buffer.close()
-        
-        doc.close()
+                    # 예산은 MuPDF 잠금 밖에서 확보 (잠금을 쥔 채 기다리지 않음)
+                    with get_fitz_lock():
+                        page_bytes = self.estimate_split_memory(doc[page_num].rect, split_mode)
+                    with budget.reserve(page_bytes, self.memory_usage):
+                        with get_fitz_lock():
+                            results = self._split_source_page(doc, page_num, split_mode)
+                        self._append_split_results(split_pages, page_num, results, page_store, source_ref)
+            finally:
+                with get_fitz_lock():
+                    doc.close()
         
         # 첫 페이지 사용 여부에 따른 처리
         if not use_first_page and len(split_pages) > 0:
@@ -151,25 +139,202 @@ class BookPublishingEditor:
             for i, page_info in enumerate(split_pages):
                 page_info['original_number'] = i + 1
         
+        self.tracer.record("split", trace_start, category="split", pages=len(split_pages), mode=split_mode)
         return split_pages
     
-    def apply_page_order(self, split_pages, page_order="1234"):
-        """페이지 순서 재배열"""
-        if page_order == "2341":
-            reordered_pages = []
-            for i in range(0, len(split_pages), 4):
-                block = split_pages[i:i+4]
-                if len(block) >= 4:
-                    # 2,3,4,1 순서로 재배열
-                    reordered_block = [block[1], block[2], block[3], block[0]]
-                    reordered_pages.extend(reordered_block)
-                else:
-                    # 4개 미만인 경우 그대로
-                    reordered_pages.extend(block)
-            return reordered_pages
+    def _append_split_results(self, split_pages, page_num, results, page_store=None, source_ref=None):
+        """원본 페이지 하나의 분할 결과를 페이지 정보로 추가"""
+        for side, pdf_data, clip in results:
+            # 페이지 데이터를 저장 (페이지 객체 자체가 아닌 필요한 정보만)
+            if side == 'left':
+                description = f"원본 {page_num + 1}페이지 좌측"
+            elif side == 'right':
+                description = f"원본 {page_num + 1}페이지 우측"
+            else:
+                description = f"원본 {page_num + 1}페이지"
+            
+            page_info = {
+                'original_page': page_num + 1,
+                'side': side,
+                'description': description,
+                'original_number': len(split_pages) + 1,
+                'clip': clip  # 원본 페이지에서 잘라낸 영역 (pt)
+            }
+            if source_ref:
+                page_info.update(source_ref)
+            self._store_split_data(page_info, pdf_data, page_store)
+            split_pages.append(page_info)
+    
+    def _store_split_data(self, page_info, pdf_data, page_store=None):
+        """분할된 PDF 데이터와 내용 해시를 페이지 정보에 기록"""
+        page_info['content_hash'] = hashlib.sha256(pdf_data).hexdigest()  # 캐시 키용 내용 해시
+        if page_store is not None:
+            page_info['page_ref'] = page_store.put(pdf_data)  # 디스크 저장소 핸들만 보관
         else:
-            # 1234 순서 (기본)
-            return split_pages
+            page_info['pdf_data'] = pdf_data  # PDF 바이트 데이터 저장
+    
+    def _split_pages_parallel(self, pdf_path, split_mode, workers, progress_callback=None):
+        """페이지 범위를 워커 프로세스로 나누어 분할하고 (page_num, results)를 원래 순서대로 반환
+        
+        워커 수는 메모리 예산에 맞춰 줄이고, 앞 범위가 끝나는 대로 결과를 넘겨
+        순서를 기다리는 범위만 메모리에 남깁니다.
+        """
+        with get_fitz_lock():
+            doc = fitz.open(pdf_path)
+            total_pages = len(doc)
+            page_bytes = self.estimate_split_memory(doc[0].rect, split_mode) if total_pages else 0
+            doc.close()
+        
+        if total_pages == 0:
+            return
+        
+        budget = get_memory_budget()
+        worker_bytes = self.WORKER_PROCESS_BYTES + page_bytes
+        workers = budget.concurrency(worker_bytes, workers, self.memory_usage)
+        
+        # 진행률을 자주 갱신할 수 있도록 워커 수보다 잘게 나눔
+        chunk_size = max(1, -(-total_pages // (workers * 4)))
+        ranges = [(start, min(start + chunk_size, total_pages)) for start in range(0, total_pages, chunk_size)]
+        
+        worker_module = _get_process_module()
+        chunk_results = {}
+        next_index = 0
+        done_pages = 0
+        
+        with budget.reserve(workers * worker_bytes, self.memory_usage):
+            with _worker_pool(workers) as executor:
+                futures = {
+                    executor.submit(
+                        worker_module._split_page_range_worker,
+                        (pdf_path, start, end, split_mode, self.tracer.enabled)
+                    ): index
+                    for index, (start, end) in enumerate(ranges)
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    chunk_results[index], worker_events = future.result()
+                    self.tracer.add_events(worker_events)
+                    
+                    start, end = ranges[index]
+                    done_pages += end - start
+                    if progress_callback:
+                        progress_callback(done_pages, total_pages, f"페이지 {done_pages}/{total_pages} 분할 완료...")
+                    
+                    while next_index in chunk_results:
+                        yield from chunk_results.pop(next_index)
+                        next_index += 1
+    
+    def estimate_split_memory(self, page_rect, split_mode="vector"):
+        """원본 페이지 하나를 분할할 때의 작업 메모리 추정 (메모리 예산용)"""
+        if split_mode == "raster":
+            # 144 DPI RGB 픽스맵과 페이지에 삽입한 사본
+            return int(page_rect.width * 2 * page_rect.height * 2 * 3) + self.VECTOR_PAGE_BYTES
+        return self.VECTOR_PAGE_BYTES
+    
+    def estimate_render_memory(self, page_info, engine="vector", encoding=None):
+        """분할 페이지 하나를 책 페이지로 변환해 기록할 때의 작업 메모리 추정 (메모리 예산용)"""
+        data_size = page_data_size(page_info)
+        if engine == "raster":
+            encoding = encoding or {}
+            if encoding.get('strips'):
+                # 띠 하나와 픽스맵 사본, 자동 코덱용 축소 렌더링 (해상도/책 크기와 무관)
+                return 3 * self.RASTER_STRIP_BYTES + self.VECTOR_PAGE_BYTES + data_size
+            # 책 크기 RGB 캔버스, 렌더링한 픽스맵, 인코딩/ReportLab 버퍼가 함께 존재
+            dpi = encoding.get('dpi', 300)
+            canvas_bytes = int(self.book_width_mm * dpi / 25.4) * int(self.book_height_mm * dpi / 25.4) * 3
+            return 3 * canvas_bytes + data_size
+        # PyPDF2가 읽은 원본, 배치한 페이지, 직렬화한 바이트
+        return self.VECTOR_PAGE_BYTES + 3 * data_size
+    
+    def _split_source_page(self, doc, page_num, split_mode="vector"):
+        """원본 페이지 하나를 (side, pdf_data, clip) 목록으로 분할"""
+        trace_start = self.tracer.start()
+        page = doc[page_num]
+        
+        results = []
+        for side, clip_rect in self._source_page_halves(page.rect):
+            pdf_data = None
+            if split_mode == "vector":
+                clip_start = self.tracer.start()
+                try:
+                    pdf_data = self._clip_page_vector(doc, page_num, clip_rect)
+                except Exception:
+                    # 손상된 원본이나 빈 페이지는 이미지 방식으로 대체
+                    pdf_data = None
+                self.tracer.record("split.clip_vector", clip_start, category="split", page=page_num + 1, side=side)
+            
+            if not pdf_data:
+                clip_start = self.tracer.start()
+                pdf_data = self._clip_page_raster(page, clip_rect)
+                self.tracer.record("split.clip_raster", clip_start, category="split", page=page_num + 1, side=side)
+            
+            results.append((side, pdf_data, [clip_rect.x0, clip_rect.y0, clip_rect.x1, clip_rect.y1]))
+        
+        self.tracer.record("split.page", trace_start, category="split", page=page_num + 1)
+        return results
+    
+    def _source_page_halves(self, page_rect):
+        """원본 페이지 크기로 분할 영역 결정 -> [(side, clip_rect), ...]"""
+        width = page_rect.width
+        height = page_rect.height
+        
+        if width > height:  # 가로 페이지
+            return [
+                ('left', fitz.Rect(0, 0, width / 2, height)),
+                ('right', fitz.Rect(width / 2, 0, width, height))
+            ]
+        # 세로 페이지
+        return [('single', fitz.Rect(page_rect))]
+    
+    def _clip_page_vector(self, doc, page_num, clip_rect):
+        """원본 페이지의 일부 영역을 벡터 그대로 보여주는 1페이지 PDF 생성
+
+        clip_rect는 화면에 보이는(/Rotate가 적용된) 좌표입니다. show_pdf_page는 원본의
+        회전을 무시하고 clip을 회전된 page.rect로 잘라내므로, 회전된 페이지는 잠시 회전을
+        없앤 상태에서 회전 전 좌표의 clip으로 참조하고 내용을 같은 각도만큼 돌려 놓습니다.
+        """
+        page = doc[page_num]
+        rotation = page.rotation
+        source_clip = clip_rect * page.derotation_matrix if rotation else clip_rect
+        out_doc = fitz.open()
+        try:
+            if rotation:
+                page.set_rotation(0)
+            out_page = out_doc.new_page(width=clip_rect.width, height=clip_rect.height)
+            # 원본 페이지를 Form XObject로 참조하고 clip 영역만 표시
+            out_page.show_pdf_page(out_page.rect, doc, page_num, clip=source_clip, rotate=-rotation)
+            return out_doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+        finally:
+            if rotation:
+                page.set_rotation(rotation)
+            out_doc.close()
+    
+    def _clip_page_raster(self, page, clip_rect):
+        """원본 페이지의 일부 영역을 144 DPI 이미지로 렌더링한 1페이지 PDF 생성"""
+        mat = fitz.Matrix(2.0, 2.0)  # 144 DPI
+        pix = page.get_pixmap(matrix=mat, clip=clip_rect)
+        
+        # 픽스맵을 PNG로 인코딩하지 않고 원래 크기의 페이지에 바로 삽입
+        out_doc = fitz.open()
+        try:
+            out_page = out_doc.new_page(width=clip_rect.width, height=clip_rect.height)
+            out_page.insert_image(out_page.rect, pixmap=pix)
+            return out_doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+        finally:
+            out_doc.close()
+    
+    def apply_page_order(self, split_pages, page_order="1234", signature_pages=4):
+        """페이지 순서 재배열
+        
+        순서는 imposition_order()로 인덱스 순열만 계산하고, 분할 페이지를 복사하지 않는
+        순서 보기(PageOrderView)로 반환합니다. 접장을 채우는 빈 페이지는 보기에서 만듭니다.
+        
+        Args:
+            page_order: "1234" (일반), "2341" (4페이지 반복 패턴), "saddle" (중철), "perfect" (무선)
+            signature_pages: 접장 하나의 페이지 수 (4/8/16/32)
+        """
+        order = imposition_order(len(split_pages), page_order, signature_pages)
+        return PageOrderView(split_pages, order)
     
     def calculate_page_margins(self, page_number, margin_top, margin_bottom, margin_outer, margin_inner):
         """페이지 번호에 따른 여백 계산"""
@@ -187,144 +352,430 @@ class BookPublishingEditor:
             'right': margin_right
         }
     
-    def create_book_pdf(self, split_pages, margins, scaling_settings, show_margin_guides=False, progress_callback=None):
-        """최종 책 PDF 생성"""
-        writer = PdfWriter()
+    def resolve_page_scaling(self, page_number, scaling_settings):
+        """페이지별 스케일링 설정 선택 (기본값 + 개별 조정) -> (scale, offset_x, offset_y)"""
+        if page_number % 2 == 1:  # 홀수 페이지 기본값
+            base = scaling_settings['odd']
+        else:  # 짝수 페이지 기본값
+            base = scaling_settings['even']
+        
+        scale_factor = base['scale']
+        offset_x = base['offset_x']
+        offset_y = base['offset_y']
+        
+        if page_number in scaling_settings.get('individual_adjustments', {}):
+            # 개별 조정이 있는 경우: 기본값 + 조정값
+            adjust = scaling_settings['individual_adjustments'][page_number]
+            scale_factor += adjust['scale_adjust']
+            offset_x += adjust['offset_x_adjust']
+            offset_y += adjust['offset_y_adjust']
+        
+        return scale_factor, offset_x, offset_y
+    
+    def analyze_content_bounds(self, split_pages, grid_height=200, ink_threshold=200, progress_callback=None):
+        """분할 페이지마다 잉크(실제 내용)가 있는 영역 계산
+        
+        페이지를 모두 같은 크기의 저해상도 회색조 격자로 렌더링해 한 배열로 쌓은 뒤,
+        행/열별 잉크 화소 수를 한 번에 세어 페이지별 내용 영역을 구합니다. 스캔 잡티를
+        무시하도록 격자 폭(높이)의 0.5% 이상 잉크가 있는 행(열)만 내용으로 봅니다.
+        
+        Returns:
+            dict: 'bounds' - (N, 4) 배열, 페이지 크기 대비 [왼쪽, 위, 오른쪽, 아래] 비율
+                  (위쪽 기준, 빈 페이지는 nan), 'sizes' - (N, 2) 배열, 페이지 크기 (pt)
+        """
         total_pages = len(split_pages)
+        sizes = np.zeros((total_pages, 2))
+        grid = None
+        source_docs = {}
         
-        for i, page_info in enumerate(split_pages):
-            if progress_callback:
-                progress_callback(i + 1, total_pages, f"페이지 {i + 1} 처리 중...")
-            
-            page_number = i + 1
-            
-            try:
-                # 페이지별 여백 계산
-                page_margins = self.calculate_page_margins(
-                    page_number, margins['top'], margins['bottom'], 
-                    margins['outer'], margins['inner']
-                )
+        try:
+            for i, page_info in enumerate(split_pages):
+                if progress_callback:
+                    progress_callback(i + 1, total_pages, f"내용 영역 분석 중... ({i + 1}/{total_pages})")
                 
-                # 페이지별 스케일링 설정 선택 (기본값 + 개별 조정)
-                if page_number in scaling_settings.get('individual_adjustments', {}):
-                    # 개별 조정이 있는 경우: 기본값 + 조정값
-                    if page_number % 2 == 1:  # 홀수 페이지 기본값
-                        base_scale = scaling_settings['odd']['scale']
-                        base_offset_x = scaling_settings['odd']['offset_x']
-                        base_offset_y = scaling_settings['odd']['offset_y']
-                    else:  # 짝수 페이지 기본값
-                        base_scale = scaling_settings['even']['scale']
-                        base_offset_x = scaling_settings['even']['offset_x']
-                        base_offset_y = scaling_settings['even']['offset_y']
+                with get_fitz_lock():
+                    # 원본 파일이 있으면 문서를 한 번만 열어 잘라낸 영역을 렌더링
+                    source = page_source(page_info)
+                    if source:
+                        source_path, page_index, clip_coords = source
+                        if source_path not in source_docs:
+                            source_docs[source_path] = fitz.open(source_path)
+                        page = source_docs[source_path][page_index]
+                        clip = fitz.Rect(clip_coords)
+                        doc = None
+                    else:
+                        pdf_data = get_page_pdf_data(page_info)
+                        if not pdf_data:
+                            continue
+                        doc = fitz.open(stream=pdf_data, filetype="pdf")
+                        page = doc[0]
+                        clip = page.rect
                     
-                    # 조정값 적용
-                    adjust = scaling_settings['individual_adjustments'][page_number]
-                    scale_factor = base_scale + adjust['scale_adjust']
-                    offset_x = base_offset_x + adjust['offset_x_adjust']
-                    offset_y = base_offset_y + adjust['offset_y_adjust']
-                elif page_number % 2 == 1:  # 홀수 페이지
-                    scale_factor = scaling_settings['odd']['scale']
-                    offset_x = scaling_settings['odd']['offset_x']
-                    offset_y = scaling_settings['odd']['offset_y']
-                else:  # 짝수 페이지
-                    scale_factor = scaling_settings['even']['scale']
-                    offset_x = scaling_settings['even']['offset_x']
-                    offset_y = scaling_settings['even']['offset_y']
-                
-                # PDF 데이터 확인
-                if 'pdf_data' not in page_info or not page_info['pdf_data']:
-                    continue
+                    try:
+                        sizes[i] = (clip.width, clip.height)
+                        if grid is None:
+                            # 격자 크기는 첫 페이지 비율로 고정 (비율이 다른 페이지는 늘여서 맞춤)
+                            grid_width = max(1, round(grid_height * clip.width / clip.height))
+                            grid = np.full((total_pages, grid_height, grid_width), 255, dtype=np.uint8)
+                        matrix = fitz.Matrix(grid.shape[2] / clip.width, grid.shape[1] / clip.height)
+                        pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+                    finally:
+                        if doc is not None:
+                            doc.close()
                 
-                # 페이지 변환 적용
-                transformed_page = self.transform_page_to_book_size(
-                    page_info['pdf_data'], page_margins, scale_factor, offset_x, offset_y
+                samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+                rows = min(pix.height, grid.shape[1])
+                cols = min(pix.width, grid.shape[2])
+                grid[i, :rows, :cols] = samples[:rows, :cols]
+        finally:
+            for doc in source_docs.values():
+                doc.close()
+        
+        bounds = np.full((total_pages, 4), np.nan)
+        if grid is None:
+            return {'bounds': bounds, 'sizes': sizes}
+        
+        # 모든 페이지를 한 번에: 잉크 화소 -> 내용이 있는 행/열 -> 처음/마지막 위치
+        _, grid_height, grid_width = grid.shape
+        ink = grid < ink_threshold
+        ink_rows = ink.sum(axis=2) >= max(1, int(grid_width * 0.005))
+        ink_cols = ink.sum(axis=1) >= max(1, int(grid_height * 0.005))
+        has_ink = ink_rows.any(axis=1) & ink_cols.any(axis=1)
+        
+        top = ink_rows.argmax(axis=1)
+        bottom = grid_height - ink_rows[:, ::-1].argmax(axis=1)
+        left = ink_cols.argmax(axis=1)
+        right = grid_width - ink_cols[:, ::-1].argmax(axis=1)
+        
+        bounds[has_ink] = np.stack([
+            left / grid_width, top / grid_height, right / grid_width, bottom / grid_height
+        ], axis=1)[has_ink]
+        return {'bounds': bounds, 'sizes': sizes}
+    
+    def propose_scaling_settings(self, analysis, margins, percentile=10):
+        """내용 영역 분석 결과로 여백 안에 내용이 들어가는 scaling_settings 제안
+        
+        홀/짝수 기본 축소 비율은 각 페이지의 내용이 콘텐츠 영역을 채우는 비율 중 하위
+        percentile 값(대부분의 페이지가 들어가면서 글자 크기가 일정하도록)이고, 기본 이동은
+        그 비율에서 내용을 가운데에 놓는 이동량의 중앙값입니다. 기본값으로 여백을 넘는
+        페이지에만 개별 조정(축소 또는 최소 이동)을 추가하며, 분량이 적은 페이지를
+        확대하거나 옮기지는 않습니다. 값은 화면의 입력 범위와 단위로 맞춥니다.
+        
+        Returns:
+            (scaling_settings, report) - report는 {'pages', 'blank', 'adjusted', 'overflow'}
+        """
+        bounds = analysis['bounds']
+        sizes = analysis['sizes']
+        total_pages = len(bounds)
+        page_numbers = np.arange(1, total_pages + 1)
+        odd = page_numbers % 2 == 1
+        has_ink = ~np.isnan(bounds).any(axis=1) & (sizes > 0).all(axis=1)
+        
+        # 페이지별 콘텐츠 영역 (pt) - calculate_page_margins와 같은 홀/짝수 규칙
+        margin_left = np.where(odd, margins['outer'], margins['inner']) * mm
+        margin_right = np.where(odd, margins['inner'], margins['outer']) * mm
+        margin_top = margins['top'] * mm
+        content_width = np.maximum(1.0, self.book_width_pt - margin_left - margin_right)
+        content_height = np.maximum(1.0, self.book_height_pt - margin_top - margins['bottom'] * mm)
+        
+        width = np.where(has_ink, sizes[:, 0], 1.0)
+        height = np.where(has_ink, sizes[:, 1], 1.0)
+        x0, y0, x1, y1 = (np.where(has_ink, bounds[:, k], 0.0) for k in range(4))
+        ink_width = np.maximum((x1 - x0) * width, 1e-6)
+        ink_height = np.maximum((y1 - y0) * height, 1e-6)
+        
+        # 축소 비율 1일 때의 배율, 내용이 콘텐츠 영역을 채우는 비율 (페이지가 책 밖으로 나가지 않도록 제한)
+        base = np.minimum(content_width / width, content_height / height)
+        fit_scale = np.minimum(content_width / (ink_width * base), content_height / (ink_height * base))
+        fit_scale = np.minimum(fit_scale, np.minimum(self.book_width_pt / (width * base), self.book_height_pt / (height * base)))
+        fit_scale = np.clip(np.floor(fit_scale * 100) / 100, 0.10, 2.00)
+        
+        scaling_settings = {'individual_adjustments': {}}
+        page_scale = np.ones(total_pages)
+        page_offset_x = np.zeros(total_pages)
+        page_offset_y = np.zeros(total_pages)
+        for parity, mask in (('odd', odd), ('even', ~odd)):
+            selected = mask & has_ink
+            if not selected.any():
+                scaling_settings[parity] = {'scale': 1.0, 'offset_x': 0.0, 'offset_y': 0.0}
+                page_scale[mask] = 1.0
+                continue
+            
+            scale = float(np.floor(np.percentile(fit_scale[selected], percentile) * 100) / 100)
+            total = base * scale
+            center_x = -(((x0 + x1) / 2 - 0.5) * width * total) / mm
+            center_y = -(((y0 + y1) / 2 - 0.5) * height * total) / mm
+            offset_x = float(np.clip(np.round(np.median(center_x[selected]), 1), -50.0, 50.0))
+            offset_y = float(np.clip(np.round(np.median(center_y[selected]), 1), -50.0, 50.0))
+            
+            scaling_settings[parity] = {'scale': scale, 'offset_x': offset_x, 'offset_y': offset_y}
+            page_scale[mask] = scale
+            page_offset_x[mask] = offset_x
+            page_offset_y[mask] = offset_y
+        
+        def placed_ink(scale, offset_x, offset_y):
+            # calculate_placement_matrix와 같은 규칙(가운데 정렬, 이동, 책 안으로 보정)으로 배치한 내용 영역
+            total = base * scale
+            new_width = width * total
+            new_height = height * total
+            left = np.clip(margin_left + (content_width - new_width) / 2 + offset_x * mm, 0.0, self.book_width_pt - new_width)
+            top = np.clip(margin_top + (content_height - new_height) / 2 + offset_y * mm, 0.0, self.book_height_pt - new_height)
+            return left + x0 * new_width, left + x1 * new_width, top + y0 * new_height, top + y1 * new_height
+        
+        def overflow_shift(ink_box):
+            # 여백을 넘는 만큼의 이동량 (pt, 0.5mm 이내는 허용)
+            ink_left, ink_right, ink_top, ink_bottom = ink_box
+            tolerance = 0.5 * mm
+            shift_x = np.where(ink_left < margin_left - tolerance, margin_left - ink_left,
+                               np.where(ink_right > margin_left + content_width + tolerance,
+                                        margin_left + content_width - ink_right, 0.0))
+            shift_y = np.where(ink_top < margin_top - tolerance, margin_top - ink_top,
+                               np.where(ink_bottom > margin_top + content_height + tolerance,
+                                        margin_top + content_height - ink_bottom, 0.0))
+            return np.where(has_ink, shift_x, 0.0), np.where(has_ink, shift_y, 0.0)
+        
+        # 기본값으로 넘치는 페이지는 그 페이지에 맞는 비율로 축소하고, 넘치는 만큼만 이동
+        # (이동이 책 가장자리 보정이나 조정 범위에 막히면 0.01씩 더 축소)
+        scale_adjust = np.where(has_ink & (fit_scale < page_scale), fit_scale - page_scale, 0.0)
+        for _ in range(50):
+            scale_adjust = np.maximum(scale_adjust, -0.50)
+            scale = page_scale + scale_adjust
+            shift_x, shift_y = overflow_shift(placed_ink(scale, page_offset_x, page_offset_y))
+            offset_x_adjust = np.clip(np.sign(shift_x) * np.ceil(np.abs(shift_x) / mm * 10) / 10, -20.0, 20.0)
+            offset_y_adjust = np.clip(np.sign(shift_y) * np.ceil(np.abs(shift_y) / mm * 10) / 10, -20.0, 20.0)
+            
+            residual_x, residual_y = overflow_shift(
+                placed_ink(scale, page_offset_x + offset_x_adjust, page_offset_y + offset_y_adjust)
+            )
+            overflow = ((residual_x != 0) | (residual_y != 0)) & (scale_adjust > -0.50)
+            if not overflow.any():
+                break
+            scale_adjust = np.where(overflow, np.round(scale_adjust - 0.01, 2), scale_adjust)
+        
+        adjusted = (scale_adjust != 0) | (offset_x_adjust != 0) | (offset_y_adjust != 0)
+        for index in np.flatnonzero(adjusted):
+            scaling_settings['individual_adjustments'][int(page_numbers[index])] = {
+                'scale_adjust': round(float(scale_adjust[index]), 2),
+                'offset_x_adjust': round(float(offset_x_adjust[index]), 1),
+                'offset_y_adjust': round(float(offset_y_adjust[index]), 1)
+            }
+        
+        # 조정 범위 제한 때문에 여전히 넘치는 페이지
+        overflow = (residual_x != 0) | (residual_y != 0)
+        
+        report = {
+            'pages': total_pages,
+            'blank': int((~has_ink).sum()),
+            'adjusted': int(adjusted.sum()),
+            'overflow': [int(n) for n in page_numbers[overflow]]
+        }
+        return scaling_settings, report
+    
+    def create_book_pdf(self, split_pages, margins, scaling_settings, show_margin_guides=False, progress_callback=None, output_settings=None):
+        """최종 책 PDF 생성
+        
+        output_settings['engine']: "vector"(기본, 변환 행렬 배치) 또는 "raster"(이미지)
+        output_settings['workers']: 2 이상이면 페이지 변환을 여러 프로세스로 병렬 처리
+        output_settings['output_path']: 지정하면 페이지를 이 파일로 바로 기록하고 경로를 반환
+        output_settings['codec']: 이미지 페이지 인코딩 - "flate"(기본, 무손실), "jpeg", "bilevel"(흑백 CCITT G4), "auto"
+        output_settings['jpeg_quality'], output_settings['flate_level']: 코덱별 품질/압축 수준
+        output_settings['dpi']: 이미지 방식 페이지 해상도 (기본 300)
+        output_settings['strips']: True이면 이미지 방식 페이지를 가로 띠 단위로 렌더링/인코딩하여
+            페이지 전체 캔버스 없이 처리 (해상도와 책 크기에 상관없이 페이지당 메모리 일정)
+        output_settings['checkpoint_dir']: 지정하면 완성된 페이지를 이 디렉터리에 하나씩 저장하고,
+            같은 입력과 설정으로 다시 실행하면 저장된 페이지는 변환하지 않고 재사용 (완료 후 삭제)
+        output_settings['page_cache']: True이면 변환 결과 캐시(get_transformed_page_cache)를 사용하여
+            원본 내용과 실제 적용 설정이 같은 페이지는 다시 변환하지 않고 복사
+        output_settings['dedupe']: True이면 fingerprint_pages()로 빈 페이지/중복 페이지를 찾아
+            실제 적용 설정까지 같은 페이지는 한 번만 변환하고 출력 파일에서 같은 객체를 참조
+        
+        페이지마다 변환부터 기록까지의 작업 메모리를 get_memory_budget()에서 확보하므로
+        예산에 닿으면 병렬 작업 수가 줄고 다음 페이지는 예산이 날 때까지 기다립니다.
+        확보한 최대량은 memory_usage.peak에 남습니다.
+        """
+        output_settings = output_settings or {}
+        engine = output_settings.get('engine', 'vector')
+        workers = output_settings.get('workers', 1) or 1
+        encoding = {
+            'codec': output_settings.get('codec', 'flate'),
+            'jpeg_quality': output_settings.get('jpeg_quality', 85),
+            'flate_level': output_settings.get('flate_level', 6),
+            'dpi': output_settings.get('dpi', 300),
+            'strips': bool(output_settings.get('strips', False))
+        }
+        budget = get_memory_budget()
+        if workers > 1:
+            # 남은 메모리 예산에 맞춰 병렬 작업 수를 줄임 (하나면 워커 프로세스 없이 처리)
+            workers = budget.concurrency(
+                self.WORKER_PROCESS_BYTES + self.estimate_render_memory({}, engine, encoding), workers, self.memory_usage
+            )
+        self.encoding_report = []
+        
+        output_path = output_settings.get('output_path')
+        if output_path:
+            # 완성된 페이지를 디스크에 바로 기록 (메모리 사용량 일정)
+            writer = StreamingPdfWriter(output_path)
+        else:
+            writer = PdfWriter()
+        total_pages = len(split_pages)
+        trace_start = self.tracer.start()
+        
+        checkpoint = None
+        if output_settings.get('checkpoint_dir'):
+            checkpoint = PageCheckpoint(
+                output_settings['checkpoint_dir'],
+                PageCheckpoint.make_run_key(
+                    (self.book_width_mm, self.book_height_mm), total_pages, margins,
+                    scaling_settings, show_margin_guides, engine, encoding
                 )
+            )
+        page_cache = get_transformed_page_cache() if output_settings.get('page_cache') else None
+        self.checkpoint_reused = 0
+        self.page_cache_hits = 0
+        self.duplicate_pages = 0
+        
+        dedupe = output_settings.get('dedupe', False)
+        if dedupe:
+            # 빈 페이지와 같은 내용의 페이지를 찾아 한 번만 변환하고 출력 객체를 공유
+            self.fingerprint_pages(split_pages, progress_callback)
+        use_keys = checkpoint is not None or page_cache is not None or dedupe
+        shared_pages = {}  # PdfWriter 출력용: 공유 키 -> 먼저 만든 책 페이지
+        
+        def page_keys(page_info, page_number):
+            # (체크포인트 키, 변환 결과 키) - 변환 결과 키는 캐시와 중복 페이지 공유에 사용
+            return (
+                page_content_hash(page_info) if checkpoint is not None else None,
+                self.transformed_page_key(
+                    page_info, page_number, margins, scaling_settings, show_margin_guides, engine, encoding
+                ) if page_cache is not None or dedupe else None
+            )
+        
+        def add_book_page(page, page_number, share_key):
+            write_start = self.tracer.start()
+            try:
+                if isinstance(writer, StreamingPdfWriter):
+                    writer.add_page(page, share_key)
+                else:
+                    writer.add_page(page)
+                    if share_key is not None:
+                        shared_pages[share_key] = page
+            finally:
+                self.tracer.record("output.write_page", write_start, category="output", page=page_number)
+        
+        def add_duplicate_page(share_key):
+            # 같은 키의 페이지를 이미 기록했으면 그 객체를 다시 참조
+            if isinstance(writer, StreamingPdfWriter):
+                added = writer.add_shared_page(share_key)
+            elif share_key in shared_pages:
+                writer.add_page(shared_pages[share_key])
+                added = True
+            else:
+                added = False
+            if added:
+                self.duplicate_pages += 1
+            return added
+        
+        def add_page_here(page_info, page_number, keys, share_key):
+            # 저장된 페이지를 읽거나 이 프로세스에서 변환해 기록
+            # (읽기/변환부터 기록까지 페이지 하나의 작업 메모리를 예산에서 확보)
+            with budget.reserve(self.estimate_render_memory(page_info, engine, encoding), self.memory_usage):
+                saved_page = self._load_saved_page(page_number, keys, checkpoint, page_cache) if keys else None
+                if saved_page is not None:
+                    book_page = PdfReader(io.BytesIO(saved_page)).pages[0]
+                else:
+                    book_page = self.render_book_page(
+                        page_info, page_number, margins, scaling_settings, show_margin_guides, engine, encoding
+                    )
+                    if book_page is not None and (checkpoint is not None or page_cache is not None):
+                        self._save_rendered_page(page_number, keys, _page_to_pdf_bytes(book_page), checkpoint, page_cache)
                 
-                if transformed_page is None:
-                    # 변환 실패 시 기본 페이지 생성
-                    try:
-                        buffer = io.BytesIO()
-                        c = canvas.Canvas(buffer, pagesize=(self.book_width_pt, self.book_height_pt))
-                        
-                        # 빈 페이지에 작은 텍스트 추가
-                        c.setFont("Helvetica", 8)
-                        c.drawString(10, 10, f"Page {page_number}")
-                        c.save()
-                        
-                        buffer.seek(0)
-                        
-                        # 페이지 데이터를 새로운 PDF로 복사
-                        temp_reader = PdfReader(buffer)
-                        if len(temp_reader.pages) > 0:
-                            temp_writer = PdfWriter()
-                            temp_writer.add_page(temp_reader.pages[0])
-                            
-                            # 새로운 버퍼에 복사
-                            final_buffer = io.BytesIO()
-                            temp_writer.write(final_buffer)
-                            final_buffer.seek(0)
-                            
-                            # 원본 버퍼 닫기
-                            buffer.close()
-                            
-                            # 새 버퍼에서 페이지 읽기
-                            final_reader = PdfReader(final_buffer)
-                            transformed_page = final_reader.pages[0]
-                        else:
-                            buffer.close()
-                            transformed_page = None
-                        
-                        if transformed_page is None:
+                if book_page is not None:
+                    add_book_page(book_page, page_number, share_key)
+        
+        try:
+            if workers > 1 and total_pages > 1:
+                # 저장된 페이지와 중복 페이지는 빼고 나머지만 워커에 보냄
+                # (저장된 페이지는 여기서는 있는지만 확인하고, 기록할 차례에 하나씩 읽음)
+                store_keys = [None] * total_pages
+                saved = [False] * total_pages
+                duplicates = [False] * total_pages
+                seen_keys = set()
+                pending = []
+                for i, page_info in enumerate(split_pages):
+                    if use_keys:
+                        store_keys[i] = page_keys(page_info, i + 1)
+                    if dedupe:
+                        if store_keys[i][1] in seen_keys:
+                            duplicates[i] = True
                             continue
-                            
-                    except Exception:
-                        continue
+                        seen_keys.add(store_keys[i][1])
+                    if use_keys:
+                        saved[i] = self._has_saved_page(i + 1, store_keys[i], checkpoint, page_cache)
+                    if not saved[i]:
+                        pending.append((i + 1, page_info))
                 
-                # 여백 가이드 추가 (옵션)
-                if show_margin_guides:
-                    transformed_page = self.add_margin_guides_to_page(transformed_page, page_margins, i + 1)
-                
-                writer.add_page(transformed_page)
-                
-            except Exception:
-                # 실패한 페이지는 빈 페이지로 대체
+                # 병렬 처리: 워커 프로세스가 변환한 페이지를 원래 순서대로 받아서 추가
+                rendered_pages = self._render_book_pages_parallel(
+                    [page_info for _, page_info in pending], margins, scaling_settings, show_margin_guides,
+                    engine, workers, encoding, page_numbers=[page_number for page_number, _ in pending]
+                )
                 try:
-                    buffer = io.BytesIO()
-                    c = canvas.Canvas(buffer, pagesize=(self.book_width_pt, self.book_height_pt))
-                    
-                    # 빈 페이지에 오류 정보 추가
-                    c.setFont("Helvetica", 8)
-                    c.drawString(10, 10, f"Error on page {page_number}")
-                    c.save()
-                    
-                    buffer.seek(0)
-                    
-                    # 페이지 데이터를 새로운 PDF로 복사
-                    temp_reader = PdfReader(buffer)
-                    if len(temp_reader.pages) > 0:
-                        temp_writer = PdfWriter()
-                        temp_writer.add_page(temp_reader.pages[0])
+                    for i in range(total_pages):
+                        if progress_callback:
+                            progress_callback(i + 1, total_pages, f"페이지 {i + 1} 처리 중...")
                         
-                        # 새로운 버퍼에 복사
-                        final_buffer = io.BytesIO()
-                        temp_writer.write(final_buffer)
-                        final_buffer.seek(0)
+                        if duplicates[i]:
+                            if not add_duplicate_page(store_keys[i][1]):
+                                # 먼저 나온 같은 페이지를 만들지 못했으면 이 프로세스에서 변환
+                                add_page_here(split_pages[i], i + 1, store_keys[i], store_keys[i][1])
+                            continue
                         
-                        # 원본 버퍼 닫기
-                        buffer.close()
+                        if saved[i]:
+                            # 확인한 뒤 캐시에서 정리되었으면 이 프로세스에서 변환
+                            add_page_here(split_pages[i], i + 1, store_keys[i], store_keys[i][1] if dedupe else None)
+                            continue
                         
-                        # 새 버퍼에서 페이지 읽기
-                        final_reader = PdfReader(final_buffer)
-                        fallback_page = final_reader.pages[0]
+                        page_bytes = next(rendered_pages)
+                        if page_bytes is not None and use_keys:
+                            self._save_rendered_page(i + 1, store_keys[i], page_bytes, checkpoint, page_cache)
                         
-                        writer.add_page(fallback_page)
-                    else:
-                        buffer.close()
-                        continue
+                        if page_bytes is None:
+                            continue
                         
-                except Exception:
-                    # 완전 실패 시 건너뛰기
-                    continue
+                        try:
+                            add_book_page(
+                                PdfReader(io.BytesIO(page_bytes)).pages[0], i + 1,
+                                store_keys[i][1] if dedupe else None
+                            )
+                        except Exception:
+                            continue
+                finally:
+                    # 남은 워커 작업과 마지막 페이지의 메모리 예산 정리
+                    rendered_pages.close()
+            else:
+                for i, page_info in enumerate(split_pages):
+                    if progress_callback:
+                        progress_callback(i + 1, total_pages, f"페이지 {i + 1} 처리 중...")
+                    
+                    keys = page_keys(page_info, i + 1) if use_keys else None
+                    share_key = keys[1] if dedupe else None
+                    if share_key is not None and add_duplicate_page(share_key):
+                        continue
+                    
+                    add_page_here(page_info, i + 1, keys, share_key)
+        except Exception:
+            if output_path:
+                writer.abort()
+            raise
+        
+        if output_path:
+            finish_start = self.tracer.start()
+            result_path = self._finish_streaming_output(writer)
+            self.tracer.record("output.finish", finish_start, category="output")
+            self.tracer.record("output", trace_start, category="output", pages=total_pages, engine=engine, workers=workers)
+            if result_path is not None and checkpoint is not None:
+                checkpoint.clear()
+            return result_path
         
         # PDF 데이터 반환
         try:
@@ -335,8 +786,11 @@ class BookPublishingEditor:
                 return None
             
             # PDF 작성
+            finish_start = self.tracer.start()
             writer.write(output_buffer)
             output_buffer.seek(0)
+            self.tracer.record("output.finish", finish_start, category="output")
+            self.tracer.record("output", trace_start, category="output", pages=total_pages, engine=engine, workers=workers)
             
             # PDF 데이터 검증
             pdf_data = output_buffer.getvalue()
@@ -355,6 +809,8 @@ class BookPublishingEditor:
                 return None
             
             output_buffer.close()
+            if checkpoint is not None:
+                checkpoint.clear()
             return pdf_data
             
         except Exception as e:
@@ -363,157 +819,496 @@ class BookPublishingEditor:
             st.error(f"상세 오류: {traceback.format_exc()}")
             raise
     
-    def transform_page_to_book_size(self, pdf_data, margins, scale_factor, offset_x, offset_y):
-        """PDF 데이터를 책 크기로 변환 - 이미지 기반 처리"""
-        try:
-            # 입력 데이터 검증
-            if not pdf_data or len(pdf_data) == 0:
-                return None
-            
-            # 1단계: PDF 데이터를 임시 파일로 저장
-            temp_pdf_path = None
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_pdf_file:
-                temp_pdf_path = temp_pdf_file.name
-                temp_pdf_file.write(pdf_data)
-            
-            # 2단계: PyMuPDF로 고해상도 이미지 변환
-            doc = fitz.open(temp_pdf_path)
-            if len(doc) == 0:
-                doc.close()
-                return None
+    def _finish_streaming_output(self, writer):
+        """스트리밍 출력 마무리 - 검증에 실패하면 파일을 지우고 None 반환"""
+        if writer.page_count == 0:
+            writer.abort()
+            return None
+        
+        if not writer.close():
+            writer.abort()
+            return None
+        
+        return writer.output_path
+    
+    def fingerprint_pages(self, split_pages, progress_callback=None):
+        """분할 페이지마다 내용 지문을 계산해 빈 페이지와 중복 페이지 찾기
+        
+        지문은 페이지가 참조하는 객체 트리(콘텐츠 스트림, 이미지, 폰트, Form XObject)를
+        객체 번호와 상관없이 해시한 값이라, 원본의 다른 위치에 있는 같은 페이지(장 표지,
+        구분 페이지 등)도 같은 값이 됩니다. 저해상도로 렌더링해 보이는 내용이 없는 페이지는
+        'blank'로 표시하고 모두 같은 지문을 씁니다. 결과는 page_info['fingerprint'],
+        page_info['blank']에 기록하며 이미 계산된 페이지는 건너뜁니다.
+        
+        Returns:
+            dict: {'pages', 'unique', 'blank', 'duplicates'}
+        """
+        total_pages = len(split_pages)
+        counts = {}
+        blank_pages = 0
+        for i, page_info in enumerate(split_pages):
+            if progress_callback:
+                progress_callback(i + 1, total_pages, f"빈 페이지/중복 페이지 확인 중... ({i + 1}/{total_pages})")
             
-            page = doc[0]
-            mat = fitz.Matrix(4.17, 4.17)  # 300 DPI
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            doc.close()
+            if 'fingerprint' not in page_info:
+                pdf_data = get_page_pdf_data(page_info)
+                if pdf_data:
+                    with self.tracer.span("dedupe.fingerprint", category="dedupe", page=i + 1):
+                        page_info['fingerprint'], page_info['blank'] = _pdf_page_fingerprint(pdf_data)
+                else:
+                    page_info['fingerprint'], page_info['blank'] = None, False
             
-            # 3단계: PIL로 이미지 처리
-            original_img = Image.open(io.BytesIO(img_data))
+            fingerprint = page_info['fingerprint']
+            if fingerprint is not None:
+                counts[fingerprint] = counts.get(fingerprint, 0) + 1
+            if page_info['blank']:
+                blank_pages += 1
+        
+        return {
+            'pages': total_pages,
+            'unique': len(counts),
+            'blank': blank_pages,
+            'duplicates': sum(counts.values()) - len(counts)
+        }
+    
+    def transformed_page_key(self, page_info, page_number, margins, scaling_settings, show_margin_guides=False, engine="vector", encoding=None):
+        """변환 결과 캐시 키 - 원본 페이지 내용과 이 페이지에 실제로 적용되는 설정의 해시
+        
+        여백은 홀/짝수 위치를 반영한 값, 축소/이동은 개별 조정까지 반영한 값을 쓰므로
+        다른 페이지의 개별 조정을 바꿔도 이 페이지의 키는 바뀌지 않습니다.
+        """
+        page_margins = self.calculate_page_margins(
+            page_number, margins['top'], margins['bottom'], margins['outer'], margins['inner']
+        )
+        scale_factor, offset_x, offset_y = self.resolve_page_scaling(page_number, scaling_settings)
+        # fingerprint_pages()를 거쳤으면 분할 데이터의 해시 대신 내용 지문 사용
+        content_key = page_info.get('fingerprint') or page_content_hash(page_info)
+        params = json.dumps([
+            1, content_key, self.book_width_mm, self.book_height_mm,
+            page_margins, scale_factor, offset_x, offset_y,
+            # 가이드 선 색은 홀/짝수에 따라 다름
+            page_number % 2 if show_margin_guides else None,
+            engine, encoding
+        ], sort_keys=True, default=str)
+        return hashlib.sha256(params.encode()).hexdigest()
+    
+    def _load_saved_page(self, page_number, keys, checkpoint, page_cache):
+        """체크포인트 또는 변환 결과 캐시에 있는 책 페이지 (1페이지 PDF 바이트, 없으면 None)"""
+        checkpoint_key, cache_key = keys
+        if checkpoint is not None:
+            page_bytes = checkpoint.load(page_number, checkpoint_key)
+            if page_bytes is not None:
+                self.checkpoint_reused += 1
+                return page_bytes
+        if page_cache is not None:
+            page_bytes = page_cache.get(cache_key)
+            if page_bytes is not None:
+                self.page_cache_hits += 1
+                return page_bytes
+        return None
+    
+    def _has_saved_page(self, page_number, keys, checkpoint, page_cache):
+        """체크포인트 또는 변환 결과 캐시에 책 페이지가 있는지 (읽지 않고 확인)"""
+        checkpoint_key, cache_key = keys
+        if checkpoint is not None and checkpoint.contains(page_number, checkpoint_key):
+            return True
+        return page_cache is not None and page_cache.contains(cache_key)
+    
+    def _save_rendered_page(self, page_number, keys, page_bytes, checkpoint, page_cache):
+        """새로 변환한 책 페이지를 체크포인트와 변환 결과 캐시에 저장"""
+        checkpoint_key, cache_key = keys
+        if checkpoint is not None:
+            checkpoint.save(page_number, checkpoint_key, page_bytes)
+        if page_cache is not None:
+            page_cache.put(cache_key, page_bytes)
+    
+    def render_book_page(self, page_info, page_number, margins, scaling_settings, show_margin_guides=False, engine="vector", encoding=None):
+        """분할 페이지 하나를 최종 책 페이지로 변환 (실패 시 대체 페이지, 건너뛸 경우 None)
+        
+        이미지 방식으로 변환된 페이지의 인코딩 결과는 encoding_report에 추가됩니다.
+        """
+        with self.tracer.span("output.page", category="output", page=page_number):
+            book_page = self._render_book_page(
+                page_info, page_number, margins, scaling_settings, show_margin_guides, engine, encoding
+            )
+        
+        if self._last_page_encoding is not None:
+            self.encoding_report.append(dict(self._last_page_encoding, page=page_number))
+            self._last_page_encoding = None
+        return book_page
+    
+    def _render_book_page(self, page_info, page_number, margins, scaling_settings, show_margin_guides=False, engine="vector", encoding=None):
+        try:
+            # 페이지별 여백 계산
+            page_margins = self.calculate_page_margins(
+                page_number, margins['top'], margins['bottom'], 
+                margins['outer'], margins['inner']
+            )
             
-            # 4단계: 책 크기 설정 (300 DPI 기준)
-            dpi = 300
-            book_width_px = int(self.book_width_mm * dpi / 25.4)
-            book_height_px = int(self.book_height_mm * dpi / 25.4)
+            # 페이지별 스케일링 설정 선택 (기본값 + 개별 조정)
+            scale_factor, offset_x, offset_y = self.resolve_page_scaling(page_number, scaling_settings)
             
-            # 5단계: 여백 계산 (픽셀 단위)
-            margin_left_px = int(margins['left'] * dpi / 25.4)
-            margin_right_px = int(margins['right'] * dpi / 25.4)
-            margin_top_px = int(margins['top'] * dpi / 25.4)
-            margin_bottom_px = int(margins['bottom'] * dpi / 25.4)
+            # 이미지 방식은 원본 파일이 남아 있으면 분할 결과 대신 원본에서 바로 렌더링
+            source = page_source(page_info)
             
-            # 콘텐츠 영역 크기
-            content_width = max(10, book_width_px - margin_left_px - margin_right_px)
-            content_height = max(10, book_height_px - margin_top_px - margin_bottom_px)
+            # PDF 데이터 확인
+            pdf_data = None if (engine == "raster" and source) else get_page_pdf_data(page_info)
+            if not pdf_data and not source:
+                return None
             
-            # 6단계: 원본 이미지 크기 조정
-            orig_w, orig_h = original_img.size
+            # 페이지 변환 적용
+            transformed_page = self.transform_page_to_book_size(
+                pdf_data, page_margins, scale_factor, offset_x, offset_y, engine, encoding, source
+            )
             
-            if orig_w > 0 and orig_h > 0 and content_width > 0 and content_height > 0:
-                # 스케일 계산 (비율 유지)
-                scale_x = (content_width * scale_factor) / orig_w
-                scale_y = (content_height * scale_factor) / orig_h
-                scale = min(scale_x, scale_y)
-                
-                new_width = max(1, int(orig_w * scale))
-                new_height = max(1, int(orig_h * scale))
-                
-                # 이미지 리사이즈
-                resized_img = original_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # 중앙 정렬 위치 계산
-                center_x = margin_left_px + (content_width - new_width) // 2
-                center_y = margin_top_px + (content_height - new_height) // 2
-                
-                # 오프셋 적용
-                offset_x_px = int(offset_x * dpi / 25.4)
-                offset_y_px = int(offset_y * dpi / 25.4)
-                
-                final_x = max(0, min(book_width_px - new_width, center_x + offset_x_px))
-                final_y = max(0, min(book_height_px - new_height, center_y + offset_y_px))
+            if transformed_page is None:
+                # 변환 실패 시 기본 페이지 생성
+                try:
+                    transformed_page = self._create_placeholder_page(f"Page {page_number}")
+                except Exception:
+                    return None
                 
-            else:
-                # 안전한 기본값
-                resized_img = original_img.resize((100, 100), Image.Resampling.LANCZOS)
-                final_x = (book_width_px - 100) // 2
-                final_y = (book_height_px - 100) // 2
-            
-            # 7단계: 새 캔버스에 배치
-            canvas_img = Image.new('RGB', (book_width_px, book_height_px), color='white')
-            canvas_img.paste(resized_img, (final_x, final_y))
-            
-            # 8단계: ReportLab을 사용하여 안정적인 PDF 생성
-            output_pdf_buffer = io.BytesIO()
-            
-            # 이미지를 임시 파일로 저장
-            temp_img_path = None
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_img_file:
-                temp_img_path = temp_img_file.name
-                canvas_img.save(temp_img_path, format='PNG')
+                if transformed_page is None:
+                    return None
             
-            # ReportLab으로 PDF 생성
-            c = canvas.Canvas(output_pdf_buffer, pagesize=(self.book_width_pt, self.book_height_pt))
+            # 여백 가이드 추가 (옵션)
+            if show_margin_guides:
+                transformed_page = self.add_margin_guides_to_page(transformed_page, page_margins, page_number)
             
-            # 이미지를 PDF에 삽입 (포인트 단위로 변환)
-            img_width_pt = book_width_px * 72 / dpi
-            img_height_pt = book_height_px * 72 / dpi
+            return transformed_page
             
+        except Exception:
+            # 실패한 페이지는 빈 페이지로 대체
             try:
-                # 파일 경로를 사용하여 이미지 삽입
-                c.drawImage(temp_img_path, 0, 0, width=img_width_pt, height=img_height_pt)
-                c.save()
-                
+                return self._create_placeholder_page(f"Error on page {page_number}")
             except Exception:
-                # 대안: PIL로 PDF 생성
-                try:
-                    c.save()  # 빈 페이지라도 저장
-                    output_pdf_buffer.seek(0)
-                    output_pdf_buffer.truncate(0)  # 버퍼 초기화
-                    
-                    # PIL로 직접 PDF 생성
-                    canvas_img_rgb = canvas_img.convert('RGB')
-                    canvas_img_rgb.save(output_pdf_buffer, format='PDF', resolution=300.0)
-                    
-                except Exception:
-                    return None
-            
-            # 임시 이미지 파일 정리
-            try:
-                if temp_img_path and os.path.exists(temp_img_path):
-                    os.unlink(temp_img_path)
-            except:
-                pass
-            
-            output_pdf_buffer.seek(0)
+                # 완전 실패 시 건너뛰기
+                return None
+    
+    def _create_placeholder_page(self, text=None):
+        """책 크기의 빈 페이지 생성 (text가 있으면 왼쪽 아래에 작게 표시)"""
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=(self.book_width_pt, self.book_height_pt))
+        
+        if text:
+            c.setFont("Helvetica", 8)
+            c.drawString(10, 10, text)
+        c.save()
+        
+        buffer.seek(0)
+        
+        # 페이지 데이터를 새로운 PDF로 복사
+        temp_reader = PdfReader(buffer)
+        if len(temp_reader.pages) == 0:
+            buffer.close()
+            return None
+        
+        temp_writer = PdfWriter()
+        temp_writer.add_page(temp_reader.pages[0])
+        
+        # 새로운 버퍼에 복사
+        final_buffer = io.BytesIO()
+        temp_writer.write(final_buffer)
+        final_buffer.seek(0)
+        
+        # 원본 버퍼 닫기
+        buffer.close()
+        
+        # 새 버퍼에서 페이지 읽기
+        final_reader = PdfReader(final_buffer)
+        return final_reader.pages[0]
+    
+    def _render_book_pages_parallel(self, split_pages, margins, scaling_settings, show_margin_guides, engine, workers, encoding=None, page_numbers=None):
+        """워커 프로세스 풀로 페이지를 변환하여 원래 순서대로 1페이지 PDF 바이트를 반환
+        
+        page_numbers를 주면 split_pages의 각 페이지를 그 책 페이지 번호로 변환합니다 (기본 1부터 차례대로).
+        워커 수는 메모리 예산에 맞춰 줄이고, 페이지마다 예산을 확보한 만큼만 워커에 보냅니다.
+        예산이 모자라면 먼저 보낸 페이지를 받아 넘긴 뒤 다음 페이지를 보내며(백프레셔),
+        넘긴 페이지의 예산은 호출한 쪽이 다음 페이지를 요청할 때(기록을 마친 뒤) 돌려줍니다.
+        """
+        worker_module = _get_process_module()
+        if page_numbers is None:
+            page_numbers = range(1, len(split_pages) + 1)
+        tasks = [
+            (self.book_width_mm, self.book_height_mm, page_info, page_number,
+             margins, scaling_settings, show_margin_guides, engine, encoding, self.tracer.enabled)
+            for page_info, page_number in zip(split_pages, page_numbers)
+        ]
+        if not tasks:
+            return
+        
+        budget = get_memory_budget()
+        usage = self.memory_usage
+        page_bytes_estimates = [self.estimate_render_memory(page_info, engine, encoding) for page_info in split_pages]
+        workers = budget.concurrency(
+            self.WORKER_PROCESS_BYTES + max(page_bytes_estimates), workers, usage
+        )
+        pool_bytes = workers * self.WORKER_PROCESS_BYTES
+        budget.acquire(pool_bytes, usage)
+        held = pool_bytes
+        in_flight = []
+        
+        def take_oldest():
+            # 가장 먼저 보낸 페이지 결과 (제출 순서대로 받으므로 페이지 순서가 유지됨)
+            future, nbytes = in_flight.pop(0)
+            page_bytes, worker_events, worker_encoding = future.result()
+            self.tracer.add_events(worker_events)
+            self.encoding_report.extend(worker_encoding)
+            return page_bytes, nbytes
+        
+        try:
+            with _worker_pool(workers) as executor:
+                for task, nbytes in zip(tasks, page_bytes_estimates):
+                    while in_flight and not budget.try_acquire(nbytes, usage):
+                        page_bytes, done_bytes = take_oldest()
+                        yield page_bytes
+                        budget.release(done_bytes, usage)
+                        held -= done_bytes
+                    if not in_flight:
+                        budget.acquire(nbytes, usage)
+                    held += nbytes
+                    in_flight.append((executor.submit(worker_module._render_book_page_worker, task), nbytes))
+                
+                while in_flight:
+                    page_bytes, done_bytes = take_oldest()
+                    yield page_bytes
+                    budget.release(done_bytes, usage)
+                    held -= done_bytes
+        finally:
+            budget.release(held, usage)
+    
+    def calculate_placement_matrix(self, src_width, src_height, margins, scale_factor, offset_x, offset_y):
+        """원본 페이지(pt)를 책 페이지에 배치하는 변환 행렬 계산
+        
+        여백, 축소 비율, 오프셋(mm)을 한 번에 계산하여 (a, b, c, d, e, f) 행렬과
+        책 페이지 위의 배치 영역 (left, bottom, right, top)을 반환합니다.
+        이미지 방식과 같은 규칙(비율 유지, 중앙 정렬, 페이지 밖으로 나가지 않도록 보정)을 따릅니다.
+        """
+        # 여백 및 콘텐츠 영역 (포인트 단위)
+        margin_left_pt = margins['left'] * mm
+        margin_right_pt = margins['right'] * mm
+        margin_top_pt = margins['top'] * mm
+        margin_bottom_pt = margins['bottom'] * mm
+        
+        content_width = max(1.0, self.book_width_pt - margin_left_pt - margin_right_pt)
+        content_height = max(1.0, self.book_height_pt - margin_top_pt - margin_bottom_pt)
+        
+        # 스케일 계산 (비율 유지)
+        scale = min(
+            (content_width * scale_factor) / src_width,
+            (content_height * scale_factor) / src_height
+        )
+        new_width = src_width * scale
+        new_height = src_height * scale
+        
+        # 중앙 정렬 위치 + 오프셋 (위쪽 기준, 이미지 방식과 동일한 방향)
+        x = margin_left_pt + (content_width - new_width) / 2 + offset_x * mm
+        y_from_top = margin_top_pt + (content_height - new_height) / 2 + offset_y * mm
+        
+        x = max(0.0, min(self.book_width_pt - new_width, x))
+        y_from_top = max(0.0, min(self.book_height_pt - new_height, y_from_top))
+        
+        # PDF 좌표계는 왼쪽 아래가 원점
+        y = self.book_height_pt - y_from_top - new_height
+        
+        matrix = (scale, 0, 0, scale, x, y)
+        placed_rect = (x, y, x + new_width, y + new_height)
+        return matrix, placed_rect
+    
+    def transform_page_to_book_size(self, pdf_data, margins, scale_factor, offset_x, offset_y, engine="vector", encoding=None, source=None):
+        """PDF 데이터를 책 크기로 변환
+        
+        engine이 "vector"이면 변환 행렬로 원본 페이지를 벡터 그대로 배치하고,
+        "raster"이거나 벡터 배치에 실패하면 이미지 방식으로 처리합니다.
+        encoding은 이미지 방식 페이지의 코덱/해상도/띠 단위 렌더링 설정입니다 (create_book_pdf 참고).
+        source는 page_source()가 돌려준 (원본 경로, 페이지 인덱스, 잘라낸 영역)으로,
+        주어지면 이미지 방식은 원본 페이지의 해당 영역을 최종 크기로 한 번에 렌더링합니다.
+        """
+        if engine == "vector" and pdf_data:
+            new_page = self._transform_page_vector(pdf_data, margins, scale_factor, offset_x, offset_y)
+            if new_page is not None:
+                return new_page
+        
+        return self._transform_page_raster(pdf_data, margins, scale_factor, offset_x, offset_y, encoding, source)
+    
+    def _transform_page_vector(self, pdf_data, margins, scale_factor, offset_x, offset_y):
+        """PDF 데이터를 책 크기로 변환 - 변환 행렬 기반 벡터 배치"""
+        try:
+            # 입력 데이터 검증
+            if not pdf_data or len(pdf_data) == 0:
+                return None
             
-            # 9단계: PyPDF2로 페이지 객체 생성
-            reader = PdfReader(output_pdf_buffer)
+            trace_start = self.tracer.start()
+            reader = PdfReader(io.BytesIO(pdf_data))
             if len(reader.pages) == 0:
-                output_pdf_buffer.close()
                 return None
             
-            # 페이지 데이터를 새로운 PDF로 복사
-            new_writer = PdfWriter()
-            new_writer.add_page(reader.pages[0])
+            src_page = reader.pages[0]
+            if src_page.rotation % 360 != 0:
+                src_page.transfer_rotation_to_content()
+            
+            # 보이는 영역(cropbox)을 기준으로 배치
+            src_box = src_page.cropbox
+            src_left = float(src_box.left)
+            src_bottom = float(src_box.bottom)
+            src_width = float(src_box.width)
+            src_height = float(src_box.height)
+            if src_width <= 0 or src_height <= 0:
+                return None
+            
+            (a, b, c, d, e, f), placed_rect = self.calculate_placement_matrix(
+                src_width, src_height, margins, scale_factor, offset_x, offset_y
+            )
+            # 원본 박스의 원점 보정
+            matrix = (a, b, c, d, e - a * src_left, f - d * src_bottom)
+            src_page.add_transformation(Transformation(matrix))
+            
+            # merge_page는 trimbox로 잘라내므로 배치 영역으로 박스를 맞춤
+            placed_box = RectangleObject(placed_rect)
+            src_page.mediabox = placed_box
+            src_page.cropbox = placed_box
+            src_page.trimbox = placed_box
+            
+            book_page = PageObject.create_blank_page(width=self.book_width_pt, height=self.book_height_pt)
+            book_page.merge_page(src_page)
+            self.tracer.record("transform.vector", trace_start, category="transform")
+            return book_page
+            
+        except Exception:
+            return None
+    
+    def _transform_page_raster(self, pdf_data, margins, scale_factor, offset_x, offset_y, encoding=None, source=None):
+        """PDF 데이터를 책 크기로 변환 - 이미지 기반 처리
+        
+        출력 해상도(encoding['dpi'], 기본 300)로 렌더링한 뒤 다시 축소하지 않고, 콘텐츠 영역에
+        들어갈 최종 크기의 배율로 한 번만 렌더링합니다. source가 주어지면 분할 결과 대신 원본
+        페이지의 잘라낸 영역(clip)을 렌더링하여 분할 단계의 중간 래스터화도 거치지 않습니다.
+        encoding['strips']가 True이면 페이지 전체 캔버스 대신 _transform_page_raster_strips()로
+        배치된 내용만 가로 띠 단위로 렌더링/인코딩합니다.
+        """
+        try:
+            # 입력 데이터 검증
+            if (not pdf_data or len(pdf_data) == 0) and not source:
+                return None
+            
+            # 1단계: 책 크기 설정 (출력 해상도 기준)
+            trace_start = self.tracer.start()
+            encoding = encoding or {}
+            dpi = encoding.get('dpi', 300)
+            use_strips = encoding.get('strips', False)
+            book_width_px = int(self.book_width_mm * dpi / 25.4)
+            book_height_px = int(self.book_height_mm * dpi / 25.4)
+            
+            # 2단계: 여백 계산 (픽셀 단위)
+            margin_left_px = int(margins['left'] * dpi / 25.4)
+            margin_right_px = int(margins['right'] * dpi / 25.4)
+            margin_top_px = int(margins['top'] * dpi / 25.4)
+            margin_bottom_px = int(margins['bottom'] * dpi / 25.4)
+            
+            # 콘텐츠 영역 크기
+            content_width = max(10, book_width_px - margin_left_px - margin_right_px)
+            content_height = max(10, book_height_px - margin_top_px - margin_bottom_px)
+            
+            # 3단계: 원본 페이지(또는 분할 결과) 열기 (생성 작업 스레드와 미리보기가 함께 쓰므로 잠금 안에서 처리)
+            with get_fitz_lock():
+                clip = None
+                if source:
+                    source_path, page_index, clip_coords = source
+                    doc = fitz.open(source_path)
+                    page = doc[page_index]
+                    clip = fitz.Rect(clip_coords)
+                else:
+                    doc = fitz.open(stream=pdf_data, filetype="pdf")
+                    if len(doc) == 0:
+                        doc.close()
+                        return None
+                    page = doc[0]
+                
+                # 4단계: 콘텐츠 영역에 맞는 배율 계산 (비율 유지) 후 최종 크기로 한 번만 렌더링
+                src_rect = clip if clip is not None else page.rect
+                try:
+                    if src_rect.width > 0 and src_rect.height > 0:
+                        zoom = min(
+                            (content_width * scale_factor) / src_rect.width,
+                            (content_height * scale_factor) / src_rect.height
+                        )
+                    else:
+                        zoom = dpi / 72
+                    if not use_strips:
+                        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
+                except Exception:
+                    doc.close()
+                    raise
+                if not use_strips:
+                    doc.close()
+            
+            if use_strips:
+                # 배치될 이미지의 픽셀 영역으로 위치를 정하고 띠 단위로 렌더링
+                device_rect = (src_rect * fitz.Matrix(zoom, zoom)).irect
+                final_x = max(0, min(book_width_px - device_rect.width,
+                                     margin_left_px + (content_width - device_rect.width) // 2 + int(offset_x * dpi / 25.4)))
+                final_y = max(0, min(book_height_px - device_rect.height,
+                                     margin_top_px + (content_height - device_rect.height) // 2 + int(offset_y * dpi / 25.4)))
+                try:
+                    return self._transform_page_raster_strips(
+                        page, clip, zoom, device_rect, (final_x, final_y), (book_width_px, book_height_px), dpi, encoding
+                    )
+                finally:
+                    with get_fitz_lock():
+                        doc.close()
+            
+            # 5단계: 픽스맵 버퍼를 PIL 이미지로 바로 사용 (PNG 인코딩/디코딩 없음)
+            resized_img = _pixmap_to_image(pix)
+            trace_start = self.tracer.record("transform.raster.render", trace_start, category="transform")
+            
+            # 6단계: 배치 위치 계산
+            new_width, new_height = resized_img.size
+            
+            # 중앙 정렬 위치 계산
+            center_x = margin_left_px + (content_width - new_width) // 2
+            center_y = margin_top_px + (content_height - new_height) // 2
+            
+            # 오프셋 적용
+            offset_x_px = int(offset_x * dpi / 25.4)
+            offset_y_px = int(offset_y * dpi / 25.4)
             
-            # 새로운 버퍼에 복사
-            final_buffer = io.BytesIO()
-            new_writer.write(final_buffer)
-            final_buffer.seek(0)
+            final_x = max(0, min(book_width_px - new_width, center_x + offset_x_px))
+            final_y = max(0, min(book_height_px - new_height, center_y + offset_y_px))
             
-            # 원본 버퍼 닫기
-            output_pdf_buffer.close()
+            # 7단계: 새 캔버스에 배치
+            canvas_img = Image.new('RGB', (book_width_px, book_height_px), color='white')
+            canvas_img.paste(resized_img, (final_x, final_y))
+            trace_start = self.tracer.record("transform.raster.compose", trace_start, category="transform")
             
-            # 새 버퍼에서 페이지 읽기
-            final_reader = PdfReader(final_buffer)
-            new_page = final_reader.pages[0]
+            # 8단계: 선택한 코덱으로 이미지를 인코딩 (포인트 단위 크기로 배치)
+            img_width_pt = book_width_px * 72 / dpi
+            img_height_pt = book_height_px * 72 / dpi
             
-            # 임시 파일 정리
             try:
-                if temp_pdf_path and os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
-            except:
-                pass
+                encode_started = time.perf_counter()
+                image_stream, codec = self._encode_page_image(canvas_img, encoding)
+                self._last_page_encoding = {
+                    'codec': codec,
+                    'bytes': len(image_stream._data),
+                    'raw_bytes': book_width_px * book_height_px * 3,
+                    'seconds': time.perf_counter() - encode_started
+                }
+                trace_start = self.tracer.record("transform.raster.encode", trace_start, category="transform", codec=codec)
+                
+                # 9단계: 인코딩된 이미지 하나를 그리는 PyPDF2 페이지 객체 생성
+                new_page = self._build_image_page([(image_stream, 0, 0, img_width_pt, img_height_pt)])
+                
+            except Exception:
+                # 대안: PIL로 PDF 생성
+                try:
+                    output_pdf_buffer = io.BytesIO()
+                    canvas_img.convert('RGB').save(output_pdf_buffer, format='PDF', resolution=float(dpi))
+                    output_pdf_buffer.seek(0)
+                    new_page = PdfReader(output_pdf_buffer).pages[0]
+                except Exception:
+                    return None
+            
+            self.tracer.record("transform.raster.pypdf2", trace_start, category="transform")
             
             return new_page
             
@@ -551,6 +1346,240 @@ class BookPublishingEditor:
                 # 최후의 수단: None 반환
                 return None
     
+    def _transform_page_raster_strips(self, page, clip, zoom, device_rect, position, book_size_px, dpi, encoding):
+        """배치된 내용만 가로 띠로 나누어 렌더링/인코딩한 책 페이지 (페이지 전체 캔버스 없음)
+        
+        띠 하나가 RASTER_STRIP_BYTES를 넘지 않도록 높이를 정하므로 페이지당 메모리는
+        해상도와 책 크기에 상관없이 일정합니다. 여백은 페이지 배경(흰색)으로 두고 내용이
+        없는 흰 띠는 기록하지 않습니다. 자동 코덱은 크기 상한이 있는 축소 렌더링 한 장으로
+        페이지 단위로 정하여 띠마다 코덱이 달라지지 않게 합니다.
+        """
+        trace_start = self.tracer.start()
+        matrix = fitz.Matrix(zoom, zoom)
+        inverse = ~matrix
+        width, height = device_rect.width, device_rect.height
+        strip_rows = max(1, self.RASTER_STRIP_BYTES // max(1, width * 3))
+        final_x, final_y = position
+        book_width_px, book_height_px = book_size_px
+        
+        encoding = dict(encoding)
+        if encoding.get('codec', 'flate') == "auto":
+            # _choose_image_codec의 1/4 추출과 같은 배율, 긴 변은 1024픽셀 이하.
+            # 화소를 그대로 추출하는 것과 같도록 안티앨리어싱 없이 렌더링
+            sample_zoom = zoom / 4 * min(1.0, 1024 / max(1, width / 4, height / 4))
+            with get_fitz_lock():
+                aa_level = fitz.TOOLS.show_aa_level()
+                fitz.TOOLS.set_aa_level(0)
+                try:
+                    sample_pix = page.get_pixmap(matrix=fitz.Matrix(sample_zoom, sample_zoom), clip=clip)
+                finally:
+                    fitz.TOOLS.set_aa_level(aa_level['graphics'])
+                    fitz.TOOLS.set_graphics_min_line_width(aa_level['graphics_min_line_width'])
+            # 비율은 페이지 모드와 같게 여백을 포함한 페이지 전체 화소 수 기준
+            page_pixels = book_width_px * book_height_px * (sample_zoom / zoom) ** 2
+            encoding['codec'] = self._choose_image_codec(
+                _pixmap_to_image(sample_pix), sampled=True, total_pixels=page_pixels
+            )
+            sample_pix = None
+        
+        images = []
+        encoded_bytes = 0
+        raw_bytes = 0
+        encode_seconds = 0.0
+        codec = encoding.get('codec', 'flate')
+        for top in range(0, height, strip_rows):
+            band = fitz.Rect(
+                device_rect.x0, device_rect.y0 + top,
+                device_rect.x1, device_rect.y0 + min(height, top + strip_rows)
+            )
+            with get_fitz_lock():
+                pix = page.get_pixmap(matrix=matrix, clip=band * inverse)
+            strip_img = _pixmap_to_image(pix)
+            if min(low for low, _ in strip_img.getextrema()) == 255:
+                continue  # 흰 띠는 페이지 배경으로 충분
+            
+            encode_started = time.perf_counter()
+            image_stream, codec = self._encode_page_image(strip_img, encoding)
+            encode_seconds += time.perf_counter() - encode_started
+            encoded_bytes += len(image_stream._data)
+            raw_bytes += pix.width * pix.height * 3
+            
+            # 띠의 픽셀 위치(위쪽 기준) -> 페이지 좌표(아래쪽 기준, pt)
+            left_px = final_x + pix.x - device_rect.x0
+            top_px = final_y + pix.y - device_rect.y0
+            images.append((
+                image_stream,
+                left_px * 72 / dpi, (book_height_px - top_px - pix.height) * 72 / dpi,
+                pix.width * 72 / dpi, pix.height * 72 / dpi
+            ))
+            pix = strip_img = None
+        
+        self._last_page_encoding = {
+            'codec': codec,
+            'bytes': encoded_bytes,
+            'raw_bytes': raw_bytes,
+            'seconds': encode_seconds
+        }
+        trace_start = self.tracer.record(
+            "transform.raster.strips", trace_start, category="transform", codec=codec, strips=len(images)
+        )
+        new_page = self._build_image_page(images)
+        self.tracer.record("transform.raster.pypdf2", trace_start, category="transform")
+        return new_page
+    
+    def _choose_image_codec(self, img, sampled=False, total_pixels=None):
+        """페이지 이미지 내용에 맞는 코덱 선택 (auto)
+        
+        축소한 이미지에서 중간 밝기 화소와 유채색 화소의 비율을 보고
+        글자/선만 있는 흑백 페이지는 bilevel, 사진처럼 연속 계조가 많은 페이지는 jpeg,
+        그 밖의 페이지(도표, 단색 영역 등)는 무손실 flate를 선택합니다.
+        sampled가 True이면 img가 이미 축소 렌더링한 이미지이므로 그대로 씁니다.
+        total_pixels를 주면 img 밖(흰 여백)까지 포함한 화소 수로 비율을 계산합니다.
+        """
+        # 평균 축소는 글자 가장자리를 중간 밝기로 흐리므로 화소를 그대로 추출
+        if sampled:
+            sample = img
+        else:
+            sample = img.resize((max(1, img.width // 4), max(1, img.height // 4)), Image.Resampling.NEAREST)
+        total = max(total_pixels or 0, sample.width * sample.height)
+        
+        gray_hist = sample.convert('L').histogram()
+        midtone_ratio = sum(gray_hist[48:208]) / total
+        saturation_hist = sample.convert('HSV').getchannel('S').histogram()
+        color_ratio = sum(saturation_hist[48:]) / total
+        
+        if midtone_ratio < 0.04 and color_ratio < 0.01:
+            return "bilevel"
+        if midtone_ratio > 0.10:
+            return "jpeg"
+        return "flate"
+    
+    def _encode_page_image(self, img, encoding=None):
+        """페이지 이미지를 PDF 이미지 객체로 인코딩 -> (EncodedStreamObject, 사용한 코덱)"""
+        encoding = encoding or {}
+        codec = encoding.get('codec', 'flate')
+        if codec == "auto":
+            codec = self._choose_image_codec(img)
+        
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        if img.mode == 'RGB' and codec != "bilevel":
+            # 무채색 페이지는 회색조로 저장 (데이터 1/3)
+            saturation_hist = img.reduce(4).convert('HSV').getchannel('S').histogram()
+            if sum(saturation_hist[8:]) == 0:
+                img = img.convert('L')
+        
+        stream = EncodedStreamObject()
+        parms = None
+        bits = 8
+        color_space = '/DeviceGray' if img.mode == 'L' else '/DeviceRGB'
+        
+        if codec == "jpeg":
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=int(encoding.get('jpeg_quality', 85)))
+            stream._data = buffer.getvalue()
+            pdf_filter = '/DCTDecode'
+        elif codec == "bilevel":
+            bilevel = img.convert('L').point(lambda v: 255 if v >= 128 else 0, mode='1')
+            color_space = '/DeviceGray'
+            bits = 1
+            g4 = self._encode_ccitt_g4(bilevel)
+            if g4 is not None:
+                stream._data, black_is_1 = g4
+                pdf_filter = '/CCITTFaxDecode'
+                parms = DictionaryObject({
+                    NameObject('/K'): NumberObject(-1),
+                    NameObject('/Columns'): NumberObject(bilevel.width),
+                    NameObject('/Rows'): NumberObject(bilevel.height),
+                    NameObject('/BlackIs1'): BooleanObject(black_is_1)
+                })
+            else:
+                # CCITT 인코더(libtiff)가 없으면 1비트 데이터를 Flate로 압축
+                stream._data = zlib.compress(bilevel.tobytes(), int(encoding.get('flate_level', 6)))
+                pdf_filter = '/FlateDecode'
+        elif codec == "flate":
+            stream._data = zlib.compress(img.tobytes(), int(encoding.get('flate_level', 6)))
+            pdf_filter = '/FlateDecode'
+        else:
+            raise ValueError(f"지원하지 않는 코덱입니다: {codec}")
+        
+        stream.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Image'),
+            NameObject('/Width'): NumberObject(img.width),
+            NameObject('/Height'): NumberObject(img.height),
+            NameObject('/ColorSpace'): NameObject(color_space),
+            NameObject('/BitsPerComponent'): NumberObject(bits),
+            NameObject('/Filter'): NameObject(pdf_filter)
+        })
+        if parms is not None:
+            stream[NameObject('/DecodeParms')] = parms
+        return stream, codec
+    
+    def _encode_ccitt_g4(self, bilevel_img):
+        """1비트 이미지를 CCITT G4로 인코딩 -> (데이터, BlackIs1) 또는 None (지원되지 않는 경우)"""
+        if not pil_features.check('libtiff'):
+            return None
+        
+        buffer = io.BytesIO()
+        # 스트립 하나로 기록해야 데이터 전체가 하나의 G4 스트림이 됨
+        # (libtiff 기록기는 RowsPerStrip 대신 strip_size(기본 64KB)로 스트립을 나눔)
+        strip_size = (bilevel_img.width + 7) // 8 * bilevel_img.height
+        bilevel_img.save(buffer, format='TIFF', compression='group4',
+                         tiffinfo={278: bilevel_img.height}, strip_size=strip_size)
+        tiff = Image.open(io.BytesIO(buffer.getvalue()))
+        offsets = tiff.tag_v2.get(273)
+        byte_counts = tiff.tag_v2.get(279)
+        if not offsets or len(offsets) != 1:
+            return None
+        
+        data = buffer.getvalue()[offsets[0]:offsets[0] + byte_counts[0]]
+        # PhotometricInterpretation 1(BlackIsZero)이면 1비트가 흰색이 아닌 검정으로 부호화됨
+        black_is_1 = tiff.tag_v2.get(262) == 1
+        return data, black_is_1
+    
+    def _build_image_page(self, images):
+        """인코딩된 이미지들을 지정한 위치에 그리는 책 크기 페이지 생성
+        
+        images: [(EncodedStreamObject, x_pt, y_pt, width_pt, height_pt), ...] (페이지 왼쪽 아래 기준)
+        """
+        writer = PdfWriter()
+        xobjects = DictionaryObject()
+        operations = []
+        for index, (image_stream, x_pt, y_pt, width_pt, height_pt) in enumerate(images):
+            xobjects[NameObject(f'/Im{index}')] = writer._add_object(image_stream)
+            operations.append(
+                f"q {width_pt:.4f} 0 0 {height_pt:.4f} {x_pt:.4f} {y_pt:.4f} cm /Im{index} Do Q"
+            )
+        
+        content = DecodedStreamObject()
+        content.set_data("\n".join(operations).encode())
+        
+        page = PageObject.create_blank_page(width=self.book_width_pt, height=self.book_height_pt)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/XObject'): xobjects
+        })
+        page[NameObject('/Contents')] = writer._add_object(content)
+        writer.add_page(page)
+        
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        buffer.seek(0)
+        return PdfReader(buffer).pages[0]
+    
+    def encoding_summary(self, report=None):
+        """인코딩 기록을 코덱별로 합산 -> [{'codec', 'pages', 'bytes', 'raw_bytes', 'seconds'}]"""
+        totals = {}
+        for entry in (self.encoding_report if report is None else report):
+            row = totals.setdefault(entry['codec'], {
+                'codec': entry['codec'], 'pages': 0, 'bytes': 0, 'raw_bytes': 0, 'seconds': 0.0
+            })
+            row['pages'] += 1
+            row['bytes'] += entry['bytes']
+            row['raw_bytes'] += entry['raw_bytes']
+            row['seconds'] += entry['seconds']
+        return sorted(totals.values(), key=lambda row: row['bytes'], reverse=True)
+    
     def add_margin_guides_to_page(self, page, margins, page_number):
         """페이지에 여백 가이드 선 추가"""
         # ReportLab으로 가이드 선이 있는 오버레이 생성
@@ -588,31 +1617,65 @@ class BookPublishingEditor:
         
         return page
 
+    def get_preview_base(self, page_data):
+        """미리보기용 원본 썸네일 (1단계 캐시)
+        
+        원본 페이지는 설정과 무관하므로 페이지 내용 해시를 키로 한 번만 렌더링하고,
+        처음부터 미리보기 캔버스 크기에 맞춰 렌더링하여 큰 이미지 축소 과정을 생략합니다.
+        """
+        content_hash = page_content_hash(page_data)
+        base_cache = get_preview_base_cache()
+        base_img = base_cache.get(content_hash)
+        if base_img is not None:
+            return base_img
+        
+        trace_start = self.tracer.start()
+        pdf_data = get_page_pdf_data(page_data)
+        # 백그라운드 스레드(지연 분할, 미리보기 예약 작업)와 MuPDF 작업이 겹치지 않도록 직렬화
+        with get_fitz_lock():
+            doc = fitz.open(stream=pdf_data, filetype="pdf")
+            try:
+                page = doc[0]
+                canvas_width, canvas_height = self.PREVIEW_SIZE
+                zoom = min(canvas_width / page.rect.width, canvas_height / page.rect.height)
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            finally:
+                doc.close()
+        
+        # 픽스맵 버퍼를 PIL 이미지로 바로 사용하고, 캐시에는 독립된 사본을 보관
+        base_img = _pixmap_to_image(pix).copy()
+        base_cache.put(content_hash, base_img)
+        self.tracer.record("preview.base_render", trace_start, category="preview")
+        return base_img
+    
+    def preview_cache_key(self, page_data, margins, scale_factor, offset_x, offset_y, page_number, show_page_numbers=True):
+        """완성 미리보기 캐시 키 - 페이지 내용과 실제로 적용되는 설정만 사용"""
+        effective_margins = self.calculate_page_margins(
+            page_number, margins['top'], margins['bottom'], 
+            margins['outer'], margins['inner']
+        )
+        page_label = page_data.get('original_number', page_number) if show_page_numbers else None
+        return (
+            page_content_hash(page_data),
+            self.book_width_mm, self.book_height_mm,
+            effective_margins['top'], effective_margins['bottom'],
+            effective_margins['left'], effective_margins['right'],
+            scale_factor, offset_x, offset_y,
+            page_number % 2, page_label
+        )
+    
     def create_preview_image(self, page_data, margins, scale_factor, offset_x, offset_y, page_number, show_page_numbers=True):
-        """미리보기 이미지 생성 - 안전하고 간단한 방식"""
+        """미리보기 이미지 생성 - 캐시된 원본 썸네일에 배치/가이드/번호만 합성"""
+        with self.tracer.span("preview.page", category="preview", page=page_number):
+            return self._create_preview_image(page_data, margins, scale_factor, offset_x, offset_y, page_number, show_page_numbers)
+    
+    def _create_preview_image(self, page_data, margins, scale_factor, offset_x, offset_y, page_number, show_page_numbers=True):
         try:
-            # 1단계: 원본 페이지를 이미지로 변환
-            temp_pdf_path = None
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_pdf_file:
-                temp_pdf_path = temp_pdf_file.name
-                temp_writer = PdfWriter()
-                temp_writer.add_page(PdfReader(io.BytesIO(page_data['pdf_data'])).pages[0]) # 페이지 객체 생성
-                temp_writer.write(temp_pdf_file)
-            
-            # PyMuPDF로 이미지 렌더링
-            doc = fitz.open(temp_pdf_path)
-            page = doc[0]
-            mat = fitz.Matrix(2.0, 2.0)  # 144 DPI (안전한 해상도)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            doc.close()
-            
-            # PIL 이미지로 변환
-            original_img = Image.open(io.BytesIO(img_data))
+            # 1단계: 원본 썸네일 (내용이 같으면 캐시 재사용)
+            original_img = self.get_preview_base(page_data)
             
             # 2단계: 미리보기 캔버스 설정 (고정 크기)
-            canvas_width = 200
-            canvas_height = 280  # 125:175 비율
+            canvas_width, canvas_height = self.PREVIEW_SIZE  # 125:175 비율
             
             # 3단계: 여백 계산
             effective_margins = self.calculate_page_margins(
@@ -687,48 +1750,2094 @@ class BookPublishingEditor:
                 except:
                     pass
             
-            # 임시 파일 정리
+            return canvas
+            
+        except Exception as e:
+            # 상세한 에러 정보를 포함한 이미지 생성
+            error_img = Image.new('RGB', (200, 280), color=(250, 250, 250))
+            draw = ImageDraw.Draw(error_img)
+            draw.rectangle([0, 0, 199, 279], outline=(255, 0, 0), width=2)
+            
+            try:
+                font = ImageFont.load_default()
+                y = 10
+                
+                # 페이지 정보
+                draw.text((10, y), f"Page {page_number}", fill=(0, 0, 0), font=font)
+                y += 20
+                
+                # 설정 정보
+                draw.text((10, y), f"Scale: {scale_factor:.2f}", fill=(100, 100, 100), font=font)
+                y += 15
+                draw.text((10, y), f"Offset: {offset_x:.1f},{offset_y:.1f}", fill=(100, 100, 100), font=font)
+                y += 20
+                
+                # 에러 정보
+                draw.text((10, y), "Preview Error:", fill=(255, 0, 0), font=font)
+                y += 20
+                
+                # 에러 메시지 (짧게)
+                error_msg = str(e)[:50]
+                draw.text((10, y), error_msg, fill=(255, 0, 0), font=font)
+                
+            except:
+                # 폰트 로딩 실패 시 기본 텍스트만
+                draw.text((10, 10), f"Error on page {page_number}", fill=(255, 0, 0))
+            
+            return error_img
+
+
+class SplitPageStore:
+    """분할 페이지 PDF 데이터를 디스크 파일에 모아두고 메모리 맵으로 읽는 저장소
+    
+    페이지 데이터는 파일 끝에 이어서 기록되고, 세션 상태에는 가벼운 SplitPageRef만 남습니다.
+    읽을 때는 메모리 맵에서 필요한 페이지만 꺼내며, 최근에 읽은 페이지는
+    max_resident_bytes 한도 안에서만 메모리에 보관합니다.
+    """
+    
+    def __init__(self, path=None, max_resident_bytes=64 * 1024 * 1024, readonly=False):
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix='.pages')
+            os.close(fd)
+        
+        self.path = path
+        self.readonly = readonly
+        self.max_resident_bytes = max_resident_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, 'rb' if readonly else 'a+b')
+        self._mmap = None
+        self._resident = OrderedDict()
+        self._resident_bytes = 0
+        
+        _get_process_module()._OPEN_PAGE_STORES[path] = self
+        # 세션이 끝나 저장소가 정리되면 임시 파일도 삭제
+        self._finalizer = weakref.finalize(
+            self, SplitPageStore._cleanup, self._file, path, self._owns_file
+        )
+    
+    @staticmethod
+    def _cleanup(file_obj, path, remove_file):
+        try:
+            file_obj.close()
+        except Exception:
+            pass
+        if remove_file:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    
+    def put(self, data):
+        """페이지 데이터를 파일 끝에 기록하고 참조 핸들 반환"""
+        if self.readonly:
+            raise ValueError("읽기 전용 페이지 저장소에는 기록할 수 없습니다.")
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+        return SplitPageRef(self.path, offset, len(data))
+    
+    def read(self, offset, length):
+        """메모리 맵에서 페이지 데이터 읽기 (최근 사용 페이지는 한도 안에서 보관)"""
+        key = (offset, length)
+        with self._lock:
+            data = self._resident.get(key)
+            if data is not None:
+                self._resident.move_to_end(key)
+                return data
+            
+            if self._mmap is None or len(self._mmap) < offset + length:
+                # 파일이 커졌으면 다시 매핑
+                if self._mmap is not None:
+                    self._mmap.close()
+                if not self.readonly:
+                    self._file.flush()
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            
+            data = self._mmap[offset:offset + length]
+            
+            if length <= self.max_resident_bytes:
+                self._resident[key] = data
+                self._resident_bytes += length
+                while self._resident_bytes > self.max_resident_bytes:
+                    _, evicted = self._resident.popitem(last=False)
+                    self._resident_bytes -= len(evicted)
+            
+            return data
+    
+    @property
+    def resident_bytes(self):
+        return self._resident_bytes
+    
+    def close(self):
+        """매핑과 파일을 닫고, 직접 만든 임시 파일이면 삭제"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._resident.clear()
+            self._resident_bytes = 0
+        open_stores = _get_process_module()._OPEN_PAGE_STORES
+        if open_stores.get(self.path) is self:
+            del open_stores[self.path]
+        self._finalizer()
+
+
+class SplitPageRef:
+    """SplitPageStore에 저장된 페이지 하나를 가리키는 가벼운 핸들 (pickle 가능)"""
+    
+    __slots__ = ('path', 'offset', 'length')
+    
+    def __init__(self, path, offset, length):
+        self.path = path
+        self.offset = offset
+        self.length = length
+    
+    def read(self):
+        shared = _get_process_module()
+        store = shared._OPEN_PAGE_STORES.get(self.path) or shared._ATTACHED_PAGE_STORES.get(self.path)
+        if store is None:
+            # 워커 프로세스 등 저장소가 열려 있지 않으면 같은 파일을 읽기용으로 엶
+            store = SplitPageStore(self.path, readonly=True)
+            shared._ATTACHED_PAGE_STORES[self.path] = store
+        return store.read(self.offset, self.length)
+    
+    def __repr__(self):
+        return f"SplitPageRef({os.path.basename(self.path)!r}, {self.offset}, {self.length})"
+
+
+class LazySplitPages:
+    """분할 페이지를 처음 접근할 때 만드는 지연 분할 시퀀스
+    
+    생성할 때는 원본 페이지 크기만 읽어 분할 배치(페이지 수, 좌/우)를 정하고,
+    실제 PDF 데이터는 인덱스로 접근할 때 원본 페이지 단위로 만듭니다.
+    start_background_fill()을 호출하면 request()로 요청된 페이지를 먼저,
+    나머지는 순서대로 백그라운드 스레드에서 채웁니다. 모든 페이지가 채워지면
+    on_complete(pages)가 한 번 호출됩니다.
+    """
+    
+    def __init__(self, editor, pdf_source, use_first_page=True, split_mode="vector", page_store=None, on_complete=None):
+        self._editor = editor
+        self.split_mode = split_mode
+        self.page_store = page_store
+        self.on_complete = on_complete
+        
+        # 경로 또는 PDF 바이트 (업로드 임시 파일이 먼저 삭제되어도 계속 분할할 수 있음)
+        from_bytes = isinstance(pdf_source, (bytes, bytearray))
+        with get_fitz_lock():
+            if from_bytes:
+                self._doc = fitz.open(stream=bytes(pdf_source), filetype="pdf")
+            else:
+                self._doc = fitz.open(pdf_source)
+            page_rects = [page.rect for page in self._doc]
+        source_ref = None if from_bytes else source_reference(pdf_source)
+        
+        self._lock = threading.RLock()
+        self._pages = []
+        self._source_slots = []  # 원본 페이지 -> 분할 페이지 인덱스 목록 (제외된 페이지는 None)
+        
+        for page_num, page_rect in enumerate(page_rects):
+            slots = []
+            for side, clip_rect in editor._source_page_halves(page_rect):
+                if not use_first_page and page_num == 0 and not slots and not self._pages:
+                    # 첫 페이지 미사용: 첫 분할 페이지 제외
+                    slots.append(None)
+                    continue
+                
+                if side == 'left':
+                    description = f"원본 {page_num + 1}페이지 좌측"
+                elif side == 'right':
+                    description = f"원본 {page_num + 1}페이지 우측"
+                else:
+                    description = f"원본 {page_num + 1}페이지"
+                
+                page_info = {
+                    'original_page': page_num + 1,
+                    'side': side,
+                    'description': description,
+                    'original_number': len(self._pages) + 1,
+                    'clip': [clip_rect.x0, clip_rect.y0, clip_rect.x1, clip_rect.y1]
+                }
+                if source_ref:
+                    page_info.update(source_ref)
+                slots.append(len(self._pages))
+                self._pages.append(page_info)
+            self._source_slots.append(slots)
+        
+        self._source_of = {}
+        for page_num, slots in enumerate(self._source_slots):
+            for index in slots:
+                if index is not None:
+                    self._source_of[index] = page_num
+        
+        self._done = [False] * len(self._source_slots)
+        self._done_count = 0
+        self._priority = []
+        self._thread = None
+        self._closed = False
+        self.error = None
+        
+        if not self._done:
+            self._finish()
+    
+    def __len__(self):
+        return len(self._pages)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("분할 페이지 인덱스가 범위를 벗어났습니다.")
+        self._materialize(self._source_of[index])
+        return self._pages[index]
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    @property
+    def is_complete(self):
+        return self._done_count == len(self._done)
+    
+    def progress(self):
+        """(분할된 원본 페이지 수, 전체 원본 페이지 수)"""
+        return self._done_count, len(self._done)
+    
+    def request(self, indices):
+        """분할 페이지 인덱스들을 백그라운드 분할의 우선 대상으로 지정"""
+        with self._lock:
+            sources = [self._source_of[i] for i in indices if i in self._source_of]
+            self._priority = sources + [p for p in self._priority if p not in sources]
+    
+    def start_background_fill(self):
+        """남은 페이지를 백그라운드 스레드에서 분할"""
+        with self._lock:
+            if self._thread is not None or self.is_complete:
+                return
+            self._thread = threading.Thread(target=self._fill_loop, name="lazy-split-fill", daemon=True)
+            self._thread.start()
+    
+    def _fill_loop(self):
+        next_page = 0
+        try:
+            while not self._closed:
+                with self._lock:
+                    page_num = None
+                    while self._priority:
+                        candidate = self._priority.pop(0)
+                        if not self._done[candidate]:
+                            page_num = candidate
+                            break
+                    if page_num is None:
+                        while next_page < len(self._done) and self._done[next_page]:
+                            next_page += 1
+                        if next_page >= len(self._done):
+                            return
+                        page_num = next_page
+                    self._materialize(page_num)
+        except Exception as e:
+            # 접근 시 동기 분할로 다시 시도되므로 오류만 기록
+            self.error = e
+    
+    def _materialize(self, page_num):
+        """원본 페이지 하나를 분할해 해당 페이지 정보에 데이터 기록"""
+        with self._lock:
+            if self._done[page_num]:
+                return
+            if self._closed:
+                raise ValueError("지연 분할이 이미 종료되었습니다.")
+            
+            # 예산은 MuPDF 잠금 밖에서 확보 (잠금을 쥔 채 기다리지 않음)
+            with get_fitz_lock():
+                page_bytes = self._editor.estimate_split_memory(self._doc[page_num].rect, self.split_mode)
+            with get_memory_budget().reserve(page_bytes, self._editor.memory_usage):
+                with get_fitz_lock():
+                    results = self._editor._split_source_page(self._doc, page_num, self.split_mode)
+                for index, (_, pdf_data, _) in zip(self._source_slots[page_num], results):
+                    if index is not None:
+                        self._editor._store_split_data(self._pages[index], pdf_data, self.page_store)
+            
+            self._done[page_num] = True
+            self._done_count += 1
+            if self.is_complete:
+                self._finish()
+    
+    def _finish(self):
+        with get_fitz_lock():
+            self._doc.close()
+        if self.on_complete is not None:
+            self.on_complete(self._pages)
+    
+    def close(self):
+        """백그라운드 분할 중단 (이미 분할된 페이지는 유지)"""
+        self._closed = True
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._lock:
+            if not self.is_complete:
+                with get_fitz_lock():
+                    self._doc.close()
+
+
+class PageOrderView:
+    """분할 페이지 시퀀스를 다른 순서로 보여주는 보기 (페이지 데이터를 복사하지 않음)
+    
+    order의 BLANK_PAGE_INDEX 자리는 접장을 채우는 빈 페이지로, 첫 분할 페이지와 같은
+    크기의 빈 페이지 하나를 모든 자리가 공유합니다.
+    """
+    
+    def __init__(self, base, order):
+        self.base = base
+        self.order = order
+        self._blank_page = None
+    
+    def __len__(self):
+        return len(self.order)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._page(i) for i in self.order[index]]
+        return self._page(self.order[index])
+    
+    def __iter__(self):
+        for index in self.order:
+            yield self._page(index)
+    
+    @property
+    def blank_count(self):
+        """채워 넣은 빈 페이지 수"""
+        return len(self.order) - len(self.base)
+    
+    def _page(self, index):
+        if index != BLANK_PAGE_INDEX:
+            return self.base[index]
+        if self._blank_page is None:
+            self._blank_page = blank_page_info(*split_page_size(self.base[0]))
+        return self._blank_page
+    
+    def request(self, indices):
+        if isinstance(self.base, LazySplitPages):
+            self.base.request([
+                self.order[i] for i in indices
+                if 0 <= i < len(self.order) and self.order[i] != BLANK_PAGE_INDEX
+            ])
+
+
+# 접장(signature) 하나의 페이지 수 - 반으로 접은 종이 1/2/4/8장을 겹친 묶음
+IMPOSITION_SIGNATURE_SIZES = (4, 8, 16, 32)
+# 순서 보기에서 접장을 채우는 빈 페이지 자리
+BLANK_PAGE_INDEX = -1
+# (너비, 높이) -> 빈 페이지 정보 (모든 순서 보기가 공유)
+_BLANK_PAGES = {}
+
+
+def _folded_signature_order(page_count):
+    """반으로 접은 종이를 겹쳐 접장 하나로 묶을 때의 인쇄 순서 (0부터 시작하는 인덱스)
+    
+    바깥쪽 종이부터 앞면 (마지막, 첫), 뒷면 (둘째, 마지막 앞) 순서이며,
+    page_count는 4의 배수여야 합니다.
+    """
+    sheet = np.arange(page_count // 4)
+    return np.stack([
+        page_count - 1 - 2 * sheet, 2 * sheet,
+        2 * sheet + 1, page_count - 2 - 2 * sheet
+    ], axis=1).ravel()
+
+
+def imposition_order(page_count, page_order="1234", signature_pages=4):
+    """제본 방식에 따른 출력 순서 (분할 페이지 인덱스 순열)
+    
+    - "1234": 분할 순서 그대로 (빈 페이지 없음)
+    - "2341": 4페이지마다 2,3,4,1 순서 (마지막 묶음도 빈 페이지로 채워 같은 패턴 적용)
+    - "saddle": 중철 - 전체를 접장 하나로 겹쳐 접는 순서. 페이지 수를 signature_pages의
+      배수로 채웁니다 (한 판에 앉히는 페이지 수 단위).
+    - "perfect": 무선 - signature_pages페이지 접장을 차례로 쌓는 순서
+    
+    모자란 자리는 BLANK_PAGE_INDEX(빈 페이지)로 채우며, 마지막 페이지는 뒤표지로 보고
+    맨 끝에 둔 채 그 앞(책 끝, 뒤표지 앞)에 넣습니다.
+    """
+    if page_order == "1234":
+        return range(page_count)
+    if signature_pages not in IMPOSITION_SIGNATURE_SIZES:
+        raise ValueError(f"지원하지 않는 접장 페이지 수입니다: {signature_pages}")
+    
+    if page_order == "2341":
+        block_pages = 4
+    elif page_order in ("saddle", "perfect"):
+        block_pages = signature_pages
+    else:
+        raise ValueError(f"지원하지 않는 페이지 순서입니다: {page_order}")
+    
+    padded_count = -(-page_count // block_pages) * block_pages
+    if page_order == "saddle":
+        order = _folded_signature_order(padded_count)
+    else:
+        pattern = np.array([1, 2, 3, 0]) if page_order == "2341" else _folded_signature_order(block_pages)
+        order = (np.arange(padded_count // block_pages)[:, None] * block_pages + pattern).ravel()
+    
+    # 채운 책의 읽는 순서 자리 -> 분할 페이지 (빈 페이지는 뒤표지 바로 앞까지)
+    reading = np.arange(padded_count)
+    if padded_count > page_count:
+        reading[page_count:] = BLANK_PAGE_INDEX
+        if page_count > 1:
+            reading[page_count - 1] = BLANK_PAGE_INDEX
+            reading[-1] = page_count - 1
+    return reading[order].tolist()
+
+
+def split_page_size(page_info):
+    """분할 페이지 크기 (pt) - 잘라낸 영역이 기록되어 있으면 PDF를 열지 않음"""
+    clip = page_info.get('clip')
+    if clip is not None:
+        return round(clip[2] - clip[0], 3), round(clip[3] - clip[1], 3)
+    with get_fitz_lock():
+        doc = fitz.open(stream=get_page_pdf_data(page_info), filetype="pdf")
+        try:
+            rect = doc[0].rect
+        finally:
+            doc.close()
+    return round(rect.width, 3), round(rect.height, 3)
+
+
+def blank_page_info(width, height):
+    """접장을 채우는 빈 페이지 정보 (크기별로 하나만 만들어 공유)"""
+    page_info = _BLANK_PAGES.get((width, height))
+    if page_info is None:
+        with get_fitz_lock():
+            doc = fitz.open()
+            try:
+                doc.new_page(width=width, height=height)
+                pdf_data = doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+            finally:
+                doc.close()
+        page_info = {
+            'original_page': None,
+            'side': 'blank',
+            'description': "빈 페이지 (접장 채움)",
+            'pdf_data': pdf_data,
+            'content_hash': hashlib.sha256(pdf_data).hexdigest()
+        }
+        page_info = _BLANK_PAGES.setdefault((width, height), page_info)
+    return page_info
+
+
+# 프로세스 안에서 열려 있는 페이지 저장소 (경로 -> 저장소)
+_OPEN_PAGE_STORES = weakref.WeakValueDictionary()
+# 다른 프로세스가 만든 저장소를 읽기용으로 연 경우 (파일은 삭제하지 않음)
+_ATTACHED_PAGE_STORES = {}
+
+
+class PipelineTracer:
+    """처리 단계별 구간(span)을 기록하는 계측기
+    
+    구간은 Chrome trace 형식의 완료 이벤트("ph": "X")로 모아 두었다가
+    export_chrome_trace()로 chrome://tracing 또는 Perfetto에서 열 수 있는 JSON으로
+    저장하고, summary()로 단계별 합계를 계산합니다. 시작 시각은 벽시계(마이크로초)를
+    쓰므로 워커 프로세스에서 기록한 구간도 add_events()로 합칠 수 있습니다.
+    
+    사용법:
+        with tracer.span("transform.vector", page=3): ...
+        start = tracer.start(); ...; tracer.record("split.page", start)
+    enabled=False이면 start()가 None을 반환하고 record()/span()은 아무 일도 하지 않습니다.
+    """
+    
+    def __init__(self, enabled=True, max_events=200000):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.dropped = 0
+        self._events = []
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """구간 시작 시각 (비활성화 상태면 None)"""
+        if not self.enabled:
+            return None
+        return (time.time_ns(), time.perf_counter_ns())
+    
+    def record(self, name, start, category="stage", **args):
+        """start()부터 지금까지를 구간으로 기록하고, 이어지는 구간의 시작 시각 반환"""
+        if start is None:
+            return None
+        end = time.perf_counter_ns()
+        wall_start, perf_start = start
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': wall_start / 1000,
+            'dur': (end - perf_start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident()
+        }
+        if args:
+            event['args'] = args
+        
+        with self._lock:
+            if len(self._events) < self.max_events:
+                self._events.append(event)
+            else:
+                self.dropped += 1
+        return (wall_start + (end - perf_start), end)
+    
+    def span(self, name, category="stage", **args):
+        """with 문으로 쓰는 구간 기록"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _TraceSpan(self, name, category, args)
+    
+    def add_events(self, events):
+        """다른 계측기(워커 프로세스 등)에서 기록한 이벤트 합치기"""
+        if not self.enabled or not events:
+            return
+        with self._lock:
+            room = max(0, self.max_events - len(self._events))
+            self._events.extend(events[:room])
+            self.dropped += max(0, len(events) - room)
+    
+    def events(self):
+        with self._lock:
+            return list(self._events)
+    
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self.dropped = 0
+    
+    def summary(self):
+        """구간 이름별 [{'name', 'category', 'count', 'total_ms', 'mean_ms', 'max_ms'}] (합계 내림차순)"""
+        totals = {}
+        for event in self.events():
+            entry = totals.setdefault(event['name'], {
+                'name': event['name'], 'category': event['cat'],
+                'count': 0, 'total_ms': 0.0, 'max_ms': 0.0
+            })
+            duration_ms = event['dur'] / 1000
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+        
+        rows = []
+        for entry in totals.values():
+            entry['mean_ms'] = entry['total_ms'] / entry['count']
+            for key in ('total_ms', 'mean_ms', 'max_ms'):
+                entry[key] = round(entry[key], 3)
+            rows.append(entry)
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+    
+    def to_chrome_trace(self):
+        """Chrome trace / Perfetto JSON 객체 (시각은 첫 이벤트 기준으로 맞춤)"""
+        events = sorted(self.events(), key=lambda event: event['ts'])
+        origin = events[0]['ts'] if events else 0
+        trace_events = [dict(event, ts=round(event['ts'] - origin, 3), dur=round(event['dur'], 3)) for event in events]
+        
+        main_pid = os.getpid()
+        for pid in sorted({event['pid'] for event in events}):
+            trace_events.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                'args': {'name': 'main' if pid == main_pid else f'worker {pid}'}
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+    
+    def export_chrome_trace(self, path=None):
+        """Chrome trace JSON을 파일로 저장하거나 (path가 없으면) 바이트로 반환"""
+        data = json.dumps(self.to_chrome_trace(), ensure_ascii=False).encode('utf-8')
+        if path is None:
+            return data
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+class _TraceSpan:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'started')
+    
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started = None
+    
+    def __enter__(self):
+        self.started = self.tracer.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.started, self.category, **self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+# 계측을 쓰지 않을 때의 기본 계측기
+NULL_TRACER = PipelineTracer(enabled=False)
+
+
+class ByteBudgetLRU:
+    """바이트 예산 안에서 최근 사용 순으로 항목을 정리하는 캐시 (스레드 안전)
+    
+    항목 크기는 PIL 이미지면 픽셀 버퍼 크기, 바이트 데이터면 길이로 계산하며,
+    적중/누락/제거 횟수를 기록합니다.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def estimate_size(value):
+        """캐시 항목의 메모리 크기 추정 (바이트)"""
+        if isinstance(value, Image.Image):
+            return value.width * value.height * len(value.getbands())
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return len(value)
+        return sys.getsizeof(value)
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        size = self.estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                # 예산보다 큰 항목은 보관하지 않음
+                return
+            
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            
+            while self._total_bytes > self.max_bytes:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(evicted_key)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def _cache_budget_bytes(env_name, default_mb):
+    """환경 변수(MB)로 조정 가능한 캐시 예산"""
+    try:
+        return int(float(os.environ.get(env_name, default_mb)) * 1024 * 1024)
+    except ValueError:
+        return int(default_mb * 1024 * 1024)
+
+
+# 프로세스 전체(모든 세션)에서 공유하는 미리보기 캐시
+# - 원본 썸네일: 페이지 내용 해시 -> 미리보기 크기 원본 이미지
+# - 완성 미리보기: 내용 해시 + 실제 적용 설정 -> 합성된 미리보기 이미지
+_PREVIEW_BASE_CACHE = ByteBudgetLRU(_cache_budget_bytes('PDF_EDITOR_PREVIEW_BASE_CACHE_MB', 32))
+_PREVIEW_IMAGE_CACHE = ByteBudgetLRU(_cache_budget_bytes('PDF_EDITOR_PREVIEW_CACHE_MB', 64))
+
+
+def get_preview_base_cache():
+    """프로세스 공유 원본 썸네일 캐시"""
+    return _get_process_module()._PREVIEW_BASE_CACHE
+
+
+def get_preview_image_cache():
+    """프로세스 공유 완성 미리보기 캐시"""
+    return _get_process_module()._PREVIEW_IMAGE_CACHE
+
+
+def page_content_hash(page_info):
+    """페이지 PDF 데이터의 내용 해시 (분할 시 계산된 값이 없으면 계산하여 저장)"""
+    content_hash = page_info.get('content_hash')
+    if content_hash is None:
+        content_hash = hashlib.sha256(get_page_pdf_data(page_info) or b'').hexdigest()
+        page_info['content_hash'] = content_hash
+    return content_hash
+
+
+def get_page_pdf_data(page_info):
+    """페이지 정보에서 PDF 바이트 데이터 가져오기 (직접 저장 또는 저장소 참조)"""
+    if page_info.get('pdf_data'):
+        return page_info['pdf_data']
+    if page_info.get('page_ref') is not None:
+        return page_info['page_ref'].read()
+    return None
+
+
+def page_data_size(page_info):
+    """페이지 PDF 데이터 크기 (저장소 참조는 읽지 않고 기록된 길이 사용)"""
+    if page_info.get('pdf_data'):
+        return len(page_info['pdf_data'])
+    if page_info.get('page_ref') is not None:
+        return page_info['page_ref'].length
+    return 0
+
+
+def source_reference(pdf_path):
+    """분할 페이지에 기록할 원본 파일 위치와 식별 정보 (크기, 수정 시각)"""
+    try:
+        stat = os.stat(pdf_path)
+    except OSError:
+        return None
+    return {
+        'source_path': os.path.abspath(pdf_path),
+        'source_stat': [stat.st_size, stat.st_mtime_ns]
+    }
+
+
+def page_source(page_info):
+    """분할 페이지의 원본 위치 -> (경로, 페이지 인덱스, 잘라낸 영역) 또는 None
+    
+    원본 파일이 없거나 분할 이후 바뀌었으면(크기/수정 시각 불일치) None을 반환합니다.
+    """
+    path = page_info.get('source_path')
+    clip = page_info.get('clip')
+    if not path or clip is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if [stat.st_size, stat.st_mtime_ns] != list(page_info.get('source_stat') or []):
+        return None
+    return path, page_info['original_page'] - 1, clip
+
+class PreviewScheduler:
+    """미리보기 작업을 우선순위 순서로 처리하는 스레드 풀 (프로세스 공유)
+    
+    보이는 페이지(PRIORITY_VISIBLE) > 이전/다음 페이지(PRIORITY_NEIGHBOR) >
+    전체 썸네일 준비(PRIORITY_WARMUP) 순서로 처리합니다. 작업은 소유자(세션)별
+    세대 토큰과 함께 예약되며, set_generation()으로 토큰이 바뀌면 이전 토큰으로
+    예약되어 아직 시작하지 않은 작업은 취소됩니다.
+    """
+    
+    PRIORITY_VISIBLE = 0
+    PRIORITY_NEIGHBOR = 1
+    PRIORITY_WARMUP = 2
+    
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._generations = {}
+        self._tasks = {}  # (owner, key) -> (future, priority)
+        self._threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"preview-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def set_generation(self, owner, token):
+        """소유자의 현재 세대 토큰 설정 (바뀌면 이전 세대의 대기 작업 취소)"""
+        with self._lock:
+            if self._generations.get(owner) == token:
+                return
+            self._generations[owner] = token
+            for task_key, (future, _) in list(self._tasks.items()):
+                if task_key[0] == owner:
+                    future.cancel()
+                    del self._tasks[task_key]
+    
+    def submit(self, owner, token, priority, key, fn):
+        """작업 예약 -> Future (같은 작업이 대기 중이면 그 Future를 반환하고 우선순위만 높임)"""
+        with self._lock:
+            if self._generations.get(owner) != token:
+                raise ValueError("현재 세대가 아닌 토큰으로는 작업을 예약할 수 없습니다.")
+            
+            existing = self._tasks.get((owner, key))
+            if existing is not None and not existing[0].done():
+                future, queued_priority = existing
+                if priority < queued_priority and not future.running():
+                    # 더 높은 우선순위로 한 번 더 넣음 (먼저 꺼낸 쪽이 실행)
+                    self._tasks[(owner, key)] = (future, priority)
+                    self._queue.put((priority, next(self._counter), owner, token, key, fn, future))
+                return future
+            
+            future = Future()
+            self._tasks[(owner, key)] = (future, priority)
+            self._queue.put((priority, next(self._counter), owner, token, key, fn, future))
+            return future
+    
+    def pending_count(self, owner=None):
+        with self._lock:
+            return sum(
+                1 for (task_owner, _), (future, _) in self._tasks.items()
+                if (owner is None or task_owner == owner) and not future.done()
+            )
+    
+    def _worker_loop(self):
+        while True:
+            _, _, owner, token, key, fn, future = self._queue.get()
+            with self._lock:
+                if self._generations.get(owner) != token:
+                    future.cancel()
+                    continue
+                if future.done() or future.running():
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+            
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    current = self._tasks.get((owner, key))
+                    if current is not None and current[0] is future:
+                        del self._tasks[(owner, key)]
+
+
+# 세션 간 공유 미리보기 작업 스케줄러 (처음 사용할 때 생성)
+_PREVIEW_SCHEDULER = None
+# 백그라운드 스레드의 MuPDF 작업 직렬화용 잠금 (PyMuPDF는 스레드 안전하지 않음)
+_FITZ_LOCK = threading.RLock()
+_MEMORY_BUDGET = None
+
+
+def get_preview_scheduler():
+    """프로세스 공유 미리보기 스케줄러 (작업 스레드 수는 PDF_EDITOR_PREVIEW_WORKERS로 조정)"""
+    shared = _get_process_module()
+    if shared._PREVIEW_SCHEDULER is None:
+        try:
+            workers = int(os.environ.get('PDF_EDITOR_PREVIEW_WORKERS', 0))
+        except ValueError:
+            workers = 0
+        if workers < 1:
+            workers = max(2, min(4, os.cpu_count() or 1))
+        shared._PREVIEW_SCHEDULER = PreviewScheduler(workers)
+    return shared._PREVIEW_SCHEDULER
+
+
+def get_fitz_lock():
+    return _get_process_module()._FITZ_LOCK
+
+
+class MemoryUsage:
+    """한 편집기(작업)가 메모리 예산에서 확보한 양 - 현재값과 최대값"""
+    
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+
+class MemoryBudget:
+    """분할, 변환, 기록 단계가 함께 쓰는 메모리 예산 (프로세스 공유)
+    
+    단계마다 작업 전에 예상 사용량을 acquire()/reserve()로 확보하고 끝나면 돌려줍니다.
+    예산이 모자라면 다른 작업이 돌려줄 때까지 기다리며(백프레셔), 다른 작업이 아무것도
+    확보하지 않았거나 확보한 작업이 모두 기다리는 중이면 예산보다 커도 진행하여 교착되지
+    않습니다. 이미 확보한 양을 돌려줄 수
+    있는 단계(앞서 보낸 페이지 받기)는 try_acquire()가 실패하면 먼저 돌려줍니다. 병렬 단계는 concurrency()로
+    남은 예산에 맞춰 동시 실행 수를 줄입니다. 확보량은 usage(MemoryUsage)에도 기록되어
+    작업별 최대 사용량을 알 수 있습니다.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.peak = 0
+        self.waits = 0
+        self._blocked = 0  # acquire()에서 기다리는 작업들이 확보하고 있는 양
+        self._cond = threading.Condition()
+    
+    def _fits(self, nbytes):
+        return self.used == 0 or self.used + nbytes <= self.max_bytes
+    
+    def _must_wait(self, nbytes, usage, blocked):
+        # 기다리지 않는 다른 작업이 확보한 양이 있어야 언젠가 돌려받을 수 있음
+        return not self._fits(nbytes) and self.used - usage.current > blocked
+    
+    def _take(self, nbytes, usage):
+        self.used += nbytes
+        self.peak = max(self.peak, self.used)
+        usage.current += nbytes
+        usage.peak = max(usage.peak, usage.current)
+    
+    def try_acquire(self, nbytes, usage):
+        """기다리지 않고 확보 (예산이 모자라면 False)"""
+        with self._cond:
+            if not self._fits(nbytes):
+                return False
+            self._take(nbytes, usage)
+            return True
+    
+    def acquire(self, nbytes, usage):
+        """예산이 날 때까지 기다렸다가 확보 (돌려줄 수 있는 다른 작업이 없으면 바로 확보)"""
+        with self._cond:
+            if self._must_wait(nbytes, usage, self._blocked):
+                self.waits += 1
+                # 이 작업이 확보한 양도 기다리는 쪽으로 알려 다른 대기 작업이 다시 판단하게 함
+                held = usage.current
+                self._blocked += held
+                self._cond.notify_all()
+                try:
+                    while self._must_wait(nbytes, usage, self._blocked - held):
+                        self._cond.wait()
+                finally:
+                    self._blocked -= held
+            self._take(nbytes, usage)
+    
+    def release(self, nbytes, usage):
+        with self._cond:
+            self.used -= nbytes
+            usage.current -= nbytes
+            self._cond.notify_all()
+    
+    def reserve(self, nbytes, usage):
+        """with 블록 동안 nbytes 확보"""
+        return _MemoryReservation(self, nbytes, usage)
+    
+    def concurrency(self, per_task_bytes, requested, usage):
+        """다른 작업이 쓰고 남은 예산으로 동시에 실행할 수 있는 작업 수 (최소 1)"""
+        with self._cond:
+            available = self.max_bytes - (self.used - usage.current)
+        return max(1, min(requested, available // max(1, per_task_bytes)))
+    
+    def stats(self):
+        with self._cond:
+            return {
+                'max_bytes': self.max_bytes,
+                'used': self.used,
+                'peak': self.peak,
+                'waits': self.waits
+            }
+
+
+class _MemoryReservation:
+    """MemoryBudget.reserve()가 반환하는 with 블록용 객체"""
+    
+    def __init__(self, budget, nbytes, usage):
+        self.budget = budget
+        self.nbytes = nbytes
+        self.usage = usage
+    
+    def __enter__(self):
+        self.budget.acquire(self.nbytes, self.usage)
+        return self
+    
+    def __exit__(self, *exc):
+        self.budget.release(self.nbytes, self.usage)
+        return False
+
+
+def get_memory_budget():
+    """프로세스 공유 메모리 예산 (PDF_EDITOR_MEMORY_BUDGET_MB, 기본 1024)"""
+    shared = _get_process_module()
+    if shared._MEMORY_BUDGET is None:
+        shared._MEMORY_BUDGET = MemoryBudget(_cache_budget_bytes('PDF_EDITOR_MEMORY_BUDGET_MB', 1024))
+    return shared._MEMORY_BUDGET
+
+
+class SplitResultCache:
+    """업로드 내용 해시 + 분할 설정을 키로 분할 결과를 디스크에 보관하는 캐시 (세션 간 공유)
+    
+    항목마다 디렉터리 하나를 쓰며, 분할 페이지 데이터(pages-*.bin, SplitPageStore 파일)와
+    페이지 목록(meta.json), 이미지 방식 출력이 참조하는 원본 사본(source.pdf)을 담습니다.
+    페이지 데이터는 기록자마다 다른 파일에 쓰고 meta.json을 마지막에 원자적으로 만들어
+    공개하므로, 여러 세션이나 프로세스가 같은 파일을 동시에 분할해도 안전합니다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제하되, 세션이나
+    생성 작업이 lease()로 사용 중이라고 표시한 항목은 남겨 둡니다.
+    """
+    
+    META_FILE = 'meta.json'
+    SOURCE_FILE = 'source.pdf'
+    # 항목 사용 표시 파일("<pid>-<임의값>")을 두는 하위 디렉터리
+    LEASE_DIR = 'leases'
+    # 공개되지 않은 채 남은 항목(중단된 분할)을 정리하기까지의 시간
+    STALE_SECONDS = 24 * 60 * 60
+    
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(file_hash, use_first_page, split_mode):
+        """파일 내용 해시와 분할 설정으로 캐시 키 생성 (페이지 순서는 분할 후 적용되므로 제외)"""
+        params = f"{file_hash}:{int(bool(use_first_page))}:{split_mode}"
+        return hashlib.sha256(params.encode()).hexdigest()
+    
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+    
+    def load(self, key):
+        """캐시된 분할 결과를 페이지 목록으로 반환 (없으면 None)"""
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, self.META_FILE)
+        
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(meta_path)  # 최근 사용 시각 갱신 (정리 순서 기준)
+        except (OSError, ValueError):
+            return None
+        
+        pages_path = os.path.join(entry_dir, meta['pages_file'])
+        if not os.path.isfile(pages_path):
+            return None
+        
+        split_pages = []
+        for entry in meta['pages']:
+            page_info = dict(entry)
+            offset = page_info.pop('offset')
+            length = page_info.pop('length')
+            page_info['page_ref'] = SplitPageRef(pages_path, offset, length)
+            split_pages.append(page_info)
+        return split_pages
+    
+    def open_writer(self, key):
+        """새 항목의 분할 데이터를 기록할 페이지 저장소 생성 (publish 전에는 load되지 않음)"""
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        return SplitPageStore(os.path.join(entry_dir, f"pages-{uuid.uuid4().hex}.bin"))
+    
+    def publish(self, key, page_store, split_pages):
+        """open_writer 저장소에 기록된 분할 결과를 캐시 항목으로 공개"""
+        pages = []
+        for page_info in split_pages:
+            page_ref = page_info.get('page_ref')
+            if page_ref is None or page_ref.path != page_store.path:
+                raise ValueError("분할 결과가 캐시 페이지 저장소에 기록되지 않았습니다.")
+            entry = {k: v for k, v in page_info.items() if k not in ('page_ref', 'pdf_data')}
+            entry['offset'] = page_ref.offset
+            entry['length'] = page_ref.length
+            pages.append(entry)
+        
+        meta_path = os.path.join(self._entry_dir(key), self.META_FILE)
+        tmp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'key': key,
+                'created': time.time(),
+                'pages_file': os.path.basename(page_store.path),
+                'pages': pages
+            }, f, ensure_ascii=False)
+        
+        if os.path.exists(meta_path):
+            # 다른 세션이 먼저 같은 항목을 공개했으면 그 결과를 유지
+            os.unlink(tmp_path)
+        else:
+            os.replace(tmp_path, meta_path)
+        
+        self.evict(keep=key)
+    
+    def store_source(self, key, pdf_bytes):
+        """분할에 사용할 원본 PDF 사본을 항목 디렉터리에 보관하고 그 경로 반환
+        
+        분할 페이지의 'source_path'가 이 사본을 가리키므로, 항목이 정리되기 전까지
+        이미지 방식 출력이 원본에서 바로 렌더링할 수 있습니다. 이미 있으면 다시 쓰지 않습니다
+        (키에 파일 내용 해시가 포함되어 있어 내용이 같음).
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        source_path = os.path.join(entry_dir, self.SOURCE_FILE)
+        if not os.path.isfile(source_path):
+            tmp_path = f"{source_path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, source_path)
+        return source_path
+    
+    def lease(self, key):
+        """항목을 사용 중으로 표시 (반환한 SplitCacheLease를 release()하거나 버리기 전까지 정리 제외)
+        
+        표시는 항목 디렉터리의 파일이라 같은 캐시를 쓰는 다른 프로세스의 정리에도 적용되고,
+        종료된 프로세스가 남긴 표시는 정리할 때 지웁니다. 아직 분할하지 않은 항목에도 쓸 수 있습니다.
+        """
+        lease_dir = os.path.join(self._entry_dir(key), self.LEASE_DIR)
+        os.makedirs(lease_dir, exist_ok=True)
+        lease_path = os.path.join(lease_dir, f"{os.getpid()}-{uuid.uuid4().hex}")
+        with open(lease_path, 'wb'):
+            pass
+        return SplitCacheLease(lease_path)
+    
+    def in_use(self, key):
+        """살아 있는 사용 표시가 있는지 (종료된 프로세스의 표시는 삭제)"""
+        lease_dir = os.path.join(self._entry_dir(key), self.LEASE_DIR)
+        try:
+            names = os.listdir(lease_dir)
+        except OSError:
+            return False
+        
+        used = False
+        for name in names:
+            lease_path = os.path.join(lease_dir, name)
+            if _lease_owner_alive(lease_path, self.STALE_SECONDS):
+                used = True
+            else:
+                try:
+                    os.unlink(lease_path)
+                except OSError:
+                    pass
+        return used
+    
+    def _remove_entry(self, key):
+        """항목 삭제 - 이 프로세스가 읽기용으로 열어 둔 저장소도 닫고 목록에서 뺌"""
+        entry_dir = self._entry_dir(key)
+        attached = _get_process_module()._ATTACHED_PAGE_STORES
+        for path in [path for path in list(attached) if os.path.dirname(path) == entry_dir]:
+            store = attached.pop(path, None)
+            if store is not None:
+                store.close()
+        shutil.rmtree(entry_dir, ignore_errors=True)
+    
+    def discard(self, page_store):
+        """공개하지 않을 기록용 저장소 삭제"""
+        page_store.close()
+        try:
+            os.unlink(page_store.path)
+        except OSError:
+            pass
+    
+    def build(self, key, split_fn):
+        """split_fn(page_store)로 분할한 결과를 캐시에 저장하고 그 페이지 목록 반환
+        
+        split_fn이 빈 결과를 돌려주면 아무것도 저장하지 않고 그 결과를 그대로 반환합니다.
+        """
+        page_store = self.open_writer(key)
+        try:
+            split_pages = split_fn(page_store)
+        except Exception:
+            self.discard(page_store)
+            raise
+        
+        if not split_pages:
+            self.discard(page_store)
+            return split_pages
+        
+        self.publish(key, page_store, split_pages)
+        page_store.close()
+        return split_pages
+    
+    def _entry_size(self, entry_dir):
+        total = 0
+        for name in os.listdir(entry_dir):
+            if name == self.LEASE_DIR:
+                continue
+            try:
+                total += os.path.getsize(os.path.join(entry_dir, name))
+            except OSError:
+                pass
+        return total
+    
+    def entries(self):
+        """공개된 항목의 (마지막 사용 시각, 크기, 키) 목록 (오래된 순)"""
+        result = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(name)
+            meta_path = os.path.join(entry_dir, self.META_FILE)
+            try:
+                if os.path.isfile(meta_path):
+                    result.append((os.path.getmtime(meta_path), self._entry_size(entry_dir), name))
+                elif time.time() - os.path.getmtime(entry_dir) > self.STALE_SECONDS and not self.in_use(name):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+            except OSError:
+                continue
+        result.sort()
+        return result
+    
+    def evict(self, keep=None):
+        """전체 크기가 한도를 넘으면 오래 사용하지 않은 항목부터 삭제 (사용 중인 항목 제외)"""
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                if key == keep or self.in_use(key):
+                    continue
+                self._remove_entry(key)
+                total -= size
+    
+    def clear(self):
+        """사용 중이지 않은 항목 모두 삭제"""
+        with self._lock:
+            for _, _, key in self.entries():
+                if not self.in_use(key):
+                    self._remove_entry(key)
+    
+    def stats(self):
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
+
+
+class SplitCacheLease:
+    """SplitResultCache.lease()가 반환하는 사용 표시 (release()하거나 가비지 수집되면 해제)"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._finalizer = weakref.finalize(self, SplitCacheLease._remove, path)
+    
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    
+    @property
+    def active(self):
+        return self._finalizer.alive
+    
+    def release(self):
+        self._finalizer()
+
+
+def _lease_owner_alive(lease_path, stale_seconds):
+    """사용 표시 파일("<pid>-...")을 만든 프로세스가 살아 있는지"""
+    try:
+        pid = int(os.path.basename(lease_path).split('-', 1)[0])
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name != 'posix':
+        # Windows의 os.kill은 신호 확인 없이 프로세스를 종료하므로 오래된 표시만 정리
+        try:
+            return time.time() - os.path.getmtime(lease_path) < stale_seconds
+        except OSError:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # 다른 사용자의 프로세스 (권한 없음) - 살아 있음
+    return True
+
+
+# 세션 간 공유 분할 결과 캐시 (처음 사용할 때 생성)
+_SPLIT_RESULT_CACHE = None
+
+
+def get_cache_dir(name):
+    """작업 디렉터리 경로 (PDF_EDITOR_CACHE_DIR, 기본은 임시 디렉터리의 pdf_editor_cache 아래)"""
+    cache_dir = os.environ.get(
+        'PDF_EDITOR_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pdf_editor_cache')
+    )
+    return os.path.join(cache_dir, name)
+
+
+def get_split_result_cache():
+    """프로세스 공유 분할 결과 캐시
+    
+    위치는 PDF_EDITOR_CACHE_DIR, 크기 한도는 PDF_EDITOR_SPLIT_CACHE_MB(기본 2048)로 조정합니다.
+    """
+    shared = _get_process_module()
+    if shared._SPLIT_RESULT_CACHE is None:
+        shared._SPLIT_RESULT_CACHE = SplitResultCache(
+            get_cache_dir('split'), _cache_budget_bytes('PDF_EDITOR_SPLIT_CACHE_MB', 2048)
+        )
+    return shared._SPLIT_RESULT_CACHE
+
+
+class TransformedPageCache:
+    """변환된 책 페이지(1페이지 PDF)를 키별 파일로 보관하는 디스크 캐시 (세션/프로세스 간 공유)
+    
+    키는 BookPublishingEditor.transformed_page_key()로 만들며, 같은 책을 개별 조정만 바꿔
+    다시 생성할 때 설정이 바뀌지 않은 페이지를 변환 없이 복사하는 데 씁니다.
+    파일은 임시 이름으로 쓴 뒤 바꾸므로 여러 프로세스가 함께 써도 안전하고,
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은(수정 시각 기준) 파일부터 삭제합니다.
+    """
+    
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._bytes = sum(size for _, size, _ in self._scan())
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+    
+    def _scan(self):
+        """캐시 파일의 (마지막 사용 시각, 크기, 경로) 목록"""
+        result = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, path))
+        return result
+    
+    def contains(self, key):
+        """키의 파일이 있는지 (읽지 않고 확인, 적중 횟수에는 넣지 않음)"""
+        return os.path.exists(self._path(key))
+    
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                page_bytes = f.read()
+            os.utime(path)  # 최근 사용 시각 갱신 (정리 순서 기준)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return page_bytes
+    
+    def put(self, key, page_bytes):
+        if len(page_bytes) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(page_bytes)
+            # 같은 키의 파일을 덮어쓰면 그 크기만큼은 늘지 않음
+            try:
+                replaced_bytes = os.path.getsize(path)
+            except OSError:
+                replaced_bytes = 0
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        
+        with self._lock:
+            self._bytes += len(page_bytes) - replaced_bytes
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+    
+    def evict(self):
+        """전체 크기가 한도의 90% 이하가 될 때까지 오래된 파일 삭제 (다른 프로세스가 쓴 파일 포함)"""
+        with self._lock:
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                except OSError:
+                    continue
+            self._bytes = total
+    
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_TRANSFORMED_PAGE_CACHE = None
+
+
+def get_transformed_page_cache():
+    """프로세스 공유 변환 결과 캐시
+    
+    위치는 PDF_EDITOR_CACHE_DIR 아래 pages, 크기 한도는 PDF_EDITOR_PAGE_CACHE_MB(기본 1024)로 조정합니다.
+    """
+    shared = _get_process_module()
+    if shared._TRANSFORMED_PAGE_CACHE is None:
+        shared._TRANSFORMED_PAGE_CACHE = TransformedPageCache(
+            get_cache_dir('pages'), _cache_budget_bytes('PDF_EDITOR_PAGE_CACHE_MB', 1024)
+        )
+    return shared._TRANSFORMED_PAGE_CACHE
+
+
+class GenerationCancelled(Exception):
+    """사용자가 취소한 생성 작업을 중단하기 위한 예외 (진행률 콜백에서 발생)"""
+
+
+class GenerationJob:
+    """최종 PDF 생성 작업 하나의 상태 (작업 스레드가 갱신하고 UI가 다시 실행될 때마다 읽음)"""
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    
+    def __init__(self, job_id, owner, label, output_path):
+        self.job_id = job_id
+        self.owner = owner
+        self.label = label
+        self.output_path = output_path
+        self.status = self.QUEUED
+        self.progress = (0, 0, "대기 중")
+        self.page_count = None
+        self.size_bytes = None
+        self.encoding_rows = []
+        self.checkpoint_reused = 0
+        self.page_cache_hits = 0
+        self.duplicate_pages = 0
+        self.peak_memory = 0  # 메모리 예산에서 확보한 최대량 (추정치)
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.pages = None  # 실행 중에만 분할 페이지 참조 유지
+        self.lease = None  # 분할 페이지가 든 분할 결과 캐시 항목의 사용 표시 (pages와 함께 해제)
+        self.future = None
+    
+    @property
+    def is_active(self):
+        return self.status in (self.QUEUED, self.RUNNING)
+    
+    def release_pages(self):
+        """분할 페이지 참조와 캐시 항목 사용 표시 해제 (작업이 끝나거나 취소될 때)"""
+        self.pages = None
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+    
+    def update_progress(self, current, total, description):
+        """create_book_pdf 진행률 콜백 (취소 요청 시 생성 중단)"""
+        if self.cancel_requested:
+            raise GenerationCancelled()
+        self.progress = (current, total, description)
+
+
+class GenerationJobQueue:
+    """최종 PDF 생성을 백그라운드 스레드에서 차례로 실행하는 작업 대기열 (세션 간 공유)
+    
+    submit()은 작업 ID를 바로 반환하고, 결과 PDF는 output_dir의 파일로 남으므로
+    화면이 다시 실행되어도 jobs(owner)로 상태를 조회하고 다운로드할 수 있습니다.
+    동시에 실행하는 작업 수는 max_jobs이며 나머지는 대기열에서 순서를 기다립니다.
+    소유자마다 끝난 작업은 최근 keep_finished개만 남기고 출력 파일과 함께 정리합니다.
+    """
+    
+    def __init__(self, output_dir, max_jobs=1, keep_finished=5):
+        self.output_dir = output_dir
+        self.keep_finished = keep_finished
+        os.makedirs(output_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="book-generation")
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, owner, label, editor, split_pages, margins, scaling_settings, show_margin_guides=False, output_settings=None, lease=None):
+        """생성 작업을 대기열에 추가하고 작업 ID 반환
+        
+        작업은 editor와 같은 책 크기/계측기를 쓰는 별도 편집기로 실행되므로
+        화면의 편집기(미리보기 등)와 상태를 공유하지 않습니다.
+        lease(SplitCacheLease)를 주면 작업이 끝날 때 해제하여, 세션이 다른 파일로 넘어가도
+        작업이 쓰는 분할 결과 캐시 항목은 끝날 때까지 정리되지 않습니다.
+        """
+        job_id = uuid.uuid4().hex
+        job = GenerationJob(job_id, owner, label, os.path.join(self.output_dir, f"{job_id}.pdf"))
+        job.pages = split_pages
+        job.lease = lease
+        job_editor = BookPublishingEditor(editor.book_width_mm, editor.book_height_mm, editor.tracer)
+        job_settings = dict(output_settings or {}, output_path=job.output_path)
+        
+        with self._lock:
+            self._jobs[job_id] = job
+            job.future = self._executor.submit(
+                self._run, job, job_editor, margins, scaling_settings, show_margin_guides, job_settings
+            )
+        return job_id
+    
+    def _run(self, job, editor, margins, scaling_settings, show_margin_guides, output_settings):
+        if job.cancel_requested:
+            job.status = GenerationJob.CANCELLED
+            job.release_pages()
+            return
+        
+        job.status = GenerationJob.RUNNING
+        job.started = time.time()
+        try:
+            pdf_path = editor.create_book_pdf(
+                job.pages, margins, scaling_settings, show_margin_guides, job.update_progress, output_settings
+            )
+            if pdf_path is None:
+                raise ValueError("PDF 생성에 실패했습니다.")
+            if os.path.getsize(pdf_path) < 1000:  # 최소 크기 검사
+                raise ValueError("생성된 PDF가 너무 작습니다. 다시 시도해주세요.")
+            
+            # 최종 검증 (xref와 페이지 트리만 읽으므로 전체를 다시 파싱하지 않음)
+            with get_fitz_lock():
+                with fitz.open(pdf_path) as final_doc:
+                    page_count = final_doc.page_count
+            if page_count == 0:
+                raise ValueError("생성된 PDF에 페이지가 없습니다.")
+            
+            job.page_count = page_count
+            job.size_bytes = os.path.getsize(pdf_path)
+            job.encoding_rows = editor.encoding_summary()
+            job.checkpoint_reused = editor.checkpoint_reused
+            job.page_cache_hits = editor.page_cache_hits
+            job.duplicate_pages = editor.duplicate_pages
+            job.status = GenerationJob.DONE
+        except GenerationCancelled:
+            job.status = GenerationJob.CANCELLED
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.status = GenerationJob.FAILED
+        finally:
+            job.peak_memory = editor.memory_usage.peak
+            job.release_pages()
+            job.finished = time.time()
+            if job.status != GenerationJob.DONE:
+                self._remove_output(job)
+            self._prune(job.owner)
+    
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def jobs(self, owner):
+        """소유자의 작업 목록 (제출 순)"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.owner == owner]
+    
+    def uses_pages(self, split_pages):
+        """실행 중이거나 대기 중인 작업이 이 분할 페이지(또는 그 순서 보기)를 쓰는지 여부"""
+        with self._lock:
+            for job in self._jobs.values():
+                pages = job.pages
+                if pages is split_pages or getattr(pages, 'base', None) is split_pages:
+                    return True
+        return False
+    
+    def cancel(self, job_id):
+        """작업 취소 요청 (대기 중이면 바로 취소, 실행 중이면 다음 페이지에서 중단)"""
+        job = self.get(job_id)
+        if job is None or not job.is_active:
+            return
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            job.status = GenerationJob.CANCELLED
+            job.release_pages()
+            job.finished = time.time()
+    
+    def remove(self, job_id):
+        """끝난 작업과 출력 파일 삭제"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_active:
+                return
+            del self._jobs[job_id]
+        self._remove_output(job)
+    
+    def _remove_output(self, job):
+        try:
+            os.unlink(job.output_path)
+        except OSError:
+            pass
+    
+    def _prune(self, owner):
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.owner == owner and not job.is_active]
+            expired = finished[:max(0, len(finished) - self.keep_finished)]
+            for job in expired:
+                del self._jobs[job.job_id]
+        for job in expired:
+            self._remove_output(job)
+
+
+_GENERATION_JOB_QUEUE = None
+
+
+def get_generation_job_queue():
+    """프로세스 공유 생성 작업 대기열
+    
+    동시에 실행할 작업 수는 PDF_EDITOR_GENERATION_JOBS(기본 1)로 조정하며,
+    결과 PDF는 PDF_EDITOR_CACHE_DIR 아래 jobs 디렉터리에 저장합니다.
+    """
+    shared = _get_process_module()
+    if shared._GENERATION_JOB_QUEUE is None:
+        try:
+            max_jobs = int(os.environ.get('PDF_EDITOR_GENERATION_JOBS', 1))
+        except ValueError:
+            max_jobs = 1
+        shared._GENERATION_JOB_QUEUE = GenerationJobQueue(get_cache_dir('jobs'), max(1, max_jobs))
+    return shared._GENERATION_JOB_QUEUE
+
+
+class PageCheckpoint:
+    """생성 중 완성된 책 페이지를 하나씩 저장해 두었다가 다시 실행할 때 재사용하는 작업 디렉터리
+    
+    실행 키(책 크기, 페이지 수, 여백/축소/출력 설정의 해시)마다 하위 디렉터리 하나를 쓰고,
+    페이지는 "<페이지 번호>-<내용 해시>.pdf" 1페이지 PDF로 저장합니다. 임시 파일에 쓴 뒤
+    이름을 바꾸므로 중간에 프로세스가 종료되어도 반쯤 쓰인 페이지가 남지 않습니다.
+    STALE_SECONDS 동안 사용하지 않은 다른 실행의 디렉터리는 생성 시 정리합니다.
+    """
+    
+    STALE_SECONDS = 7 * 24 * 60 * 60
+    
+    def __init__(self, checkpoint_dir, run_key):
+        self.checkpoint_dir = checkpoint_dir
+        self.run_dir = os.path.join(checkpoint_dir, run_key)
+        self._used_paths = set()  # 이번 실행에서 읽거나 저장한 페이지 파일
+        os.makedirs(self.run_dir, exist_ok=True)
+        os.utime(self.run_dir)
+        self._prune_stale()
+    
+    @staticmethod
+    def make_run_key(book_size, total_pages, margins, scaling_settings, show_margin_guides, engine, encoding):
+        """출력 결과에 영향을 주는 설정 전체로 실행 키 생성 (페이지 내용은 페이지별 해시로 구분)"""
+        params = json.dumps(
+            [1, list(book_size), total_pages, margins, scaling_settings, bool(show_margin_guides), engine, encoding],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(params.encode()).hexdigest()
+    
+    def _page_path(self, page_number, page_key):
+        return os.path.join(self.run_dir, f"{page_number:06d}-{page_key[:32]}.pdf")
+    
+    def contains(self, page_number, page_key):
+        """저장된 페이지가 있는지 (읽지 않고 확인)"""
+        return os.path.exists(self._page_path(page_number, page_key))
+    
+    def load(self, page_number, page_key):
+        """저장된 페이지의 1페이지 PDF 바이트 (없으면 None)"""
+        page_path = self._page_path(page_number, page_key)
+        try:
+            with open(page_path, 'rb') as f:
+                page_bytes = f.read()
+        except OSError:
+            return None
+        self._used_paths.add(page_path)
+        return page_bytes
+    
+    def save(self, page_number, page_key, page_bytes):
+        """완성된 페이지 저장 (실패해도 생성은 계속 진행)"""
+        page_path = self._page_path(page_number, page_key)
+        tmp_path = f"{page_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(page_bytes)
+            os.replace(tmp_path, page_path)
+            self._used_paths.add(page_path)
+        except OSError:
             try:
-                if temp_pdf_path and os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
-            except:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    
+    def saved_count(self):
+        try:
+            return sum(1 for name in os.listdir(self.run_dir) if name.endswith('.pdf'))
+        except OSError:
+            return 0
+    
+    def clear(self):
+        """이번 실행이 쓴 페이지 삭제 (생성이 끝난 뒤 호출)
+        
+        같은 설정으로 다른 책을 동시에 생성하는 경우 실행 디렉터리를 함께 쓰므로
+        이 실행의 페이지만 지우고, 디렉터리는 비었을 때만 삭제합니다.
+        """
+        for page_path in self._used_paths:
+            try:
+                os.unlink(page_path)
+            except OSError:
                 pass
+        self._used_paths.clear()
+        try:
+            os.rmdir(self.run_dir)
+        except OSError:
+            pass
+    
+    def _prune_stale(self):
+        for name in os.listdir(self.checkpoint_dir):
+            path = os.path.join(self.checkpoint_dir, name)
+            try:
+                if path != self.run_dir and time.time() - os.path.getmtime(path) > self.STALE_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+
+class StreamingPdfWriter:
+    """완성된 페이지를 바로 디스크 파일에 기록하는 PDF 작성기
+    
+    PdfWriter와 달리 모든 페이지를 메모리에 모아두지 않고 add_page()를 호출할 때마다
+    해당 페이지의 객체를 파일에 이어서 씁니다. 메모리에는 객체 오프셋과 페이지 번호만
+    남으므로 책 크기와 상관없이 사용량이 일정합니다. 페이지마다 구조를 검사하고,
+    close() 시 페이지 트리와 xref를 기록한 뒤 결과 파일을 확인합니다.
+    
+    add_page()에 share_key를 주면 그 페이지가 참조하는 객체(콘텐츠, 이미지, Form XObject 등)를
+    기억해 두고, 같은 키로 add_shared_page()를 호출할 때 새 페이지 객체만 기록하여
+    이미 기록한 객체를 다시 참조합니다 (반복되는 빈 페이지/중복 페이지).
+    """
+    
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._file = open(output_path, 'wb')
+        self._offsets = {}
+        self._page_ids = []
+        self._shared_pages = {}  # share_key -> 기록된 페이지 사전 (Parent 제외, 이 파일 기준 참조)
+        self._next_id = self.PAGES_ID + 1
+        self._file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    
+    @property
+    def page_count(self):
+        return len(self._page_ids)
+    
+    def add_page(self, page, share_key=None):
+        """페이지와 페이지가 참조하는 객체를 파일에 기록"""
+        # 쓰기 중 검증: 책 페이지로 사용할 수 있는 구조인지 확인
+        if page.get('/Type') != '/Page' or '/MediaBox' not in page:
+            raise ValueError("MediaBox가 없는 페이지는 기록할 수 없습니다.")
+        
+        page_id = self._allocate_id()
+        id_map = {}
+        if page.indirect_reference is not None:
+            # 주석 등에서 페이지 자신을 가리키는 참조는 새 페이지 객체로 연결
+            id_map[page.indirect_reference.idnum] = page_id
+        
+        pending = []
+        page_copy = DictionaryObject()
+        for key, value in page.items():
+            if key == '/Parent':
+                continue
+            page_copy[NameObject(key)] = self._copy_object(value, id_map, pending)
+        if share_key is not None:
+            self._shared_pages[share_key] = DictionaryObject(page_copy)
+        page_copy[NameObject('/Parent')] = IndirectObject(self.PAGES_ID, 0, None)
+        
+        self._write_object(page_id, page_copy)
+        
+        # 페이지가 참조하는 간접 객체를 차례대로 기록
+        while pending:
+            new_id, source = pending.pop()
+            if isinstance(source, IndirectObject):
+                source = source.get_object()
+            obj = self._copy_object(source, id_map, pending, indirect_root=True)
+            self._write_object(new_id, obj)
+        
+        self._page_ids.append(page_id)
+    
+    def add_shared_page(self, share_key):
+        """share_key로 기록한 페이지와 같은 객체를 참조하는 페이지 추가 (그런 페이지가 없으면 False)"""
+        shared = self._shared_pages.get(share_key)
+        if shared is None:
+            return False
+        
+        page_id = self._allocate_id()
+        page_copy = DictionaryObject(shared)
+        page_copy[NameObject('/Parent')] = IndirectObject(self.PAGES_ID, 0, None)
+        self._write_object(page_id, page_copy)
+        self._page_ids.append(page_id)
+        return True
+    
+    def close(self):
+        """페이지 트리, 카탈로그, xref를 기록하고 결과 파일을 검증"""
+        if self._file is None:
+            return self.page_count > 0
+        
+        try:
+            kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+            self._write_raw_object(
+                self.PAGES_ID,
+                f"<< /Type /Pages /Kids [ {kids} ] /Count {len(self._page_ids)} >>".encode()
+            )
+            self._write_raw_object(
+                self.CATALOG_ID,
+                f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>".encode()
+            )
             
-            return canvas
+            xref_offset = self._file.tell()
+            size = self._next_id
+            self._file.write(f"xref\n0 {size}\n".encode())
+            self._file.write(b"0000000000 65535 f \n")
+            for object_id in range(1, size):
+                if object_id in self._offsets:
+                    self._file.write(f"{self._offsets[object_id]:010d} 00000 n \n".encode())
+                else:
+                    # 기록 도중 실패한 페이지의 번호는 빈 항목으로 남김
+                    self._file.write(b"0000000000 65535 f \n")
+            self._file.write(f"trailer\n<< /Size {size} /Root {self.CATALOG_ID} 0 R >>\n".encode())
+            self._file.write(f"startxref\n{xref_offset}\n%%EOF\n".encode())
+        finally:
+            self._file.close()
+            self._file = None
+        
+        # 최종 검증: 페이지가 있고 너무 작지 않은 파일인지 확인
+        return self.page_count > 0 and os.path.getsize(self.output_path) >= 100
+    
+    def abort(self):
+        """작성을 중단하고 불완전한 파일 삭제"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.unlink(self.output_path)
+        except OSError:
+            pass
+    
+    def _allocate_id(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+    
+    def _copy_object(self, obj, id_map, pending, indirect_root=False):
+        """간접 참조 번호를 이 파일 기준으로 바꾼 객체 사본 생성"""
+        if isinstance(obj, IndirectObject):
+            new_id = id_map.get(obj.idnum)
+            if new_id is None:
+                new_id = self._allocate_id()
+                id_map[obj.idnum] = new_id
+                pending.append((new_id, obj))
+            return IndirectObject(new_id, 0, None)
+        
+        if isinstance(obj, StreamObject):
+            if not indirect_root:
+                # 스트림은 간접 객체여야 하므로 병합으로 생긴 직접 스트림은 따로 기록
+                new_id = self._allocate_id()
+                pending.append((new_id, obj))
+                return IndirectObject(new_id, 0, None)
             
-        except Exception as e:
-            # 상세한 에러 정보를 포함한 이미지 생성
-            error_img = Image.new('RGB', (200, 280), color=(250, 250, 250))
-            draw = ImageDraw.Draw(error_img)
-            draw.rectangle([0, 0, 199, 279], outline=(255, 0, 0), width=2)
+            if '/Filter' in obj:
+                new_stream = EncodedStreamObject()
+                new_stream._data = obj._data
+            else:
+                # 압축되지 않은 스트림(병합된 콘텐츠 등)은 Flate로 압축
+                decoded = DecodedStreamObject()
+                decoded.set_data(obj._data)
+                new_stream = decoded.flate_encode()
+            for key, value in obj.items():
+                if key == '/Length':
+                    continue
+                new_stream[NameObject(key)] = self._copy_object(value, id_map, pending)
+            return new_stream
+        
+        if isinstance(obj, DictionaryObject):
+            new_dict = DictionaryObject()
+            for key, value in obj.items():
+                new_dict[NameObject(key)] = self._copy_object(value, id_map, pending)
+            return new_dict
+        
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy_object(item, id_map, pending) for item in obj)
+        
+        return obj
+    
+    def _write_object(self, object_id, obj):
+        self._offsets[object_id] = self._file.tell()
+        self._file.write(f"{object_id} 0 obj\n".encode())
+        obj.write_to_stream(self._file, None)
+        self._file.write(b"\nendobj\n")
+    
+    def _write_raw_object(self, object_id, data):
+        self._offsets[object_id] = self._file.tell()
+        self._file.write(f"{object_id} 0 obj\n".encode())
+        self._file.write(data)
+        self._file.write(b"\nendobj\n")
+
+
+def _get_process_module():
+    """프로세스에서 한 번만 로드되는 이 모듈을 반환
+    
+    `streamlit run`으로 실행하면 이 파일이 __main__으로 로드되어 워커 함수를
+    pickle할 수 없고, 재실행마다 전역 변수가 새로 만들어집니다. 그래서 파일 이름으로
+    다시 import한 모듈을 워커 함수와 프로세스 공유 캐시의 위치로 사용합니다.
+    """
+    if __name__ != "__main__":
+        return sys.modules[__name__]
+    
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    if module_dir not in sys.path:
+        sys.path.insert(0, module_dir)
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    return importlib.import_module(module_name)
+
+
+def _worker_pool(max_workers):
+    """페이지 분할/렌더링 워커용 프로세스 풀을 생성
+    
+    fork로 만든 자식은 미리보기 스레드가 잡고 있던 MuPDF 잠금을 잠긴 상태 그대로
+    물려받아 멈출 수 있으므로, 항상 spawn으로 새 인터프리터를 띄웁니다.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _split_page_range_worker(task):
+    """워커 프로세스: 자체 문서 핸들로 [start, end) 범위의 원본 페이지를 분할"""
+    pdf_path, start, end, split_mode, trace_enabled = task
+    
+    editor = BookPublishingEditor(tracer=PipelineTracer() if trace_enabled else None)
+    doc = fitz.open(pdf_path)
+    try:
+        results = [(page_num, editor._split_source_page(doc, page_num, split_mode)) for page_num in range(start, end)]
+    finally:
+        doc.close()
+    return results, editor.tracer.events()
+
+
+def _pixmap_to_image(pix):
+    """PyMuPDF 픽스맵 샘플 버퍼를 PNG 인코딩 없이 PIL 이미지로 감싸기
+    
+    L/RGBA 등은 버퍼를 복사하지 않고 그대로 참조하므로, 반환된 이미지를 쓰는 동안
+    픽스맵이 살아 있도록 이미지에 참조를 붙여 둡니다.
+    """
+    if pix.alpha:
+        mode = "RGBA" if pix.n == 4 else "LA"
+    else:
+        mode = "RGB" if pix.n == 3 else "L"
+    
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    image._source_pixmap = pix
+    return image
+
+
+def _pdf_page_fingerprint(pdf_data):
+    """1페이지 PDF의 내용 지문과 빈 페이지 여부 -> (fingerprint, blank)
+    
+    객체 번호(N 0 R)를 참조 대상의 해시로 바꿔 가며 페이지 객체 트리를 해시하므로
+    같은 내용이면 파일 안의 객체 배치와 상관없이 같은 값이 됩니다. 페이지 트리로
+    거슬러 올라가는 /Parent, /P 참조는 제외합니다.
+    """
+    with get_fitz_lock():
+        doc = fitz.open(stream=pdf_data, filetype="pdf")
+        try:
+            page = doc[0]
             
-            try:
-                font = ImageFont.load_default()
-                y = 10
-                
-                # 페이지 정보
-                draw.text((10, y), f"Page {page_number}", fill=(0, 0, 0), font=font)
-                y += 20
-                
-                # 설정 정보
-                draw.text((10, y), f"Scale: {scale_factor:.2f}", fill=(100, 100, 100), font=font)
-                y += 15
-                draw.text((10, y), f"Offset: {offset_x:.1f},{offset_y:.1f}", fill=(100, 100, 100), font=font)
-                y += 20
-                
-                # 에러 정보
-                draw.text((10, y), "Preview Error:", fill=(255, 0, 0), font=font)
-                y += 20
-                
-                # 에러 메시지 (짧게)
-                error_msg = str(e)[:50]
-                draw.text((10, y), error_msg, fill=(255, 0, 0), font=font)
-                
-            except:
-                # 폰트 로딩 실패 시 기본 텍스트만
-                draw.text((10, 10), f"Error on page {page_number}", fill=(255, 0, 0))
+            # 36 DPI 회색조로 렌더링해 거의 흰색(254 이상)만 있으면 빈 페이지
+            pix = page.get_pixmap(matrix=fitz.Matrix(0.5, 0.5), colorspace=fitz.csGRAY, alpha=False)
+            if min(pix.samples) >= 254:
+                return 'blank', True
             
-            return error_img
+            memo = {}
+            
+            def object_hash(xref):
+                if xref in memo:
+                    return memo[xref]
+                memo[xref] = b'cycle'
+                source = _PARENT_REF_PATTERN.sub('', doc.xref_object(xref, compressed=True))
+                digest = hashlib.sha256()
+                digest.update(_INDIRECT_REF_PATTERN.sub(lambda m: object_hash(int(m.group(1))).hex(), source).encode())
+                if doc.xref_is_stream(xref):
+                    digest.update(doc.xref_stream_raw(xref))
+                memo[xref] = digest.digest()
+                return memo[xref]
+            
+            return object_hash(page.xref).hex(), False
+        finally:
+            doc.close()
+
+
+_INDIRECT_REF_PATTERN = re.compile(r'(\d+) 0 R')
+_PARENT_REF_PATTERN = re.compile(r'/(?:Parent|P) \d+ 0 R')
+
+
+def _page_to_pdf_bytes(page):
+    """PyPDF2 페이지 객체를 1페이지 PDF 바이트로 직렬화"""
+    writer = PdfWriter()
+    writer.add_page(page)
+    buffer = io.BytesIO()
+    try:
+        writer.write(buffer)
+        return buffer.getvalue()
+    finally:
+        buffer.close()
+
+
+def _render_book_page_worker(task):
+    """워커 프로세스: 분할 페이지 하나를 변환하여 (1페이지 PDF 바이트, 기록된 구간, 인코딩 기록)으로 반환"""
+    (book_width_mm, book_height_mm, page_info, page_number,
+     margins, scaling_settings, show_margin_guides, engine, encoding, trace_enabled) = task
+    
+    editor = BookPublishingEditor(book_width_mm, book_height_mm, PipelineTracer() if trace_enabled else None)
+    book_page = editor.render_book_page(
+        page_info, page_number, margins, scaling_settings, show_margin_guides, engine, encoding
+    )
+    if book_page is None:
+        return None, editor.tracer.events(), editor.encoding_report
+    
+    try:
+        with editor.tracer.span("output.serialize", category="output", page=page_number):
+            page_bytes = _page_to_pdf_bytes(book_page)
+    except Exception:
+        page_bytes = None
+    return page_bytes, editor.tracer.events(), editor.encoding_report
+
+
+def apply_content_fit(editor, split_pages, margins):
+    """내용 영역 분석 결과를 화면의 축소/이동 입력값과 개별 조정에 적용 (버튼 on_click 콜백)"""
+    analysis = editor.analyze_content_bounds(split_pages)
+    scaling_settings, report = editor.propose_scaling_settings(analysis, margins)
+    
+    for parity in ('odd', 'even'):
+        st.session_state[f"scale_{parity}"] = scaling_settings[parity]['scale']
+        st.session_state[f"offset_x_{parity}"] = scaling_settings[parity]['offset_x']
+        st.session_state[f"offset_y_{parity}"] = scaling_settings[parity]['offset_y']
+    
+    # 개별 조정 입력 위젯의 이전 값을 지워 새 조정값으로 다시 만들어지게 함
+    for key in list(st.session_state.keys()):
+        if isinstance(key, str) and key.startswith(('individual_scale_', 'individual_offset_x_', 'individual_offset_y_')):
+            del st.session_state[key]
+    st.session_state.individual_settings = scaling_settings['individual_adjustments']
+    st.session_state.content_fit_report = report
 
 
 def main():
@@ -756,31 +3865,48 @@ def main():
             st.info("👆 PDF 파일을 업로드해주세요.")
             return
         
-        # 임시 파일 저장 (안전한 방식)
-        try:
-            # 업로드된 파일을 바이트로 읽기
-            file_bytes = uploaded_file.getvalue()
-            
-            # 임시 파일 생성
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(file_bytes)
-                tmp_file_path = tmp_file.name
-            
-            # 파일 정보 표시
-            with st.expander("📄 파일 정보", expanded=False):
-                st.write(f"**파일명:** {uploaded_file.name}")
-                st.write(f"**파일 크기:** {len(file_bytes):,} bytes")
-        
-        except Exception as e:
-            st.error(f"파일 처리 중 오류 발생: {e}")
-            return
-        
         # PDF 편집기 초기화
         editor = BookPublishingEditor()
         
-        # PDF 분석
-        with st.spinner("PDF 분석 중..."):
-            analysis = editor.analyze_pdf(tmp_file_path)
+        # 업로드된 파일을 바이트로 읽기 (업로드 버퍼를 공유하므로 재실행마다 읽어도 복사되지 않음)
+        file_bytes = uploaded_file.getvalue()
+        
+        # 내용 해시와 분석 결과는 업로드마다 한 번만 계산 (생성 작업 진행 표시로 1초마다
+        # 다시 실행되어도 임시 파일 기록, 해시 계산, PDF 분석을 반복하지 않음)
+        upload_key = getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{len(file_bytes)}"
+        upload_info = st.session_state.get('upload_info')
+        if upload_info is None or upload_info['key'] != upload_key:
+            tmp_file_path = None
+            try:
+                # 임시 파일 저장 (안전한 방식) - 분석에만 쓰고 바로 삭제
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+                    tmp_file.write(file_bytes)
+                    tmp_file_path = tmp_file.name
+                
+                # PDF 분석
+                with st.spinner("PDF 분석 중..."):
+                    analysis = editor.analyze_pdf(tmp_file_path)
+            except Exception as e:
+                st.error(f"파일 처리 중 오류 발생: {e}")
+                return
+            finally:
+                if tmp_file_path and os.path.exists(tmp_file_path):
+                    os.unlink(tmp_file_path)
+            
+            upload_info = {
+                'key': upload_key,
+                'file_hash': hashlib.sha256(file_bytes).hexdigest(),
+                'analysis': analysis
+            }
+            st.session_state.upload_info = upload_info
+        
+        file_hash = upload_info['file_hash']
+        analysis = upload_info['analysis']
+        
+        # 파일 정보 표시
+        with st.expander("📄 파일 정보", expanded=False):
+            st.write(f"**파일명:** {uploaded_file.name}")
+            st.write(f"**파일 크기:** {len(file_bytes):,} bytes")
         
         if 'error' in analysis:
             st.error(f"PDF 분석 실패: {analysis['error']}")
@@ -806,10 +3932,51 @@ def main():
             help="체크 해제시 좌측 첫 페이지를 제외하고 우측부터 1페이지로 시작"
         )
         
+        page_order_labels = {
+            "1234": "1234 (일반)",
+            "2341": "2341 (용지 절단용)",
+            "saddle": "중철 (가운데 철)",
+            "perfect": "무선 (접장 쌓기)"
+        }
         page_order = st.selectbox(
             "페이지 순서",
-            options=["1234", "2341"],
-            help="1234: 일반 순서 / 2341: 제본용 순서 (용지 절단 후 연속 페이지)"
+            options=list(page_order_labels),
+            format_func=page_order_labels.get,
+            help="1234: 일반 순서 / 2341: 제본용 순서 (용지 절단 후 연속 페이지) / "
+                 "중철: 전체를 한 묶음으로 겹쳐 접는 인쇄 순서 / 무선: 접장을 차례로 쌓는 인쇄 순서 "
+                 "(모자란 페이지는 뒤표지 앞에 빈 페이지로 채움)"
+        )
+        
+        signature_pages = 4
+        if page_order in ("saddle", "perfect"):
+            signature_pages = st.selectbox(
+                "접장 페이지 수",
+                options=list(IMPOSITION_SIGNATURE_SIZES),
+                index=0 if page_order == "saddle" else 2,
+                format_func=lambda n: f"{n}페이지 (종이 {n // 4}장)",
+                help="중철: 페이지 수를 이 단위로 채움 / 무선: 접장 하나에 들어가는 페이지 수"
+            )
+        
+        split_mode_label = st.selectbox(
+            "분할 방식",
+            options=["벡터 (무손실)", "이미지 (144 DPI)"],
+            help="벡터: 원본 페이지를 잘라서 그대로 사용 (빠르고 선명) / 이미지: 원본이 손상된 경우 사용"
+        )
+        split_mode = "vector" if split_mode_label.startswith("벡터") else "raster"
+        
+        split_workers = st.number_input(
+            "분할 병렬 작업 수",
+            min_value=1,
+            max_value=max(1, os.cpu_count() or 1),
+            value=1,
+            step=1,
+            help="대용량 PDF 분할 시 동시에 처리할 프로세스 수 (1이면 순차 처리)"
+        )
+        
+        lazy_split = st.checkbox(
+            "빠른 미리보기 (지연 분할)",
+            value=True,
+            help="미리보기할 페이지부터 먼저 분할하고 나머지는 백그라운드에서 분할 (분할 병렬 작업 수는 사용하지 않음)"
         )
         
         st.divider()
@@ -833,21 +4000,45 @@ def main():
         # 스케일링 및 위치 조정
         with st.expander("🔧 크기 및 위치 조정", expanded=False):
             
-            # 기본 홀수/짝수 페이지 설정
+            # 내용 영역 자동 맞춤 (분할 후 사용 가능, 기본 설정과 개별 조정을 제안값으로 바꿈)
+            if st.session_state.get('split_pages'):
+                st.button(
+                    "📐 내용 영역에 맞춰 자동 설정",
+                    on_click=apply_content_fit,
+                    args=(
+                        editor, st.session_state.split_pages,
+                        {'top': margin_top, 'bottom': margin_bottom, 'outer': margin_outer, 'inner': margin_inner}
+                    ),
+                    help="페이지마다 실제 내용(잉크)이 있는 영역을 분석해 여백 안에 들어가도록 축소/이동 값과 개별 조정을 제안"
+                )
+                fit_report = st.session_state.get('content_fit_report')
+                if fit_report:
+                    st.caption(
+                        f"자동 설정: {fit_report['pages']}페이지 분석, 개별 조정 {fit_report['adjusted']}페이지, "
+                        f"빈 페이지 {fit_report['blank']}개"
+                    )
+                    if fit_report['overflow']:
+                        st.warning(f"조정 범위를 넘어 여백을 벗어나는 페이지: {', '.join(map(str, fit_report['overflow'][:20]))}")
+            
+            # 기본 홀수/짝수 페이지 설정 (자동 설정이 값을 바꿀 수 있도록 초기값은 세션 상태에 둠)
             st.write("**📋 기본 설정**")
+            for key, default in (('scale_odd', 1.00), ('offset_x_odd', 0.0), ('offset_y_odd', 0.0),
+                                 ('scale_even', 1.00), ('offset_x_even', 0.0), ('offset_y_even', 0.0)):
+                if key not in st.session_state:
+                    st.session_state[key] = default
             
             col1, col2 = st.columns(2)
             with col1:
                 st.write("🔴 홀수 페이지 (1,3,5...)")
-                scale_odd = st.number_input("축소 비율", min_value=0.10, max_value=2.00, value=1.00, step=0.01, format="%.2f", key="scale_odd")
-                offset_x_odd = st.number_input("좌우 이동", min_value=-50.0, max_value=50.0, value=0.0, step=0.1, format="%.1f", key="offset_x_odd")
-                offset_y_odd = st.number_input("상하 이동", min_value=-50.0, max_value=50.0, value=0.0, step=0.1, format="%.1f", key="offset_y_odd")
+                scale_odd = st.number_input("축소 비율", min_value=0.10, max_value=2.00, step=0.01, format="%.2f", key="scale_odd")
+                offset_x_odd = st.number_input("좌우 이동", min_value=-50.0, max_value=50.0, step=0.1, format="%.1f", key="offset_x_odd")
+                offset_y_odd = st.number_input("상하 이동", min_value=-50.0, max_value=50.0, step=0.1, format="%.1f", key="offset_y_odd")
             
             with col2:
                 st.write("🔵 짝수 페이지 (2,4,6...)")
-                scale_even = st.number_input("축소 비율", min_value=0.10, max_value=2.00, value=1.00, step=0.01, format="%.2f", key="scale_even")
-                offset_x_even = st.number_input("좌우 이동", min_value=-50.0, max_value=50.0, value=0.0, step=0.1, format="%.1f", key="offset_x_even")
-                offset_y_even = st.number_input("상하 이동", min_value=-50.0, max_value=50.0, value=0.0, step=0.1, format="%.1f", key="offset_y_even")
+                scale_even = st.number_input("축소 비율", min_value=0.10, max_value=2.00, step=0.01, format="%.2f", key="scale_even")
+                offset_x_even = st.number_input("좌우 이동", min_value=-50.0, max_value=50.0, step=0.1, format="%.1f", key="offset_x_even")
+                offset_y_even = st.number_input("상하 이동", min_value=-50.0, max_value=50.0, step=0.1, format="%.1f", key="offset_y_even")
             
             st.divider()
             
@@ -979,50 +4170,172 @@ def main():
             value=False,
             help="PDF에 여백 경계선 포함 (홀수: 빨간색, 짝수: 파란색)"
         )
+        
+        output_engine_label = st.selectbox(
+            "출력 방식",
+            options=["벡터 배치 (무손실)", "이미지"],
+            help="벡터 배치: 원본을 변환 행렬로 배치하여 빠르고 해상도 제한 없음 / 이미지: 아래 해상도의 이미지로 변환"
+        )
+        output_engine = "vector" if output_engine_label.startswith("벡터") else "raster"
+        
+        output_dpi = st.selectbox(
+            "이미지 해상도 (DPI)",
+            options=[150, 300, 600, 1200],
+            index=1,
+            help="이미지 방식으로 만든 페이지(벡터 배치 실패 페이지 포함)의 해상도"
+        )
+        raster_strips = st.checkbox(
+            "📏 띠 단위 렌더링",
+            value=False,
+            help="이미지 페이지를 페이지 전체 캔버스 없이 가로 띠로 나누어 렌더링/압축 "
+                 "(고해상도나 큰 판형에서도 페이지당 메모리 일정, 흰 여백과 빈 띠는 이미지로 저장하지 않음)"
+        )
+        
+        codec_labels = {
+            "flate": "무손실 (Flate)",
+            "jpeg": "JPEG (손실 압축)",
+            "bilevel": "흑백 (CCITT G4)",
+            "auto": "자동 (페이지별 선택)"
+        }
+        output_codec = st.selectbox(
+            "이미지 압축 방식",
+            options=["flate", "jpeg", "bilevel", "auto"],
+            format_func=lambda codec: codec_labels[codec],
+            help="이미지 방식으로 만든 페이지(벡터 배치 실패 페이지 포함)의 압축 방식 / 자동: 글자만 있는 페이지는 흑백, 사진이 많은 페이지는 JPEG, 나머지는 무손실"
+        )
+        jpeg_quality = 85
+        flate_level = 6
+        if output_codec in ("jpeg", "auto"):
+            jpeg_quality = st.slider("JPEG 품질", min_value=30, max_value=95, value=85, step=5)
+        if output_codec in ("flate", "auto", "bilevel"):
+            flate_level = st.slider("Flate 압축 수준", min_value=1, max_value=9, value=6, step=1,
+                                    help="높을수록 파일이 작아지지만 생성 시간이 늘어남")
+        
+        output_workers = st.number_input(
+            "병렬 작업 수",
+            min_value=1,
+            max_value=max(1, os.cpu_count() or 1),
+            value=min(4, max(1, os.cpu_count() or 1)),
+            step=1,
+            help="최종 PDF 생성 시 동시에 변환할 프로세스 수 (1이면 순차 처리)"
+        )
+        
+        use_checkpoint = st.checkbox(
+            "💾 중단된 생성 이어서 하기",
+            value=True,
+            help="완성된 페이지를 작업 디렉터리에 저장하여, 생성이 중단되어도 같은 파일과 설정으로 다시 생성하면 남은 페이지만 처리"
+        )
+        use_page_cache = st.checkbox(
+            "♻️ 변환 결과 재사용",
+            value=True,
+            help="다시 생성할 때 원본 내용과 적용 설정(여백, 축소/이동, 가이드 선)이 그대로인 페이지는 이전 변환 결과를 복사"
+        )
+        use_dedupe = st.checkbox(
+            "🔁 빈 페이지/중복 페이지 한 번만 변환",
+            value=True,
+            help="빈 페이지와 내용이 같은 페이지(장 표지, 구분 페이지 등)를 찾아 한 번만 변환하고 출력 파일에서 같은 데이터를 참조"
+        )
+        
+        enable_tracing = st.checkbox(
+            "⏱️ 단계별 처리 시간 기록",
+            value=False,
+            help="분할/미리보기/변환/출력 단계별 시간을 기록하고 Chrome trace(Perfetto) 파일로 내려받기"
+        )
+        if enable_tracing:
+            # 재실행 사이에도 같은 계측기에 계속 기록
+            if 'pipeline_tracer' not in st.session_state:
+                st.session_state.pipeline_tracer = PipelineTracer()
+            editor.tracer = st.session_state.pipeline_tracer
     
     # 메인 영역
+    poll_generation_jobs = False  # 진행 중인 생성 작업이 있으면 끝에서 화면을 다시 실행해 상태 갱신
     try:
         # PDF 분할 최적화: 이미 분할된 경우 재사용
-        current_settings_key = f"{use_first_page}_{page_order}_{file_bytes[:100] if file_bytes else ''}"
+        current_settings_key = f"{use_first_page}_{split_mode}_{lazy_split}_{file_hash}"
         
         if ('split_pages_cache' not in st.session_state or 
             'settings_key' not in st.session_state or 
             st.session_state.settings_key != current_settings_key):
             
-            # 새로운 분할이 필요한 경우에만 실행
-            split_progress_container = st.empty()
-            split_status_container = st.empty()
+            # 같은 내용의 파일을 같은 설정으로 분할한 적이 있으면 (다른 세션 포함) 디스크 캐시 사용
+            split_cache = get_split_result_cache()
+            split_cache_key = split_cache.make_key(file_hash, use_first_page, split_mode)
+            # 이 세션이 쓰는 동안 다른 세션의 정리에서 항목이 지워지지 않도록 읽기 전에 표시
+            split_cache_lease = split_cache.lease(split_cache_key)
+            split_pages = split_cache.load(split_cache_key)
+            
+            # 이전 파일의 백그라운드 분할 중단 (생성 작업이 쓰는 중이면 끝까지 분할하도록 둠)
+            if 'lazy_split_pages' in st.session_state:
+                if not get_generation_job_queue().uses_pages(st.session_state.lazy_split_pages):
+                    st.session_state.lazy_split_pages.close()
+                del st.session_state.lazy_split_pages
             
-            def split_progress_callback(current, total, description):
-                progress_value = current / total if total > 0 else 0
-                split_progress_container.progress(progress_value)
-                split_status_container.info(f"📄 {description}")
+            # 업로드 임시 파일은 실행이 끝나면 삭제되므로, 이미지 방식 출력이 원본에서
+            # 바로 렌더링할 수 있도록 캐시 항목에 보관한 원본 사본으로 분할
+            if split_pages is None:
+                source_path = split_cache.store_source(split_cache_key, file_bytes)
             
-            with st.spinner("PDF 분할 중..."):
-                split_pages = editor.split_landscape_pages(tmp_file_path, use_first_page, split_progress_callback)
+            if split_pages is None and lazy_split:
+                # 분할 배치만 먼저 계산하고, 페이지는 미리보기 범위부터 필요할 때 분할
+                page_store = split_cache.open_writer(split_cache_key)
+                split_pages = LazySplitPages(
+                    editor, source_path, use_first_page, split_mode, page_store,
+                    on_complete=lambda pages, key=split_cache_key, store=page_store: split_cache.publish(key, store, pages)
+                )
+                st.session_state.lazy_split_pages = split_pages
             
-            # 프로그래스바 제거
-            split_progress_container.empty()
-            split_status_container.empty()
+            elif split_pages is None:
+                # 새로운 분할이 필요한 경우에만 실행
+                split_progress_container = st.empty()
+                split_status_container = st.empty()
+                
+                def split_progress_callback(current, total, description):
+                    progress_value = current / total if total > 0 else 0
+                    split_progress_container.progress(progress_value)
+                    split_status_container.info(f"📄 {description}")
+                
+                # 분할 페이지 데이터는 세션 메모리 대신 캐시 디렉터리의 디스크 저장소에 보관
+                with st.spinner("PDF 분할 중..."):
+                    split_pages = split_cache.build(
+                        split_cache_key,
+                        lambda page_store: editor.split_landscape_pages(
+                            source_path, use_first_page, split_progress_callback, split_mode,
+                            workers=int(split_workers), page_store=page_store
+                        )
+                    )
+                
+                # 프로그래스바 제거
+                split_progress_container.empty()
+                split_status_container.empty()
             
             if not split_pages:
+                split_cache_lease.release()
                 st.error("PDF 분할에 실패했습니다. 파일을 확인해주세요.")
                 return
             
-            # 페이지 순서 적용
-            ordered_pages = editor.apply_page_order(split_pages, page_order)
-            
-            # 세션 상태에 캐시 저장
-            st.session_state.split_pages_cache = ordered_pages
+            # 세션 상태에 캐시 저장 (순서는 매번 보기로 적용하므로 분할 결과만 보관)
+            st.session_state.split_pages_cache = split_pages
             st.session_state.settings_key = current_settings_key
-            st.session_state.split_pages = ordered_pages  # 개별 조정용
-            
-            st.success(f"✅ 총 {len(ordered_pages)}개 페이지 준비 완료")
+            st.session_state.split_cache_key = split_cache_key
+            if 'split_cache_lease' in st.session_state:
+                st.session_state.split_cache_lease.release()
+            st.session_state.split_cache_lease = split_cache_lease
+            split_message = st.success
+            split_message_text = "✅ 총 {}개 페이지 준비 완료"
         
         else:
             # 캐시된 데이터 사용
-            ordered_pages = st.session_state.split_pages_cache
-            st.info(f"📋 캐시된 {len(ordered_pages)}개 페이지 사용 중 (빠른 로딩)")
+            split_pages = st.session_state.split_pages_cache
+            split_message = st.info
+            split_message_text = "📋 캐시된 {}개 페이지 사용 중 (빠른 로딩)"
+        
+        # 페이지 순서 적용 (분할 페이지를 복사하지 않는 순서 보기 - 순서만 바꾸면 다시 분할하지 않음)
+        ordered_pages = editor.apply_page_order(split_pages, page_order, signature_pages)
+        st.session_state.split_pages = ordered_pages  # 개별 조정용
+        
+        split_message(split_message_text.format(len(ordered_pages)))
+        if ordered_pages.blank_count:
+            st.caption(f"📄 접장을 채우기 위해 뒤표지 앞에 빈 페이지 {ordered_pages.blank_count}개 추가")
         
         # 미리보기
         st.subheader("👀 미리보기")
@@ -1037,14 +4350,23 @@ def main():
                 st.session_state.preview_start = 0
         with col3:
             if st.button("🔄 미리보기 캐시 초기화"):
-                if 'preview_cache' in st.session_state:
-                    st.session_state.preview_cache = {}
-                    st.success("미리보기 캐시가 초기화되었습니다.")
+                get_preview_base_cache().clear()
+                get_preview_image_cache().clear()
+                st.success("미리보기 캐시가 초기화되었습니다.")
         
         if len(ordered_pages) > 0:
             # 현재 페이지 범위 계산
             start_idx = st.session_state.preview_start
             end_idx = min(start_idx + 4, len(ordered_pages))
+            
+            if isinstance(ordered_pages.base, LazySplitPages):
+                # 지연 분할: 보이는 페이지와 다음 페이지를 먼저, 나머지는 백그라운드에서 분할
+                ordered_pages.request(range(start_idx, end_idx + 4))
+                ordered_pages.base.start_background_fill()
+                if not ordered_pages.base.is_complete:
+                    done_sources, total_sources = ordered_pages.base.progress()
+                    st.caption(f"⏳ 백그라운드 분할 중: 원본 {done_sources}/{total_sources}페이지")
+            
             preview_pages = ordered_pages[start_idx:end_idx]
             
             # 페이지네이션 버튼
@@ -1065,15 +4387,91 @@ def main():
             # 미리보기 이미지 생성 및 표시
             cols = st.columns(min(4, len(preview_pages)))
             
-            # 미리보기 캐시 초기화
-            if 'preview_cache' not in st.session_state:
-                st.session_state.preview_cache = {}
+            # 프로세스 공유 미리보기 캐시 (바이트 예산 + LRU 정리)
+            preview_cache = get_preview_image_cache()
+            
+            # 여백 설정
+            margins = {
+                'top': margin_top,
+                'bottom': margin_bottom,
+                'outer': margin_outer,
+                'inner': margin_inner
+            }
+            
+            # 스케일링 설정 (기본값 + 개별 조정)
+            preview_scaling_settings = {
+                'odd': {'scale': scale_odd, 'offset_x': offset_x_odd, 'offset_y': offset_y_odd},
+                'even': {'scale': scale_even, 'offset_x': offset_x_even, 'offset_y': offset_y_even},
+                'individual_adjustments': st.session_state.get('individual_settings', {})
+            }
+            
+            def render_preview(index):
+                """미리보기 하나 생성 (캐시 우선) -> (이미지, 캐시 사용 여부)"""
+                page_num = index + 1
+                page_data = ordered_pages[index]
+                current_scale, current_offset_x, current_offset_y = editor.resolve_page_scaling(
+                    page_num, preview_scaling_settings
+                )
+                
+                # 페이지별 캐시 키 (페이지 내용 + 실제 적용 설정)
+                page_cache_key = editor.preview_cache_key(
+                    page_data, margins, current_scale,
+                    current_offset_x, current_offset_y,
+                    page_num, show_page_numbers
+                )
+                preview_img = preview_cache.get(page_cache_key)
+                if preview_img is not None:
+                    return preview_img, True
+                
+                preview_img = editor.create_preview_image(
+                    page_data, margins, current_scale,
+                    current_offset_x, current_offset_y,
+                    page_num, show_page_numbers
+                )
+                preview_cache.put(page_cache_key, preview_img)
+                return preview_img, False
             
-            # 현재 설정에 대한 캐시 키 생성
-            margins_key = f"{margin_top}_{margin_bottom}_{margin_outer}_{margin_inner}"
-            settings_key = f"{scale_odd}_{offset_x_odd}_{offset_y_odd}_{scale_even}_{offset_x_even}_{offset_y_even}"
-            individual_key = str(st.session_state.get('individual_settings', {}))
-            cache_key_base = f"{margins_key}_{settings_key}_{individual_key}_{show_page_numbers}"
+            # 백그라운드 스케줄러: 보이는 페이지를 병렬로, 이전/다음 페이지는 낮은 우선순위로 미리 생성
+            scheduler = get_preview_scheduler()
+            if 'preview_owner' not in st.session_state:
+                st.session_state.preview_owner = uuid.uuid4().hex
+            preview_owner = st.session_state.preview_owner
+            warmup_owner = f"{preview_owner}:warmup"
+            
+            # 설정이 바뀌면 이전 설정으로 예약된 작업은 취소
+            preview_token = repr((
+                current_settings_key, page_order, signature_pages, margins, preview_scaling_settings,
+                show_page_numbers, editor.book_width_mm, editor.book_height_mm
+            ))
+            scheduler.set_generation(preview_owner, preview_token)
+            scheduler.set_generation(warmup_owner, current_settings_key)
+            
+            visible_futures = [
+                scheduler.submit(
+                    preview_owner, preview_token, PreviewScheduler.PRIORITY_VISIBLE,
+                    index, lambda index=index: render_preview(index)
+                )
+                for index in range(start_idx, end_idx)
+            ]
+            neighbor_indices = list(range(end_idx, min(end_idx + 4, len(ordered_pages))))
+            neighbor_indices += list(range(max(0, start_idx - 4), start_idx))
+            for index in neighbor_indices:
+                scheduler.submit(
+                    preview_owner, preview_token, PreviewScheduler.PRIORITY_NEIGHBOR,
+                    index, lambda index=index: render_preview(index)
+                )
+            
+            # 업로드 후 한 번: 원본 썸네일 캐시에 들어가는 만큼 책 전체 썸네일을 미리 준비
+            if st.session_state.get('preview_warmup_key') != current_settings_key:
+                st.session_state.preview_warmup_key = current_settings_key
+                base_cache = get_preview_base_cache()
+                thumbnail_bytes = editor.PREVIEW_SIZE[0] * editor.PREVIEW_SIZE[1] * 3
+                warmup_count = min(len(ordered_pages), base_cache.max_bytes // thumbnail_bytes)
+                for index in range(warmup_count):
+                    scheduler.submit(
+                        warmup_owner, current_settings_key, PreviewScheduler.PRIORITY_WARMUP,
+                        index, lambda index=index: editor.get_preview_base(ordered_pages[index])
+                    )
             
             for i, page_data in enumerate(preview_pages):
                 with cols[i]:
@@ -1081,71 +4479,39 @@ def main():
                     st.write(f"**페이지 {page_num}**")
                     st.write(f"*{page_data['description']}*")
                     
-                    # 현재 페이지의 설정 가져오기 (기본값 + 개별 조정)
-                    if 'individual_settings' in st.session_state and page_num in st.session_state.individual_settings:
-                        # 개별 조정이 있는 경우: 기본값 + 조정값
-                        if page_num % 2 == 1:  # 홀수 페이지 기본값
-                            base_scale = scale_odd
-                            base_offset_x = offset_x_odd
-                            base_offset_y = offset_y_odd
-                        else:  # 짝수 페이지 기본값
-                            base_scale = scale_even
-                            base_offset_x = offset_x_even
-                            base_offset_y = offset_y_even
-                        
-                        # 조정값 적용
-                        adjust = st.session_state.individual_settings[page_num]
-                        current_scale = base_scale + adjust['scale_adjust']
-                        current_offset_x = base_offset_x + adjust['offset_x_adjust']
-                        current_offset_y = base_offset_y + adjust['offset_y_adjust']
+                    if page_num in preview_scaling_settings['individual_adjustments']:
                         st.write("⭐ 개별 조정 페이지")
                     elif page_num % 2 == 1:  # 홀수 페이지
-                        current_scale = scale_odd
-                        current_offset_x = offset_x_odd
-                        current_offset_y = offset_y_odd
                         st.write("🔴 홀수 페이지")
                     else:  # 짝수 페이지
-                        current_scale = scale_even
-                        current_offset_x = offset_x_even
-                        current_offset_y = offset_y_even
                         st.write("🔵 짝수 페이지")
                     
-                    # 여백 설정
-                    margins = {
-                        'top': margin_top,
-                        'bottom': margin_bottom,
-                        'outer': margin_outer,
-                        'inner': margin_inner
-                    }
-                    
-                    # 페이지별 캐시 키
-                    page_cache_key = f"{cache_key_base}_{page_num}_{current_scale}_{current_offset_x}_{current_offset_y}"
-                    
-                    # 캐시된 미리보기가 있는지 확인
-                    if page_cache_key in st.session_state.preview_cache:
-                        # 캐시된 이미지 사용
-                        preview_img = st.session_state.preview_cache[page_cache_key]
+                    try:
+                        with st.spinner(f"페이지 {page_num} 미리보기 생성..."):
+                            preview_img, from_cache = visible_futures[i].result()
                         st.image(preview_img, use_column_width=True)
-                        st.caption("📋 캐시된 미리보기")
-                    else:
-                        # 새로운 미리보기 생성
-                        try:
-                            with st.spinner(f"페이지 {page_num} 미리보기 생성..."):
-                                preview_img = editor.create_preview_image(
-                                    page_data, margins, current_scale, 
-                                    current_offset_x, current_offset_y, 
-                                    page_num, show_page_numbers
-                                )
-                                # 캐시에 저장
-                                st.session_state.preview_cache[page_cache_key] = preview_img
-                                st.image(preview_img, use_column_width=True)
-                        except Exception as e:
-                            st.error(f"미리보기 생성 실패: {e}")
-                            st.write("미리보기를 생성할 수 없습니다.")
+                        if from_cache:
+                            st.caption("📋 캐시된 미리보기")
+                    except Exception as e:
+                        st.error(f"미리보기 생성 실패: {e}")
+                        st.write("미리보기를 생성할 수 없습니다.")
+        
+            cache_stats = preview_cache.stats()
+            st.caption(
+                f"미리보기 캐시: {cache_stats['bytes'] / (1024 * 1024):.1f} / "
+                f"{cache_stats['max_bytes'] / (1024 * 1024):.0f} MB · "
+                f"적중 {cache_stats['hits']} · 누락 {cache_stats['misses']} · 제거 {cache_stats['evictions']}"
+            )
         
         # PDF 생성 버튼
         st.divider()
         
+        # 생성은 백그라운드 작업으로 실행하고, 화면은 다시 실행될 때마다 상태만 조회
+        generation_queue = get_generation_job_queue()
+        if 'job_owner' not in st.session_state:
+            st.session_state.job_owner = uuid.uuid4().hex
+        job_owner = st.session_state.job_owner
+        
         if st.button("📖 최종 PDF 생성", type="primary"):
             # 설정 정리
             margins = {
@@ -1166,72 +4532,147 @@ def main():
                     'offset_x': offset_x_even,
                     'offset_y': offset_y_even
                 },
-                'individual_adjustments': st.session_state.get('individual_settings', {})
+                'individual_adjustments': copy.deepcopy(st.session_state.get('individual_settings', {}))
             }
             
-            # 프로그래스바와 상태 표시
-            progress_container = st.empty()
-            status_container = st.empty()
-            
-            def update_progress(current, total, description):
-                progress_value = current / total if total > 0 else 0
-                progress_container.progress(progress_value)
-                status_container.info(f"📊 {description}")
+            output_settings = {
+                'engine': output_engine,
+                'workers': int(output_workers),
+                'codec': output_codec,
+                'jpeg_quality': int(jpeg_quality),
+                'flate_level': int(flate_level),
+                'dpi': int(output_dpi),
+                'strips': raster_strips
+            }
+            if use_checkpoint:
+                output_settings['checkpoint_dir'] = get_cache_dir('checkpoints')
+            if use_page_cache:
+                output_settings['page_cache'] = True
+            if use_dedupe:
+                output_settings['dedupe'] = True
             
-            try:
-                # PDF 생성
-                pdf_data = editor.create_book_pdf(
-                    ordered_pages, margins, scaling_settings, 
-                    show_margin_guides, update_progress
-                )
-                
-                # 프로그래스바 제거
-                progress_container.empty()
-                status_container.empty()
-                
-                # PDF 생성 결과 검증
-                if pdf_data is None:
-                    st.error("❌ PDF 생성에 실패했습니다.")
-                    return
+            generation_queue.submit(
+                job_owner, uploaded_file.name, editor, ordered_pages, margins, scaling_settings,
+                show_margin_guides, output_settings,
+                lease=get_split_result_cache().lease(st.session_state.split_cache_key)
+            )
+        
+        job_status_labels = {
+            GenerationJob.QUEUED: "⏳ 대기 중",
+            GenerationJob.RUNNING: "⚙️ 생성 중",
+            GenerationJob.DONE: "✅ 완료",
+            GenerationJob.FAILED: "❌ 실패",
+            GenerationJob.CANCELLED: "⏹️ 취소됨"
+        }
+        
+        for job in reversed(generation_queue.jobs(job_owner)):
+            with st.container():
+                st.write(f"**{job_status_labels[job.status]}** · {job.label} · 작업 {job.job_id[:8]}")
                 
-                if len(pdf_data) < 1000:  # 최소 크기 검사
-                    st.error("❌ 생성된 PDF가 너무 작습니다. 다시 시도해주세요.")
-                    return
+                if job.is_active:
+                    current, total, description = job.progress
+                    st.progress(current / total if total > 0 else 0)
+                    st.info(f"📊 {description}")
+                    if st.button("⏹️ 취소", key=f"cancel_job_{job.job_id}"):
+                        generation_queue.cancel(job.job_id)
+                        st.rerun()
+                    poll_generation_jobs = True
                 
-                # 최종 검증
-                try:
-                    final_reader = PdfReader(io.BytesIO(pdf_data))
-                    page_count = len(final_reader.pages)
-                    if page_count == 0:
-                        st.error("❌ 생성된 PDF에 페이지가 없습니다.")
-                        return
+                elif job.status == GenerationJob.DONE:
+                    st.success(
+                        f"✅ PDF 생성 완료! ({job.page_count}페이지, {job.size_bytes / (1024 * 1024):.1f} MB, "
+                        f"{job.finished - job.started:.1f}초)"
+                    )
+                    if job.checkpoint_reused:
+                        st.caption(f"💾 이전에 중단된 생성에서 {job.checkpoint_reused}페이지를 재사용했습니다.")
+                    if job.page_cache_hits:
+                        st.caption(f"♻️ 설정이 바뀌지 않은 {job.page_cache_hits}페이지는 이전 변환 결과를 복사했습니다.")
+                    if job.duplicate_pages:
+                        st.caption(f"🔁 빈 페이지/중복 페이지 {job.duplicate_pages}개는 앞의 같은 페이지를 다시 참조했습니다.")
+                    budget_stats = get_memory_budget().stats()
+                    st.caption(
+                        f"🧠 최대 메모리 사용량(추정): {job.peak_memory / (1024 * 1024):.0f} MB "
+                        f"/ 예산 {budget_stats['max_bytes'] / (1024 * 1024):.0f} MB"
+                    )
+                    
+                    # 다운로드 버튼 (생성된 파일에서 바로 제공)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        try:
+                            with open(job.output_path, 'rb') as output_file:
+                                st.download_button(
+                                    label="📥 완성된 PDF 다운로드",
+                                    data=output_file,
+                                    file_name=f"book_{job.label}",
+                                    mime="application/pdf",
+                                    key=f"download_job_{job.job_id}"
+                                )
+                        except OSError:
+                            st.error("❌ 생성된 PDF 파일을 찾을 수 없습니다. 다시 생성해주세요.")
                     
-                    st.success(f"✅ PDF 생성 완료! ({page_count}페이지)")
+                    with col2:
+                        st.info("💡 출판업체에 전달 준비 완료!")
                     
-                except Exception as validation_error:
-                    st.error(f"❌ PDF 검증 실패: {validation_error}")
-                    st.error("생성된 PDF가 손상되었을 수 있습니다.")
-                    return
-                
-                # 다운로드 버튼
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.download_button(
-                        label="📥 완성된 PDF 다운로드",
-                        data=pdf_data,
-                        file_name=f"book_{uploaded_file.name}",
-                        mime="application/pdf"
-                    )
+                    # 이미지 페이지 인코딩 결과 (코덱별 크기와 시간)
+                    if job.encoding_rows:
+                        with st.expander("🗜️ 이미지 압축 결과", expanded=False):
+                            st.dataframe(
+                                [
+                                    {
+                                        '코덱': codec_labels.get(row['codec'], row['codec']),
+                                        '페이지': row['pages'],
+                                        '크기 (MB)': round(row['bytes'] / (1024 * 1024), 2),
+                                        '압축률': f"{row['bytes'] / row['raw_bytes']:.1%}" if row['raw_bytes'] else "-",
+                                        '인코딩 시간 (초)': round(row['seconds'], 2)
+                                    }
+                                    for row in job.encoding_rows
+                                ],
+                                use_container_width=True
+                            )
                 
-                with col2:
-                    st.info("💡 출판업체에 전달 준비 완료!")
+                elif job.status == GenerationJob.FAILED:
+                    st.error(f"❌ PDF 생성 중 오류: {job.error}")
                 
-            except Exception as e:
-                progress_container.empty()
-                status_container.empty()
-                st.error(f"❌ PDF 생성 중 오류: {e}")
-                import traceback
-                st.error(f"상세 오류: {traceback.format_exc()}")
+                if not job.is_active and st.button("🗑️ 목록에서 삭제", key=f"remove_job_{job.job_id}"):
+                    generation_queue.remove(job.job_id)
+                    st.rerun()
+        
+        # 단계별 처리 시간 요약
+        if enable_tracing:
+            tracer = st.session_state.pipeline_tracer
+            with st.expander("⏱️ 단계별 처리 시간", expanded=False):
+                summary_rows = tracer.summary()
+                if summary_rows:
+                    st.dataframe(
+                        [
+                            {
+                                '구간': row['name'],
+                                '횟수': row['count'],
+                                '합계 (ms)': row['total_ms'],
+                                '평균 (ms)': row['mean_ms'],
+                                '최대 (ms)': row['max_ms']
+                            }
+                            for row in summary_rows
+                        ],
+                        use_container_width=True
+                    )
+                    if tracer.dropped:
+                        st.caption(f"기록 한도를 넘어 {tracer.dropped}개 구간은 저장하지 않았습니다.")
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.download_button(
+                            label="📥 trace 파일 다운로드 (Perfetto / chrome://tracing)",
+                            data=tracer.export_chrome_trace(),
+                            file_name="pdf_editor_trace.json",
+                            mime="application/json"
+                        )
+                    with col2:
+                        if st.button("🗑️ 기록 초기화"):
+                            tracer.clear()
+                            st.rerun()
+                else:
+                    st.info("아직 기록된 구간이 없습니다.")
 
     except Exception as e:
         st.error(f"처리 중 오류 발생: {e}")
@@ -1239,18 +4680,13 @@ def main():
         st.error(f"상세 오류: {traceback.format_exc()}")
         return
     
-    finally:
-        # 임시 파일 정리
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
-    
     # 사용법 안내
     with st.expander("📖 사용법 안내"):
         st.markdown("""
         ### 🎯 프로세스
         1. **A4 가로 PDF 업로드**: 좌우에 책 내용이 배치된 PDF
         2. **첫 페이지 설정**: 왼쪽부터 시작할지, 오른쪽부터 시작할지 선택
-        3. **페이지 순서**: 일반 순서(1234) 또는 제본용 순서(2341) 선택
+        3. **페이지 순서**: 일반 순서(1234), 제본용 순서(2341), 중철 또는 무선 인쇄 순서 선택
         4. **여백 설정**: 책 제본을 위한 여백 조정
         5. **크기/위치 조정**: 홀수/짝수 페이지별 독립 조정
         6. **PDF 생성**: 출판업체 전달용 최종 PDF 생성
@@ -1262,7 +4698,17 @@ def main():
         ### 🔄 페이지 순서
         - **1234**: 1,2,3,4,5,6,7,8... (일반 순서)
         - **2341**: 2,3,4,1,6,7,8,5... (용지 절단 후 연속 페이지용)
+        - **중철 (가운데 철)**: 전체를 한 묶음으로 겹쳐 접는 인쇄 순서 (8페이지 책: 8,1,2,7,6,3,4,5)
+        - **무선 (접장 쌓기)**: 접장 단위로 접어 차례로 쌓는 인쇄 순서
+        - **접장 페이지 수**: 중철/무선에서 고르는 접장 하나의 페이지 수 (종이 한 장에 4페이지, 4·8·16·32페이지).
+          중철은 전체 페이지 수를 이 단위로 채우고, 무선은 이 단위로 접장을 나눕니다
+        - **빈 페이지**: 페이지 수가 단위에 모자라면 마지막 페이지를 뒤표지로 보고 맨 끝에 둔 채,
+          모자란 만큼의 빈 페이지를 뒤표지 앞에 넣습니다
         """)
+    
+    if poll_generation_jobs:
+        time.sleep(1.0)
+        st.rerun()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
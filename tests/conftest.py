@@ -0,0 +1,75 @@
+import os
+import sys
+
+import fitz
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# 화면 기준으로 좌측 위, 우측 아래에 놓이는 검은 사각형 (A4 가로 좌표)
+LEFT_BOX = fitz.Rect(50, 50, 300, 200)
+RIGHT_BOX = fitz.Rect(500, 350, 800, 550)
+
+NO_SCALING = {
+    'odd': {'scale': 1.0, 'offset_x': 0, 'offset_y': 0},
+    'even': {'scale': 1.0, 'offset_x': 0, 'offset_y': 0},
+    'individual_adjustments': {},
+}
+MARGINS = {'top': 15, 'bottom': 15, 'outer': 15, 'inner': 15}
+
+
+def ink_bounds(page, zoom=1.0):
+    """페이지를 렌더링해 어두운 픽셀의 경계 (x0, y0, x1, y1), 없으면 None"""
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+    samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    ys, xs = np.nonzero(samples < 128)
+    if len(xs) == 0:
+        return None
+    return (int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max()))
+
+
+def pdf_ink_bounds(pdf_data):
+    """1페이지 PDF 바이트의 크기와 잉크 경계"""
+    doc = fitz.open("pdf", pdf_data)
+    try:
+        page = doc[0]
+        return (page.rect.width, page.rect.height), ink_bounds(page)
+    finally:
+        doc.close()
+
+
+@pytest.fixture
+def make_landscape_pdf(tmp_path):
+    """A4 가로로 보이는 PDF 생성 (rotation이 있으면 세로 페이지에 /Rotate로 가로가 되게 함)
+
+    pages는 페이지마다 (좌측 상자, 우측 상자) 표시 여부 또는 쪽 번호를 찍을 정수입니다.
+    """
+    def make(name="landscape.pdf", pages=1, rotation=0):
+        doc = fitz.open()
+        for index in range(pages):
+            width, height = (842, 595) if rotation % 180 == 0 else (595, 842)
+            page = doc.new_page(width=width, height=height)
+            page.set_rotation(rotation)
+            for box in (LEFT_BOX, RIGHT_BOX):
+                page.draw_rect(box * page.derotation_matrix, color=(0, 0, 0), fill=(0, 0, 0))
+            # 페이지마다 다른 내용이 되도록 쪽 번호 위치의 작은 사각형
+            marker = fitz.Rect(20 + index * 12, 570, 28 + index * 12, 578)
+            page.draw_rect(marker * page.derotation_matrix, color=(0, 0, 0), fill=(0, 0, 0))
+        path = tmp_path / name
+        doc.save(str(path))
+        doc.close()
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def isolated_caches(tmp_path, monkeypatch):
+    """프로세스 공유 캐시와 메모리 예산을 테스트 전용 디렉터리로 격리"""
+    import split_pdf_editor as editor_module
+    
+    monkeypatch.setenv('PDF_EDITOR_CACHE_DIR', str(tmp_path / "cache"))
+    for name in ('_SPLIT_RESULT_CACHE', '_TRANSFORMED_PAGE_CACHE', '_MEMORY_BUDGET'):
+        monkeypatch.setattr(editor_module, name, None)
+    return tmp_path / "cache"
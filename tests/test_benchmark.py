@@ -0,0 +1,19 @@
+import fitz
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize("kind", ["scan", "mixed"])
+def test_sample_scan_pages_differ(tmp_path, kind):
+    path = benchmark.generate_sample_pdf(str(tmp_path / f"{kind}.pdf"), kind, 4)
+    
+    doc = fitz.open(path)
+    try:
+        images = [doc.extract_image(page.get_images()[0][0])['image'] for page in doc if page.get_images()]
+    finally:
+        doc.close()
+    
+    # 스캔 페이지마다 이미지 내용이 달라야 캐시 적중 없이 측정됨
+    assert len(images) == (4 if kind == "scan" else 2)
+    assert len(set(images)) == len(images)
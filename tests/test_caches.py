@@ -0,0 +1,157 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import split_pdf_editor as editor_module
+
+
+def build_entry(cache, name, size):
+    key = cache.make_key(name, True, "vector")
+    
+    def split(page_store):
+        return [{'original_page': 1, 'side': 'single', 'page_ref': page_store.put(b"%" * size)}]
+    
+    return key, cache.build(key, split)
+
+
+@pytest.fixture
+def split_cache(isolated_caches):
+    return editor_module.SplitResultCache(str(isolated_caches / "split"), 10_000)
+
+
+def test_split_cache_evicts_oldest_unused_entry(split_cache):
+    first, _ = build_entry(split_cache, "a", 6_000)
+    second, _ = build_entry(split_cache, "b", 6_000)
+    
+    assert split_cache.load(first) is None
+    assert split_cache.load(second) is not None
+    assert split_cache.stats()['bytes'] <= split_cache.max_bytes
+
+
+def test_split_cache_keeps_leased_entry_until_released(split_cache):
+    first, pages = build_entry(split_cache, "a", 6_000)
+    lease = split_cache.lease(first)
+    pages[0]['page_ref'].read()  # 읽기용 저장소를 열어 둠
+    
+    second, _ = build_entry(split_cache, "b", 6_000)
+    
+    assert split_cache.load(first) is not None
+    assert pages[0]['page_ref'].read() == b"%" * 6_000
+    assert split_cache.stats()['bytes'] > split_cache.max_bytes
+    
+    lease.release()
+    split_cache.evict(keep=second)
+    
+    assert split_cache.load(first) is None
+    assert split_cache.stats()['entries'] == 1
+    attached = editor_module._ATTACHED_PAGE_STORES
+    assert not [path for path in attached if path.startswith(split_cache._entry_dir(first))]
+
+
+def test_split_cache_lease_released_on_garbage_collection(split_cache):
+    key, _ = build_entry(split_cache, "a", 100)
+    lease = split_cache.lease(key)
+    assert split_cache.in_use(key)
+    
+    del lease
+    assert not split_cache.in_use(key)
+
+
+def test_split_cache_drops_leases_of_exited_processes(split_cache):
+    key, _ = build_entry(split_cache, "a", 100)
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    lease_dir = os.path.join(split_cache._entry_dir(key), split_cache.LEASE_DIR)
+    os.makedirs(lease_dir, exist_ok=True)
+    open(os.path.join(lease_dir, f"{process.pid}-stale"), 'wb').close()
+    
+    assert not split_cache.in_use(key)
+    assert os.listdir(lease_dir) == []
+
+
+def test_split_cache_clear_skips_leased_entries(split_cache):
+    kept, _ = build_entry(split_cache, "a", 100)
+    dropped, _ = build_entry(split_cache, "b", 100)
+    lease = split_cache.lease(kept)
+    
+    split_cache.clear()
+    
+    assert split_cache.load(kept) is not None
+    assert split_cache.load(dropped) is None
+    lease.release()
+
+
+@pytest.fixture
+def page_cache(isolated_caches):
+    return editor_module.TransformedPageCache(str(isolated_caches / "pages"), 10_000)
+
+
+def cached_bytes_on_disk(cache):
+    return sum(size for _, size, _ in cache._scan())
+
+
+def test_page_cache_overwrite_keeps_size_accounting(page_cache):
+    for _ in range(5):
+        page_cache.put("ab" * 32, b"x" * 1_000)
+    page_cache.put("ab" * 32, b"x" * 400)
+    
+    assert page_cache.stats()['bytes'] == cached_bytes_on_disk(page_cache) == 400
+    assert page_cache.get("ab" * 32) == b"x" * 400
+
+
+def test_page_cache_evicts_oldest_when_over_budget(page_cache):
+    for index in range(12):
+        key = f"{index:02d}" * 32
+        page_cache.put(key, bytes([index]) * 1_000)
+        os.utime(page_cache._path(key), (index, index))  # 오래된 순서를 확실히 함
+    
+    # 11번째에서 한도를 넘어 90%까지 (가장 오래된 두 파일) 정리된 뒤 하나 더 추가
+    stats = page_cache.stats()
+    assert stats['bytes'] == cached_bytes_on_disk(page_cache) == 10_000
+    assert page_cache.get("00" * 32) is None and page_cache.get("01" * 32) is None
+    assert page_cache.get("11" * 32) == bytes([11]) * 1_000
+
+
+def test_page_cache_reads_existing_size_on_startup(page_cache):
+    page_cache.put("cd" * 32, b"y" * 700)
+    
+    reopened = editor_module.TransformedPageCache(page_cache.cache_dir, page_cache.max_bytes)
+    
+    assert reopened.stats()['bytes'] == 700
+    assert reopened.contains("cd" * 32) and not reopened.contains("ef" * 32)
+
+
+def test_preview_lru_stays_within_byte_budget():
+    cache = editor_module.ByteBudgetLRU(max_bytes=1000)
+    for name in ("a", "b", "c"):
+        cache.put(name, b"x" * 300)
+    
+    # 읽은 항목은 가장 최근으로 옮겨져 다음 정리에서 남음
+    assert cache.get("a") is not None
+    cache.put("d", b"x" * 300)
+    
+    assert cache.stats()['bytes'] == 900
+    assert cache.get("b") is None
+    assert all(cache.get(name) is not None for name in ("a", "c", "d"))
+    
+    # 같은 키를 다시 넣으면 크기만 바뀌고, 예산을 넘는 만큼 오래된 것부터 정리
+    cache.put("c", b"x" * 600)
+    stats = cache.stats()
+    assert stats['bytes'] <= 1000
+    assert stats['entries'] == 2 and cache.get("a") is None
+    assert stats['evictions'] == 2
+    
+    # 예산보다 큰 항목은 보관하지 않고 기존 항목도 그대로
+    cache.put("huge", b"x" * 1001)
+    assert cache.get("huge") is None
+    assert cache.stats()['bytes'] == 900
+
+
+def test_preview_lru_sizes_images_by_pixel_buffer():
+    cache = editor_module.ByteBudgetLRU(max_bytes=10_000)
+    cache.put("rgb", editor_module.Image.new('RGB', (40, 25)))
+    cache.put("gray", editor_module.Image.new('L', (40, 25)))
+    
+    assert cache.stats()['bytes'] == 40 * 25 * 3 + 40 * 25
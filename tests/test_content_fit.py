@@ -0,0 +1,118 @@
+import fitz
+import numpy as np
+import pytest
+
+import split_pdf_editor as editor_module
+from conftest import LEFT_BOX, RIGHT_BOX, MARGINS, ink_bounds
+from split_pdf_editor import mm
+
+HALF_WIDTH = 421
+# make_landscape_pdf가 첫 페이지 좌측 아래에 찍는 쪽 표시 사각형
+MARKER = fitz.Rect(20, 570, 28, 578)
+FIT_MARGINS = {'top': 20, 'bottom': 25, 'outer': 22, 'inner': 12}
+
+
+def split_book(pdf_path):
+    editor = editor_module.BookPublishingEditor()
+    return editor, editor.split_landscape_pages(pdf_path, True, None, "vector")
+
+
+def relative_bounds(rect, page_x0=0):
+    """반쪽 페이지(폭 421, 높이 595) 기준의 [왼쪽, 위, 오른쪽, 아래] 비율"""
+    return [(rect.x0 - page_x0) / HALF_WIDTH, rect.y0 / 595, (rect.x1 - page_x0) / HALF_WIDTH, rect.y1 / 595]
+
+
+@pytest.fixture
+def edge_cases_pdf(tmp_path):
+    """분할하면 빈 페이지, 가장자리까지 잉크, 옅은 회색 바탕, 작은 상자 순서가 되는 PDF"""
+    doc = fitz.open()
+    first = doc.new_page(width=842, height=595)
+    first.draw_rect(fitz.Rect(HALF_WIDTH, 0, 842, 595), color=None, fill=(0, 0, 0))
+    second = doc.new_page(width=842, height=595)
+    second.draw_rect(fitz.Rect(0, 0, HALF_WIDTH, 595), color=None, fill=(0.85, 0.85, 0.85))
+    second.draw_rect(fitz.Rect(600, 200, 700, 300), color=None, fill=(0, 0, 0))
+    path = tmp_path / "edge_cases.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_content_bounds_match_drawn_boxes(make_landscape_pdf):
+    editor, pages = split_book(make_landscape_pdf())
+    
+    analysis = editor.analyze_content_bounds(pages)
+    
+    assert analysis['sizes'].tolist() == [[HALF_WIDTH, 595], [HALF_WIDTH, 595]]
+    # 격자 한 칸(폭 1/141, 높이 1/200) 남짓까지 허용
+    assert analysis['bounds'][0].tolist() == pytest.approx(relative_bounds(LEFT_BOX | MARKER), abs=0.012)
+    assert analysis['bounds'][1].tolist() == pytest.approx(relative_bounds(RIGHT_BOX, HALF_WIDTH), abs=0.012)
+
+
+def test_proposed_scaling_keeps_ink_inside_margins(make_landscape_pdf, isolated_caches, tmp_path):
+    editor, pages = split_book(make_landscape_pdf(pages=2))
+    
+    analysis = editor.analyze_content_bounds(pages)
+    scaling_settings, report = editor.propose_scaling_settings(analysis, FIT_MARGINS)
+    
+    assert report == {'pages': 4, 'blank': 0, 'adjusted': report['adjusted'], 'overflow': []}
+    # 내용이 콘텐츠 영역보다 작으므로 기본값은 확대
+    assert scaling_settings['odd']['scale'] > 1.0 and scaling_settings['even']['scale'] > 1.0
+    
+    result = editor.create_book_pdf(pages, FIT_MARGINS, scaling_settings, False, None,
+                                    {'output_path': str(tmp_path / "book.pdf")})
+    
+    zoom = 2.0
+    tolerance = 0.5 * mm * zoom + 1
+    doc = fitz.open(result)
+    try:
+        for index, page in enumerate(doc):
+            margins = editor.calculate_page_margins(
+                index + 1, FIT_MARGINS['top'], FIT_MARGINS['bottom'], FIT_MARGINS['outer'], FIT_MARGINS['inner']
+            )
+            x0, y0, x1, y1 = ink_bounds(page, zoom)
+            assert x0 >= margins['left'] * mm * zoom - tolerance
+            assert y0 >= margins['top'] * mm * zoom - tolerance
+            assert x1 <= (page.rect.width - margins['right'] * mm) * zoom + tolerance
+            assert y1 <= (page.rect.height - margins['bottom'] * mm) * zoom + tolerance
+    finally:
+        doc.close()
+
+
+def test_content_bounds_edge_cases(edge_cases_pdf):
+    editor, pages = split_book(edge_cases_pdf)
+    
+    bounds = editor.analyze_content_bounds(pages)['bounds']
+    
+    # 빈 페이지와 임계값보다 밝은 바탕뿐인 페이지는 내용 없음(nan)
+    assert np.isnan(bounds[0]).all()
+    assert np.isnan(bounds[2]).all()
+    # 가장자리까지 닿는 잉크는 페이지 전체
+    assert bounds[1].tolist() == [0.0, 0.0, 1.0, 1.0]
+    assert bounds[3].tolist() == pytest.approx(relative_bounds(fitz.Rect(600, 200, 700, 300), HALF_WIDTH), abs=0.012)
+    
+    # 임계값을 바탕색보다 밝게 잡으면 회색 바탕도 잉크
+    lighter = editor.analyze_content_bounds(pages, ink_threshold=240)['bounds']
+    assert lighter[2].tolist() == [0.0, 0.0, 1.0, 1.0]
+
+
+def test_proposed_scaling_edge_cases(edge_cases_pdf):
+    editor, pages = split_book(edge_cases_pdf)
+    analysis = editor.analyze_content_bounds(pages)
+    
+    scaling_settings, report = editor.propose_scaling_settings(analysis, MARGINS)
+    
+    # 홀수 페이지는 모두 비어 있어 기본값 그대로, 빈 페이지에는 개별 조정 없음
+    assert scaling_settings['odd'] == {'scale': 1.0, 'offset_x': 0.0, 'offset_y': 0.0}
+    assert report['blank'] == 2
+    assert report['overflow'] == []
+    assert not {1, 3} & set(scaling_settings['individual_adjustments'])
+    
+    # 가장자리까지 닿는 페이지는 확대할 수 없으므로 최하위 백분위는 1.0,
+    # 최상위 백분위는 작은 상자 페이지를 채우는 비율이고 기본값(10)은 그 사이
+    smallest, _ = editor.propose_scaling_settings(analysis, MARGINS, percentile=0)
+    largest, _ = editor.propose_scaling_settings(analysis, MARGINS, percentile=100)
+    assert smallest['even']['scale'] == pytest.approx(1.0)
+    assert 1.0 <= scaling_settings['even']['scale'] < largest['even']['scale']
+    # 기본값보다 큰 페이지(가장자리까지 닿는 페이지)만 개별 조정으로 다시 축소
+    assert smallest['individual_adjustments'].get(2, {'scale_adjust': 0.0})['scale_adjust'] == 0.0
+    assert largest['individual_adjustments'][2]['scale_adjust'] < 0
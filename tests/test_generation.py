@@ -0,0 +1,350 @@
+import io
+import os
+
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+
+import split_pdf_editor as editor_module
+from conftest import MARGINS, NO_SCALING, ink_bounds
+
+
+# 홀수/짝수 페이지가 서로 다른 배율과 오프셋으로 배치되는 설정
+OFFSET_SCALING = {
+    'odd': {'scale': 0.8, 'offset_x': 4, 'offset_y': -6},
+    'even': {'scale': 0.9, 'offset_x': -3, 'offset_y': 5},
+    'individual_adjustments': {},
+}
+
+
+class StopAt(Exception):
+    pass
+
+
+def split_book(pdf_path):
+    editor = editor_module.BookPublishingEditor()
+    return editor, editor.split_landscape_pages(pdf_path, True, None, "vector")
+
+
+def output_page_count(path):
+    doc = fitz.open(path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+def rendered_ink_bounds(path, dpi):
+    """출력 PDF 페이지마다 출력 해상도로 렌더링한 잉크 경계"""
+    doc = fitz.open(path)
+    try:
+        return [ink_bounds(page, dpi / 72) for page in doc]
+    finally:
+        doc.close()
+
+
+def placed_canvases(path, dpi):
+    """출력 PDF에 넣은 이미지들을 배치 위치 그대로 출력 해상도의 캔버스에 붙인 화소 배열"""
+    doc = fitz.open(path)
+    try:
+        canvases = []
+        for page in doc:
+            size = (round(page.rect.width * dpi / 72), round(page.rect.height * dpi / 72))
+            canvas_img = Image.new('RGB', size, color='white')
+            for info in page.get_image_info(xrefs=True):
+                image = Image.open(io.BytesIO(doc.extract_image(info['xref'])['image'])).convert('RGB')
+                x0, y0 = info['bbox'][:2]
+                canvas_img.paste(image, (round(x0 * dpi / 72), round(y0 * dpi / 72)))
+            canvases.append(np.asarray(canvas_img))
+        return canvases
+    finally:
+        doc.close()
+
+
+def image_rects(path):
+    """출력 PDF 페이지마다 그려진 이미지 영역 (위쪽부터)"""
+    doc = fitz.open(path)
+    try:
+        return [sorted((fitz.Rect(info['bbox']) for info in page.get_image_info()), key=lambda rect: rect.y0)
+                for page in doc]
+    finally:
+        doc.close()
+
+
+def stop_at(page_number):
+    def progress(current, total, message):
+        if current == page_number:
+            raise StopAt()
+    return progress
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_checkpoint_resume_reuses_saved_pages(make_landscape_pdf, isolated_caches, tmp_path, workers):
+    editor, pages = split_book(make_landscape_pdf(pages=4))
+    settings = {
+        'workers': workers,
+        'output_path': str(tmp_path / "book.pdf"),
+        'checkpoint_dir': str(tmp_path / "checkpoints"),
+    }
+    
+    with pytest.raises(StopAt):
+        editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, stop_at(4), settings)
+    assert not (tmp_path / "book.pdf").exists()
+    
+    result = editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, None, settings)
+    
+    assert result == settings['output_path']
+    assert output_page_count(result) == len(pages)
+    assert editor.checkpoint_reused == 3
+    # 완료 후 체크포인트 정리, 예산도 모두 반환
+    assert not list((tmp_path / "checkpoints").rglob("*.pdf"))
+    assert editor.memory_usage.current == 0
+
+
+def test_parallel_resume_reads_saved_pages_when_writing(make_landscape_pdf, isolated_caches, tmp_path, monkeypatch):
+    editor, pages = split_book(make_landscape_pdf(pages=3))
+    settings = {
+        'workers': 2,
+        'output_path': str(tmp_path / "book.pdf"),
+        'checkpoint_dir': str(tmp_path / "checkpoints"),
+    }
+    with pytest.raises(StopAt):
+        editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, stop_at(len(pages)), settings)
+    
+    written = []
+    loads = []
+    add_page = editor_module.StreamingPdfWriter.add_page
+    load_saved_page = editor.__class__._load_saved_page
+    
+    def counting_add_page(writer, page, share_key=None):
+        written.append(share_key)
+        return add_page(writer, page, share_key)
+    
+    def recording_load(self, page_number, keys, checkpoint, page_cache):
+        # 저장된 페이지는 기록할 차례에 예산을 확보한 상태로 읽어야 함
+        loads.append((page_number, len(written), self.memory_usage.current))
+        return load_saved_page(self, page_number, keys, checkpoint, page_cache)
+    
+    monkeypatch.setattr(editor_module.StreamingPdfWriter, 'add_page', counting_add_page)
+    monkeypatch.setattr(editor_module.BookPublishingEditor, '_load_saved_page', recording_load)
+    editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, None, settings)
+    
+    saved_count = len(pages) - 1
+    assert [page_number for page_number, _, _ in loads] == list(range(1, saved_count + 1))
+    assert all(page_number - 1 == written_before for page_number, written_before, _ in loads)
+    assert all(reserved > 0 for _, _, reserved in loads)
+    assert len(written) == len(pages)
+
+
+@pytest.fixture
+def repeated_pdf(tmp_path):
+    """같은 가로 페이지가 반복되는 PDF (좌/우 절반이 각각 서로 중복)"""
+    def make(pages=3):
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page(width=842, height=595)
+            page.insert_text((60, 100), "Chapter", fontsize=24)
+            page.insert_text((480, 100), "Section", fontsize=24)
+        path = tmp_path / "repeated.pdf"
+        doc.save(str(path))
+        doc.close()
+        return str(path)
+    return make
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_dedupe_keeps_every_page(repeated_pdf, isolated_caches, tmp_path, workers):
+    editor, pages = split_book(repeated_pdf(pages=3))
+    settings = {'workers': workers, 'dedupe': True, 'output_path': str(tmp_path / "book.pdf")}
+    
+    result = editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, None, settings)
+    
+    assert output_page_count(result) == len(pages) == 6
+    # 좌측 절반은 모두 홀수, 우측 절반은 모두 짝수 위치라 변환 결과 키는 두 가지뿐
+    assert editor.duplicate_pages == 4
+
+
+def test_parallel_dedupe_renders_duplicate_when_first_copy_failed(repeated_pdf, isolated_caches, tmp_path, monkeypatch):
+    editor, pages = split_book(repeated_pdf(pages=3))
+    
+    def failing_workers(self, split_pages, *args, **kwargs):
+        # 워커에서 변환에 실패한 페이지는 None으로 전달됨
+        for _ in split_pages:
+            yield None
+    
+    monkeypatch.setattr(editor_module.BookPublishingEditor, '_render_book_pages_parallel', failing_workers)
+    settings = {'workers': 2, 'dedupe': True, 'output_path': str(tmp_path / "book.pdf")}
+    
+    result = editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, None, settings)
+    
+    # 워커에 보낸 두 페이지(각 키의 첫 페이지)만 빠지고 중복 페이지는 이 프로세스에서 변환
+    assert output_page_count(result) == len(pages) - 2
+    assert editor.duplicate_pages == 2
+
+
+@pytest.mark.parametrize("scaling", [NO_SCALING, OFFSET_SCALING], ids=["centered", "offset"])
+def test_raster_strips_match_page_mode(make_landscape_pdf, isolated_caches, tmp_path, monkeypatch, scaling):
+    # 띠를 작게 나눠 상자 사이의 흰 띠가 여러 개 생기게 함
+    monkeypatch.setattr(editor_module.BookPublishingEditor, 'RASTER_STRIP_BYTES', 64 * 1024)
+    editor, pages = split_book(make_landscape_pdf())
+    dpi = 150
+    outputs = {}
+    rendered = []
+    pixmap_to_image = editor_module._pixmap_to_image
+    
+    def counting_pixmap_to_image(pix):
+        rendered.append(pix.height)
+        return pixmap_to_image(pix)
+    
+    monkeypatch.setattr(editor_module, '_pixmap_to_image', counting_pixmap_to_image)
+    for strips in (False, True):
+        rendered.clear()
+        settings = {'engine': 'raster', 'dpi': dpi, 'strips': strips,
+                    'output_path': str(tmp_path / f"book-{strips}.pdf")}
+        outputs[strips] = editor.create_book_pdf(pages, MARGINS, scaling, False, None, settings)
+    
+    # 넣은 화소는 같은 장치 픽셀에 같은 값으로 배치됨
+    for page_canvas, strip_canvas in zip(placed_canvases(outputs[False], dpi), placed_canvases(outputs[True], dpi)):
+        assert np.array_equal(page_canvas, strip_canvas)
+    
+    # 다시 렌더링하면 소수점 위치의 띠 가장자리 보간 때문에 1px까지 차이날 수 있음
+    for page_bounds, strip_bounds in zip(rendered_ink_bounds(outputs[False], dpi),
+                                         rendered_ink_bounds(outputs[True], dpi)):
+        assert all(abs(a - b) <= 1 for a, b in zip(page_bounds, strip_bounds))
+    
+    # 렌더링한 띠 중 흰 띠는 기록하지 않음 (좌측 페이지는 두 상자 사이가 비어 있음)
+    rects = image_rects(outputs[True])
+    assert 1 < sum(len(page_rects) for page_rects in rects) < len(rendered)
+    assert any(lower.y0 - upper.y1 > 1 for upper, lower in zip(rects[0], rects[0][1:]))
+
+
+def image_filters(path):
+    """출력 PDF의 페이지마다 이미지 객체의 /Filter"""
+    doc = fitz.open(path)
+    try:
+        return [[doc.xref_get_key(image[0], "Filter")[1] for image in page.get_images()] for page in doc]
+    finally:
+        doc.close()
+
+
+@pytest.fixture
+def photo_pdf(tmp_path):
+    """연속 계조 그림(사진과 비슷한 그라데이션)이 가득한 가로 페이지 1장"""
+    ys, xs = np.mgrid[0:300, 0:420]
+    pixels = np.stack([xs * 255 // 420, ys * 255 // 300, (xs + ys) * 255 // 720], axis=-1).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    doc = fitz.open()
+    page = doc.new_page(width=842, height=595)
+    page.insert_image(page.rect, stream=buffer.getvalue())
+    path = tmp_path / "photo.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.mark.parametrize("codec", ["flate", "jpeg", "bilevel", "auto"])
+def test_raster_codecs_keep_page_content(make_landscape_pdf, isolated_caches, tmp_path, codec):
+    editor, pages = split_book(make_landscape_pdf())
+    dpi = 150
+    outputs = {}
+    for name in ("flate", codec):
+        settings = {'engine': 'raster', 'dpi': dpi, 'codec': name,
+                    'output_path': str(tmp_path / f"book-{name}.pdf")}
+        outputs[name] = editor.create_book_pdf(pages[:1], MARGINS, NO_SCALING, False, None, settings)
+    
+    # 손실 압축과 1비트 변환을 거쳐도 잉크 위치는 같아야 함 (CCITT 극성이 뒤집히면 페이지 전체가 잉크)
+    (expected,), (actual,) = rendered_ink_bounds(outputs["flate"], dpi), rendered_ink_bounds(outputs[codec], dpi)
+    assert expected is not None
+    assert all(abs(a - b) <= 1 for a, b in zip(expected, actual))
+    
+    # 흑백 상자뿐인 페이지는 auto에서 bilevel
+    used = "bilevel" if codec == "auto" else codec
+    assert [entry['codec'] for entry in editor.encoding_report] == [used]
+    if used == "bilevel" and editor_module.pil_features.check('libtiff'):
+        assert image_filters(outputs[codec]) == [["/CCITTFaxDecode"]]
+
+
+def test_auto_codec_uses_jpeg_for_photo_pages(photo_pdf, isolated_caches, tmp_path):
+    editor, pages = split_book(photo_pdf)
+    settings = {'engine': 'raster', 'dpi': 100, 'codec': "auto", 'output_path': str(tmp_path / "book.pdf")}
+    
+    result = editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, None, settings)
+    
+    assert [entry['codec'] for entry in editor.encoding_report] == ["jpeg", "jpeg"]
+    assert image_filters(result) == [["/DCTDecode"], ["/DCTDecode"]]
+
+
+@pytest.mark.parametrize("scaling", [
+    OFFSET_SCALING,
+    {
+        'odd': {'scale': 1.1, 'offset_x': -5, 'offset_y': 3},
+        'even': {'scale': 0.6, 'offset_x': 12, 'offset_y': -9},
+        'individual_adjustments': {2: {'scale_adjust': 0.1, 'offset_x_adjust': 2, 'offset_y_adjust': -3}},
+    },
+], ids=["reduced", "mixed"])
+@pytest.mark.parametrize("page_number", [1, 2], ids=["odd", "even"])
+def test_vector_placement_matches_raster(make_landscape_pdf, isolated_caches, tmp_path, scaling, page_number):
+    editor, pages = split_book(make_landscape_pdf())
+    dpi = 150
+    bounds = {}
+    for engine in ("vector", "raster"):
+        settings = {'engine': engine, 'dpi': dpi, 'output_path': str(tmp_path / f"book-{engine}.pdf")}
+        result = editor.create_book_pdf(pages, MARGINS, scaling, False, None, settings)
+        bounds[engine] = rendered_ink_bounds(result, dpi)[page_number - 1]
+    
+    # 배치 행렬(벡터)과 정수 픽셀 배치(래스터)의 반올림 차이만 허용
+    assert bounds["vector"] is not None
+    assert all(abs(a - b) <= 2 for a, b in zip(bounds["vector"], bounds["raster"]))
+
+
+class RecordingLease:
+    def __init__(self):
+        self.released = 0
+    
+    def release(self):
+        self.released += 1
+
+
+def test_generation_job_runs_to_done(make_landscape_pdf, isolated_caches, tmp_path):
+    editor, pages = split_book(make_landscape_pdf(pages=2))
+    jobs = editor_module.GenerationJobQueue(str(tmp_path / "jobs"))
+    lease = RecordingLease()
+    
+    job_id = jobs.submit("session", "book", editor, pages, MARGINS, NO_SCALING, lease=lease)
+    job = jobs.get(job_id)
+    job.future.result(timeout=60)
+    
+    assert job.status == editor_module.GenerationJob.DONE
+    assert job.error is None
+    assert job.page_count == output_page_count(job.output_path) == len(pages)
+    assert job.progress[0] == job.progress[1] == len(pages)
+    assert [entry.job_id for entry in jobs.jobs("session")] == [job_id]
+    # 끝난 작업은 분할 페이지 참조와 캐시 사용 표시를 놓음
+    assert job.pages is None and lease.released == 1
+
+
+def test_generation_job_failure_surfaces_as_failed(make_landscape_pdf, isolated_caches, tmp_path, monkeypatch):
+    editor, pages = split_book(make_landscape_pdf())
+    
+    def failing_create_book_pdf(self, split_pages, margins, scaling_settings, show_margin_guides=False,
+                                progress_callback=None, output_settings=None):
+        with open(output_settings['output_path'], 'wb') as f:
+            f.write(b"%PDF-partial")
+        raise RuntimeError("디스크 공간 부족")
+    
+    monkeypatch.setattr(editor_module.BookPublishingEditor, 'create_book_pdf', failing_create_book_pdf)
+    jobs = editor_module.GenerationJobQueue(str(tmp_path / "jobs"))
+    lease = RecordingLease()
+    
+    job_id = jobs.submit("session", "book", editor, pages, MARGINS, NO_SCALING, lease=lease)
+    job = jobs.get(job_id)
+    job.future.result(timeout=60)
+    
+    assert job.status == editor_module.GenerationJob.FAILED
+    assert not job.is_active
+    assert job.error == "디스크 공간 부족"
+    # 실패한 작업의 출력 파일은 지우고 캐시 사용 표시는 놓음
+    assert not os.path.exists(job.output_path)
+    assert lease.released == 1
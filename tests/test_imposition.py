@@ -0,0 +1,88 @@
+import pytest
+
+import split_pdf_editor as editor_module
+from split_pdf_editor import BLANK_PAGE_INDEX, imposition_order
+
+BLANK = BLANK_PAGE_INDEX
+
+
+def reading_order(page_count, page_order, signature_pages):
+    """출력 순서를 채운 책의 읽는 순서로 되돌림 (빈 페이지 없는 같은 길이의 순서로 자리 계산)"""
+    order = imposition_order(page_count, page_order, signature_pages)
+    positions = imposition_order(len(order), page_order, signature_pages)
+    reading = [None] * len(order)
+    for position, page in zip(positions, order):
+        reading[position] = page
+    return reading
+
+
+def test_plain_order_is_identity():
+    assert list(imposition_order(5, "1234")) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("page_count, expected", [
+    (8, [1, 2, 3, 0, 5, 6, 7, 4]),
+    (6, [1, 2, 3, 0, BLANK, BLANK, 5, 4]),
+])
+def test_repeating_2341_pattern(page_count, expected):
+    assert imposition_order(page_count, "2341") == expected
+
+
+def test_saddle_stitch_single_signature():
+    # 8페이지 중철: 바깥 종이 앞면 (8, 1), 뒷면 (2, 7), 안쪽 종이 (6, 3), (4, 5)
+    assert imposition_order(8, "saddle", 4) == [7, 0, 1, 6, 5, 2, 3, 4]
+
+
+def test_perfect_binding_stacks_signatures():
+    assert imposition_order(16, "perfect", 8) == [
+        7, 0, 1, 6, 5, 2, 3, 4,
+        15, 8, 9, 14, 13, 10, 11, 12,
+    ]
+
+
+@pytest.mark.parametrize("page_order", ["2341", "saddle", "perfect"])
+@pytest.mark.parametrize("signature_pages", [4, 8, 16, 32])
+@pytest.mark.parametrize("page_count", [1, 2, 5, 8, 13, 33])
+def test_order_is_padded_permutation(page_count, page_order, signature_pages):
+    order = imposition_order(page_count, page_order, signature_pages)
+    block_pages = 4 if page_order == "2341" else signature_pages
+    
+    assert len(order) % block_pages == 0
+    assert len(order) - page_count < block_pages
+    assert sorted(page for page in order if page != BLANK) == list(range(page_count))
+    assert order.count(BLANK) == len(order) - page_count
+
+
+@pytest.mark.parametrize("page_order", ["2341", "saddle", "perfect"])
+@pytest.mark.parametrize("page_count", [2, 5, 10, 13])
+def test_blank_pages_go_before_back_cover(page_count, page_order):
+    reading = reading_order(page_count, page_order, 8)
+    blanks = len(reading) - page_count
+    
+    assert reading == list(range(page_count - 1)) + [BLANK] * blanks + [page_count - 1]
+
+
+def test_single_page_is_not_moved_behind_blanks():
+    assert reading_order(1, "saddle", 4) == [0, BLANK, BLANK, BLANK]
+
+
+def test_unknown_order_and_signature_size_are_rejected():
+    with pytest.raises(ValueError):
+        imposition_order(4, "zigzag")
+    with pytest.raises(ValueError):
+        imposition_order(4, "perfect", 12)
+
+
+def test_order_view_shares_one_blank_page_of_split_size(make_landscape_pdf):
+    editor = editor_module.BookPublishingEditor()
+    pages = editor.split_landscape_pages(make_landscape_pdf(pages=3), True, None, "vector")
+    
+    view = editor.apply_page_order(pages, "perfect", 8)
+    
+    assert len(view) == 8 and view.blank_count == 2
+    blanks = [page_info for page_info in view if page_info['side'] == 'blank']
+    assert len(blanks) == 2 and blanks[0] is blanks[1]
+    assert editor_module.split_page_size(blanks[0]) == editor_module.split_page_size(pages[0])
+    # 6페이지를 8페이지 접장 하나로: 바깥 종이 앞면 첫 자리가 뒤표지(마지막 분할 페이지)
+    assert view[0] is pages[-1]
+    assert [page_info['side'] for page_info in view][3:5] == ['blank', 'blank']
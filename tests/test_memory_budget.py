@@ -0,0 +1,50 @@
+import threading
+
+import split_pdf_editor as editor_module
+
+
+def test_acquire_waits_for_running_holder():
+    budget = editor_module.MemoryBudget(100)
+    holder, waiter = editor_module.MemoryUsage(), editor_module.MemoryUsage()
+    budget.acquire(80, holder)
+    
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (budget.acquire(50, waiter), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.2)
+    
+    budget.release(80, holder)
+    assert acquired.wait(5)
+    thread.join()
+    assert waiter.current == 50 and budget.used == 50
+
+
+def test_holders_blocked_on_each_other_do_not_deadlock():
+    budget = editor_module.MemoryBudget(100)
+    usages = [editor_module.MemoryUsage(), editor_module.MemoryUsage()]
+    for usage in usages:
+        budget.acquire(50, usage)
+    
+    # 둘 다 확보한 채로 더 요청하면 한쪽은 예산을 넘겨서라도 진행하고,
+    # 다른 쪽은 진행한 작업이 돌려줄 때까지 기다림
+    done = []
+    
+    def acquire(usage):
+        budget.acquire(30, usage)
+        done.append(usage)
+    
+    threads = [threading.Thread(target=acquire, args=(usage,), daemon=True) for usage in usages]
+    for thread in threads:
+        thread.start()
+    for _ in range(50):
+        if done:
+            break
+        threading.Event().wait(0.1)
+    assert len(done) == 1
+    assert budget.used == 130 and budget.stats()['waits'] >= 1
+    
+    budget.release(80, done[0])
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(done) == 2 and budget.used == 80
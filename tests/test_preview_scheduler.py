@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from split_pdf_editor import PreviewScheduler
+
+
+def blocked_scheduler():
+    """작업 스레드 하나가 막혀 있는 스케줄러 -> (스케줄러, 막힌 작업을 풀어 줄 Event)"""
+    scheduler = PreviewScheduler(workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    
+    def gate():
+        started.set()
+        release.wait(5)
+    
+    scheduler.set_generation("gate", 0)
+    scheduler.submit("gate", 0, PreviewScheduler.PRIORITY_VISIBLE, "gate", gate)
+    assert started.wait(5)
+    return scheduler, release
+
+
+def test_higher_priority_tasks_run_first():
+    scheduler, release = blocked_scheduler()
+    scheduler.set_generation("session", 1)
+    ran = []
+    futures = [
+        scheduler.submit("session", 1, priority, key, lambda key=key: ran.append(key))
+        for priority, key in [
+            (PreviewScheduler.PRIORITY_WARMUP, "warmup"),
+            (PreviewScheduler.PRIORITY_NEIGHBOR, "neighbor"),
+            (PreviewScheduler.PRIORITY_VISIBLE, "visible"),
+            (PreviewScheduler.PRIORITY_NEIGHBOR, "neighbor-later"),
+        ]
+    ]
+    # 대기 중인 작업을 다시 예약하면 같은 Future가 더 높은 우선순위로 올라가고 한 번만 실행
+    promoted = scheduler.submit("session", 1, PreviewScheduler.PRIORITY_VISIBLE, "warmup", lambda: ran.append("warmup"))
+    assert promoted is futures[0]
+    
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    
+    assert ran == ["visible", "warmup", "neighbor", "neighbor-later"]
+    assert scheduler.pending_count("session") == 0
+
+
+def test_stale_generation_tasks_are_dropped():
+    scheduler, release = blocked_scheduler()
+    scheduler.set_generation("session", 1)
+    ran = []
+    stale = [
+        scheduler.submit("session", 1, PreviewScheduler.PRIORITY_VISIBLE, key, lambda key=key: ran.append(key))
+        for key in ("page-1", "page-2")
+    ]
+    assert scheduler.pending_count("session") == 2
+    
+    scheduler.set_generation("session", 2)
+    current = scheduler.submit("session", 2, PreviewScheduler.PRIORITY_WARMUP, "page-1", lambda: ran.append("new"))
+    with pytest.raises(ValueError):
+        scheduler.submit("session", 1, PreviewScheduler.PRIORITY_VISIBLE, "page-3", lambda: ran.append("page-3"))
+    
+    release.set()
+    current.result(timeout=5)
+    
+    assert all(future.cancelled() for future in stale)
+    assert ran == ["new"]
+    assert scheduler.pending_count() == 0
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+import split_pdf_editor as editor_module
+from conftest import pdf_ink_bounds
+
+
+def split_bounds(pdf_path, split_mode):
+    editor = editor_module.BookPublishingEditor()
+    pages = editor.split_landscape_pages(pdf_path, True, None, split_mode)
+    return [(page_info['side'],) + pdf_ink_bounds(page_info['pdf_data']) for page_info in pages]
+
+
+def assert_same_bounds(vector, raster, tolerance=2):
+    assert [side for side, _, _ in vector] == [side for side, _, _ in raster]
+    for (_, vector_size, vector_ink), (_, raster_size, raster_ink) in zip(vector, raster):
+        assert vector_size == raster_size
+        assert vector_ink is not None and raster_ink is not None
+        assert all(abs(a - b) <= tolerance for a, b in zip(vector_ink, raster_ink))
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_vector_split_matches_raster_on_rotated_pages(make_landscape_pdf, rotation):
+    pdf_path = make_landscape_pdf(rotation=rotation)
+    
+    vector = split_bounds(pdf_path, "vector")
+    raster = split_bounds(pdf_path, "raster")
+    
+    assert [side for side, _, _ in vector] == ['left', 'right']
+    assert_same_bounds(vector, raster)
+
+
+def test_vector_split_keeps_halves_on_their_side(make_landscape_pdf):
+    (_, _, left_ink), (_, _, right_ink) = split_bounds(make_landscape_pdf(rotation=90), "vector")
+    
+    # 좌측 상자는 좌측 절반의 위쪽, 우측 상자는 우측 절반의 아래쪽에 있어야 함
+    assert left_ink[1] < 100
+    assert right_ink[3] > 500
+
+
+def test_vector_split_restores_source_rotation(make_landscape_pdf):
+    editor = editor_module.BookPublishingEditor()
+    doc = editor_module.fitz.open(make_landscape_pdf(rotation=90))
+    try:
+        editor._split_source_page(doc, 0, "vector")
+        assert doc[0].rotation == 90
+    finally:
+        doc.close()
+
+
+def run_while_fitz_locked(fn):
+    """다른 스레드가 MuPDF 잠금을 쥔 동안 fn을 실행 -> (잠금 중 끝났는지, 결과)"""
+    locked = threading.Event()
+    release = threading.Event()
+    
+    def hold():
+        with editor_module.get_fitz_lock():
+            locked.set()
+            release.wait(5)
+    
+    holder = threading.Thread(target=hold, daemon=True)
+    holder.start()
+    locked.wait(5)
+    
+    result = []
+    worker = threading.Thread(target=lambda: result.append(fn()), daemon=True)
+    worker.start()
+    worker.join(0.3)
+    finished_while_locked = not worker.is_alive()
+    release.set()
+    worker.join(10)
+    holder.join(5)
+    return finished_while_locked, result[0]
+
+
+def test_serial_split_waits_for_fitz_lock(make_landscape_pdf):
+    pdf_path = make_landscape_pdf()
+    editor = editor_module.BookPublishingEditor()
+    
+    finished_while_locked, pages = run_while_fitz_locked(
+        lambda: editor.split_landscape_pages(pdf_path, True, None, "vector")
+    )
+    
+    assert not finished_while_locked
+    assert len(pages) == 2
+
+
+def test_lazy_split_opens_source_under_fitz_lock(make_landscape_pdf):
+    pdf_path = make_landscape_pdf(pages=2)
+    editor = editor_module.BookPublishingEditor()
+    
+    finished_while_locked, lazy_pages = run_while_fitz_locked(
+        lambda: editor_module.LazySplitPages(editor, pdf_path)
+    )
+    
+    assert not finished_while_locked
+    assert len(lazy_pages) == 4
+    assert [page_info['side'] for page_info in lazy_pages] == ['left', 'right'] * 2
+    assert lazy_pages.is_complete
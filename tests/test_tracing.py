@@ -0,0 +1,86 @@
+import json
+import os
+
+import split_pdf_editor as editor_module
+from conftest import MARGINS, NO_SCALING
+from split_pdf_editor import PipelineTracer
+
+
+def load_trace(tracer, path=None):
+    """export_chrome_trace() 결과를 JSON으로 읽어 (구간 이벤트, 메타데이터 이벤트)"""
+    if path is None:
+        trace = json.loads(tracer.export_chrome_trace().decode('utf-8'))
+    else:
+        with open(tracer.export_chrome_trace(path), encoding='utf-8') as f:
+            trace = json.load(f)
+    
+    assert set(trace) == {'traceEvents', 'displayTimeUnit'}
+    spans = [event for event in trace['traceEvents'] if event['ph'] != 'M']
+    metadata = [event for event in trace['traceEvents'] if event['ph'] == 'M']
+    # 구간은 모두 완료 이벤트("X")이고 Chrome trace 필수 필드를 가짐
+    for event in spans:
+        assert event['ph'] == 'X'
+        assert isinstance(event['name'], str) and isinstance(event['cat'], str)
+        assert event['ts'] >= 0 and event['dur'] >= 0
+        assert isinstance(event['pid'], int) and isinstance(event['tid'], int)
+    return spans, metadata
+
+
+def test_chrome_trace_export_has_complete_events(tmp_path):
+    tracer = PipelineTracer()
+    with tracer.span("outer", category="generate", pages=2):
+        start = tracer.start()
+        start = tracer.record("inner.first", start, category="transform", page=1)
+        tracer.record("inner.second", start, category="transform", page=2)
+    # 워커 프로세스에서 기록한 이벤트 합치기
+    worker_events = [dict(event, pid=os.getpid() + 1) for event in tracer.events() if event['name'] == "inner.first"]
+    tracer.add_events(worker_events)
+    
+    spans, metadata = load_trace(tracer, tmp_path / "trace.json")
+    
+    by_name = {event['name']: event for event in spans if event['pid'] == os.getpid()}
+    assert sorted(by_name) == ["inner.first", "inner.second", "outer"]
+    assert by_name["outer"]['args'] == {'pages': 2}
+    assert by_name["inner.first"]['args'] == {'page': 1}
+    # 첫 이벤트가 시각 0, 안쪽 구간은 바깥 구간 안에 이어서 놓임
+    assert min(event['ts'] for event in spans) == 0
+    outer, first, second = by_name["outer"], by_name["inner.first"], by_name["inner.second"]
+    assert outer['ts'] <= first['ts'] <= first['ts'] + first['dur'] <= second['ts'] + 0.01
+    assert second['ts'] + second['dur'] <= outer['ts'] + outer['dur'] + 0.01
+    
+    # 프로세스마다 이름 메타데이터가 하나씩
+    names = {event['pid']: event['args']['name'] for event in metadata}
+    assert names == {os.getpid(): 'main', os.getpid() + 1: f'worker {os.getpid() + 1}'}
+
+
+def test_disabled_and_full_tracers_record_nothing_more():
+    disabled = PipelineTracer(enabled=False)
+    assert disabled.start() is None
+    with disabled.span("ignored"):
+        pass
+    assert disabled.record("ignored", disabled.start()) is None
+    assert load_trace(disabled) == ([], [])
+    
+    full = PipelineTracer(max_events=2)
+    for _ in range(3):
+        with full.span("page"):
+            pass
+    full.add_events(full.events())
+    
+    assert len(full.events()) == 2
+    assert full.dropped == 3
+    full.clear()
+    assert full.events() == [] and full.dropped == 0
+
+
+def test_book_generation_trace_is_valid(make_landscape_pdf, isolated_caches, tmp_path):
+    tracer = PipelineTracer()
+    editor = editor_module.BookPublishingEditor(tracer=tracer)
+    pages = editor.split_landscape_pages(make_landscape_pdf(pages=2), True, None, "vector")
+    editor.create_book_pdf(pages, MARGINS, NO_SCALING, False, None, {'output_path': str(tmp_path / "book.pdf")})
+    
+    spans, metadata = load_trace(tracer)
+    
+    assert sum(event['name'] == "transform.vector" for event in spans) == len(pages)
+    assert {event['cat'] for event in spans} >= {"split", "transform"}
+    assert [event['args']['name'] for event in metadata] == ['main']